@@ -21,6 +21,9 @@ from chainspacecontract import ChainspaceContract
 ## contract name
 contract = ChainspaceContract('auction')
 
+## system parameters, built once at load
+bp_setup(2)
+
 
 ####################################################################
 # methods
@@ -38,23 +41,28 @@ def init():
 # create
 # ------------------------------------------------------------------
 @contract.method('create')
-def create(inputs, reference_inputs, parameters, aggr_vk, t_commit, t_reveal, uid, v0, ov0):
+def create(inputs, reference_inputs, parameters, aggr_vk, t_commit, t_reveal, uid, v0, ov0, sealed=False, clock=None, t_rank=None):
     
     # commitment to the minim price
-    (G, o, g1, hs, g2, e) = setup()
-    cv0 = g1*v0 + hs[0]*ov0
+    cv0 = bid_commitment(v0, ov0)
     
     # auction object
     auction = {
         'type' : 'Auction',
         'list' : [],
-        'vk'  : pack(aggr_vk),
+        'index' : {}, # slot of each zeta in 'list'
+        'winner' : None, # slot of the highest revealed bid
+        'sealed' : sealed, # bids stay committed, and are ranked by 'rank'
         't_commit' : t_commit,
         't_reveal' : t_reveal,
+        't_rank' : t_rank, # sealed auctions: deadline of 'rank', after which unranked bids can be withdrawn
+        'clock' : clock, # ID of the clock giving the epochs of 't_commit' and 't_reveal'; required by sealed auctions
         'uid' : uid,
         'cv0' : pack(cv0),
         'file_hash' : ''
     }
+    # only the fingerprint is stored if the key object is a reference input
+    store_vk(auction, 'vk', aggr_vk, reference_inputs)
 
     # return
     return {
@@ -67,12 +75,15 @@ def create(inputs, reference_inputs, parameters, aggr_vk, t_commit, t_reveal, ui
 @contract.method('commit')
 def commit(inputs, reference_inputs, parameters, seq, v, sigma):
     auction = loads(inputs[0])
-    aggr_vk = unpack(auction['vk'])
+    packed_vk = resolve_vk(auction, 'vk', reference_inputs)
+    aggr_vk = unpack_cached(packed_vk)
     
     # auction object
-    bp_params = setup(2)
+    bp_params = bp_setup(2)
+    tables = vk_tables(bp_params, aggr_vk, packed=packed_vk)
     private_m = [seq, v]
-    (Theta, zeta) = make_proof_zeta(bp_params, aggr_vk, sigma, private_m)
+    (Theta, zeta) = make_proof_zeta(bp_params, aggr_vk, sigma, private_m, tables=tables)
+    auction['index'][pack(zeta)] = len(auction['list'])
     auction['list'].append(pack(zeta))
     #assert verify_proof_zeta(bp_params, aggr_vk, Theta, zeta)
     
@@ -88,16 +99,19 @@ def commit(inputs, reference_inputs, parameters, seq, v, sigma):
 @contract.method('reveal')
 def reveal(inputs, reference_inputs, parameters, seq, sigma):
     auction = loads(inputs[0])
-    aggr_vk = unpack(auction['vk'])
+    packed_vk = resolve_vk(auction, 'vk', reference_inputs)
+    aggr_vk = unpack_cached(packed_vk)
     v = loads(parameters[0])
     
     # auction object
-    bp_params = setup(2)
+    bp_params = bp_setup(2)
+    tables = vk_tables(bp_params, aggr_vk, packed=packed_vk)
     private_m = [seq]
-    (Theta, zeta) = make_proof_zeta(bp_params, aggr_vk, sigma, private_m)
+    (Theta, zeta) = make_proof_zeta(bp_params, aggr_vk, sigma, private_m, tables=tables)
     #assert verify_proof_zeta(bp_params, aggr_vk, Theta, zeta, public_m=[v])
-    packet = (v, pack(zeta))
-    auction['list'] = [packet if x==pack(zeta) else x for x in auction['list']]
+    slot = auction['index'][pack(zeta)]
+    auction['list'][slot] = [v, pack(zeta)]
+    auction['winner'] = next_winner(auction, slot, v)
     
     # return
     return {
@@ -105,24 +119,90 @@ def reveal(inputs, reference_inputs, parameters, seq, sigma):
         'extra_parameters' : (pack(Theta), pack(zeta)),
 }
 
+# ------------------------------------------------------------------
+# seal
+# NOTE: 
+#   - reveal of sealed auctions; the bid 'v' stays hidden in cv = v*g1 + ov*hs[0]
+#   - the bidder sends (v, ov) to the auctioneer, off-chain
+# ------------------------------------------------------------------
+@contract.method('seal')
+def seal(inputs, reference_inputs, parameters, seq, v, ov, sigma):
+    auction = loads(inputs[0])
+    packed_vk = resolve_vk(auction, 'vk', reference_inputs)
+    aggr_vk = unpack_cached(packed_vk)
+    
+    # auction object
+    bp_params = bp_setup(2)
+    tables = vk_tables(bp_params, aggr_vk, packed=packed_vk)
+    (Theta, zeta, cv) = make_proof_sealed(bp_params, aggr_vk, sigma, seq, v, ov, tables=tables)
+    #assert verify_proof_sealed(bp_params, aggr_vk, Theta, zeta, cv)
+    assert auction['sealed'] and auction['winner'] is None
+    slot = auction['index'][pack(zeta)]
+    auction['list'][slot] = [pack(cv), pack(zeta)]
+    
+    # return
+    return {
+        'outputs': (dumps(auction),),
+        'extra_parameters' : (pack(cv), pack(Theta), pack(zeta)),
+    }
+
+# ------------------------------------------------------------------
+# rank
+# NOTE: 
+#   - 'openings' maps the slot of each sealed bid to its (v, ov); every sealed bid is ranked
+#   - if a bidder withholds its opening, the auction cannot be ranked and all the bids are withdrawn after 't_rank'
+#   - proves that the winning bid is at least the minimum price, and beats every other sealed bid
+#   - if multiple biggest bids, the first bidder wins
+#   - if no bid reaches the minimum price, there is no ranking and the bids are withdrawn after 't_rank'
+# ------------------------------------------------------------------
+@contract.method('rank')
+def rank(inputs, reference_inputs, parameters, openings, v0, ov0):
+    auction = loads(inputs[0])
+    assert auction['sealed'] and auction['winner'] is None
+    
+    # auction object
+    bp_params = bp_setup(2)
+    slots = sealed_slots(auction)
+    assert all(i in openings for i in slots), 'an opening is missing; the bids are withdrawn after t_rank'
+    winner = min(slots, key=lambda i: (-openings[i][0], i))
+    (v_w, ov_w) = openings[winner]
+    assert v_w >= v0
+    pi_rank = []
+    for (slot, D) in rank_statements(auction, winner):
+        if slot is None:
+            (v, ov, tie) = (v0, ov0, 0)
+        else:
+            (v, ov) = openings[slot]
+            tie = 1 if slot < winner else 0
+        pi_rank.append(make_proof_range(bp_params, D, v_w - v - tie, ov_w - ov))
+    auction['winner'] = winner
+    
+    # return
+    return {
+        'outputs': (dumps(auction),),
+        'extra_parameters' : (pack(pi_rank),),
+    }
+
 # ------------------------------------------------------------------
 # withdraw
 # ------------------------------------------------------------------
 @contract.method('withdraw')
-def withdraw(inputs, reference_inputs, parameters, seq, sigma):
+def withdraw(inputs, reference_inputs, parameters, seq, sigma, opening=None):
     auction = loads(inputs[0])
-    aggr_vk = unpack(auction['vk'])
-    v = loads(parameters[0])
+    packed_vk = resolve_vk(auction, 'vk', reference_inputs)
+    aggr_vk = unpack_cached(packed_vk)
     addr = unpack(parameters[1])
     
     # auction object
-    bp_params = setup(2)
-    private_m = [seq]
+    bp_params = bp_setup(2)
+    tables = vk_tables(bp_params, aggr_vk, packed=packed_vk)
     bind_m = [addr]
-    (Theta, zeta) = make_proof_zeta(bp_params, aggr_vk, sigma, private_m, bind_m=bind_m)
-    #assert verify_proof_zeta(bp_params, aggr_vk, Theta, zeta, public_m=[v], bind_m=bind_m)
-    packet = (v, pack(zeta))
-    auction['list'] = [None if x==list(packet) else x for x in auction['list']]
+    (Theta, zeta, bid) = make_proof_bid(auction, bp_params, aggr_vk, sigma, seq, parameters[0], opening, bind_m, tables)
+    #assert verify_proof_bid(auction, bp_params, aggr_vk, Theta, zeta, parameters[0], bind_m, tables)
+    slot = auction['index'][pack(zeta)]
+    assert auction['list'][slot] == [bid, pack(zeta)] and slot != auction['winner']
+    assert not auction['sealed'] or auction['winner'] is not None or past_rank(auction, reference_inputs)
+    auction['list'][slot] = None
 
     # return
     return {
@@ -134,18 +214,18 @@ def withdraw(inputs, reference_inputs, parameters, seq, sigma):
 # submitWork
 # ------------------------------------------------------------------
 @contract.method('submitWork')
-def submitWork(inputs, reference_inputs, parameters, seq, sigma):
+def submitWork(inputs, reference_inputs, parameters, seq, sigma, opening=None):
     auction = loads(inputs[0])
-    aggr_vk = unpack(auction['vk'])
-    v = loads(parameters[0])
+    packed_vk = resolve_vk(auction, 'vk', reference_inputs)
+    aggr_vk = unpack_cached(packed_vk)
     file_hash = unpack(parameters[1])
     
     # auction object
-    bp_params = setup(2)
-    private_m = [seq]
+    bp_params = bp_setup(2)
+    tables = vk_tables(bp_params, aggr_vk, packed=packed_vk)
     bind_m = [file_hash]
-    (Theta, zeta) = make_proof_zeta(bp_params, aggr_vk, sigma, private_m, bind_m=bind_m)
-    #assert verify_proof_zeta(bp_params, aggr_vk, Theta, zeta, public_m=[v], bind_m=bind_m)
+    (Theta, zeta, bid) = make_proof_bid(auction, bp_params, aggr_vk, sigma, seq, parameters[0], opening, bind_m, tables)
+    #assert verify_proof_bid(auction, bp_params, aggr_vk, Theta, zeta, parameters[0], bind_m, tables)
     auction['file_hash'] = parameters[1]
     
     # return
@@ -155,6 +235,105 @@ def submitWork(inputs, reference_inputs, parameters, seq, sigma):
     }
 
 
+# ------------------------------------------------------------------
+# next winner
+# NOTE: 
+#   - helper keeping 'winner' up to date when 'v' is revealed in 'slot'
+#   - if multiple biggest bids, the first bidder wins
+# ------------------------------------------------------------------
+def next_winner(auction, slot, v):
+    winner = auction['winner']
+    if winner is None:
+        return slot
+    best = auction['list'][winner][0]
+    if v > best or (v == best and slot < winner):
+        return slot
+    return winner
+
+# ------------------------------------------------------------------
+# bid commitment
+# NOTE: 
+#   - helper committing to the bid 'v' with randomness 'ov', as published by 'seal'
+#   - the minimum price 'cv0' is committed the same way
+# ------------------------------------------------------------------
+def bid_commitment(v, ov):
+    tables = bp_tables(2)
+    return secret_mul([v, ov], [tables.g1, tables.hs[0]])
+
+# ------------------------------------------------------------------
+# sealed slots
+# NOTE: 
+#   - helper listing the slots of 'list' holding a sealed bid, i.e. sealed and not withdrawn
+#   - committed bids that were never sealed cannot win, and are not ranked
+# ------------------------------------------------------------------
+def sealed_slots(auction):
+    return [i for (i, entry) in enumerate(auction['list']) if isinstance(entry, list)]
+
+# ------------------------------------------------------------------
+# rank statements
+# NOTE: 
+#   - helper listing the (slot, D) where D commits to how much the bid in 'winner' beats the bid in 'slot'
+#   - every sealed slot is listed; slot None stands for the minimum price
+#   - bids in earlier slots win ties, so they must be beaten by at least one
+# ------------------------------------------------------------------
+def rank_statements(auction, winner):
+    bids = dict((i, unpack(auction['list'][i][0])) for i in sealed_slots(auction))
+    cv_w = bids[winner]
+    g1 = bp_setup(2)[2]
+    statements = [(None, cv_w - unpack(auction['cv0']))]
+    for i in sorted(bids):
+        if i == winner: continue
+        D = cv_w - bids[i]
+        statements.append((i, D - g1 if i < winner else D))
+    return statements
+
+# ------------------------------------------------------------------
+# bid proofs
+# NOTE: 
+#   - helpers showing the credential behind the bid in 'parameter'
+#   - the bid is 'v' in clear, or its commitment 'cv' in sealed auctions, opened by 'opening' = (v, ov)
+# ------------------------------------------------------------------
+def make_proof_bid(auction, params, aggr_vk, sigma, seq, parameter, opening, bind_m, tables):
+    if auction['sealed']:
+        (v, ov) = opening
+        (Theta, zeta, cv) = make_proof_sealed(params, aggr_vk, sigma, seq, v, ov, bind_m=bind_m, tables=tables)
+        assert parameter == pack(cv)
+        return (Theta, zeta, parameter)
+    (Theta, zeta) = make_proof_zeta(params, aggr_vk, sigma, [seq], bind_m=bind_m, tables=tables)
+    return (Theta, zeta, loads(parameter))
+
+def verify_proof_bid(auction, params, aggr_vk, Theta, zeta, parameter, bind_m, tables):
+    if auction['sealed']:
+        return verify_proof_sealed(params, aggr_vk, Theta, zeta, unpack(parameter), bind_m=bind_m, tables=tables)
+    return verify_proof_zeta(params, aggr_vk, Theta, zeta, public_m=[loads(parameter)], bind_m=bind_m, tables=tables)
+
+def read_bid(auction, parameter):
+    return parameter if auction['sealed'] else loads(parameter)
+
+# ------------------------------------------------------------------
+# in window
+# NOTE: 
+#   - helper checking that the epoch of the auction's clock is in [start, end); 'None' leaves a side open
+#   - auctions without a clock are always in the window: the clock is optional since their timestamps were never
+#     enforced before it, and their phases stay ordered by the auction itself (a reveal needs its commit, a withdrawal its reveal)
+# ------------------------------------------------------------------
+def in_window(auction, reference_inputs, start, end):
+    epoch = clock_epoch(auction, reference_inputs)
+    if epoch is None:
+        return True
+    return (start is None or start <= epoch) and (end is None or epoch < end)
+
+# ------------------------------------------------------------------
+# past rank
+# NOTE: 
+#   - helper checking that the deadline 't_rank' of a sealed auction has passed on its clock
+#   - sealed auctions always have a clock; 'create' rejects them otherwise
+# ------------------------------------------------------------------
+def past_rank(auction, reference_inputs):
+    epoch = clock_epoch(auction, reference_inputs)
+    return epoch is not None and epoch >= auction['t_rank']
+
+
 ####################################################################
 # checker
 ####################################################################
@@ -168,7 +347,7 @@ def create_checker(inputs, reference_inputs, parameters, outputs, returns, depen
         auction = loads(outputs[1])
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 2 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(auction) or len(outputs) != 2 or len(returns) != 0:
             return False 
 
         # check types
@@ -177,13 +356,19 @@ def create_checker(inputs, reference_inputs, parameters, outputs, returns, depen
         
         # check timestamps
         if auction['t_commit'] <= 0 or auction['t_commit'] >= auction['t_reveal']: return False
+        if auction['sealed'] and not auction['t_rank'] > auction['t_reveal']: return False
+        if auction['sealed'] and auction['clock'] is None: return False # 't_rank' is only enforced on a clock
+        if not auction['sealed'] and auction['t_rank'] is not None: return False
 
         # check fields
-        auction['vk']
+        resolve_vk(auction, 'vk', reference_inputs)
         auction['uid']
         auction['cv0']
         auction['file_hash']
         if auction['list']: return False # check list is empty
+        if auction['index'] != {} or auction['winner'] is not None: return False
+        if auction['sealed'] not in (True, False): return False
+        if auction['clock'] is not None and len(auction['clock']) != 64: return False
 
         # otherwise
         return True
@@ -193,33 +378,41 @@ def create_checker(inputs, reference_inputs, parameters, outputs, returns, depen
 
 # ------------------------------------------------------------------
 # check commit
+# NOTE: 
+#   - the other slots of 'list' and entries of 'index' are compared too; @mutates only pins the other fields
+#   - this is linear in the number of bids, like parsing the auction, which is a single JSON object
+#   - 'index' rejects a zeta committed twice; the zeta must be in the canonical packing, so it cannot be re-packed to dodge it
 # ------------------------------------------------------------------
 @contract.checker('commit')
+@mutates(['list', 'index'])
 def commit_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
         # retrieve
-        old_auction = loads(inputs[0])
-        new_auction = loads(outputs[0])
-        vk = unpack(new_auction['vk'])
+        old_auction = parse(inputs[0])
+        new_auction = parse(outputs[0])
+        packed_vk = resolve_vk(old_auction, 'vk', reference_inputs)
+        vk = unpack_cached(packed_vk)
         Theta = unpack(parameters[0])
         zeta_packed = parameters[1]
+        zeta = unpack(zeta_packed)
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(old_auction) + clock_references(old_auction) or len(outputs) != 1 or len(returns) != 0:
             return False 
+
+        # check time window
+        if not in_window(old_auction, reference_inputs, None, old_auction['t_commit']): return False
        
         # check list
-        if (zeta_packed in old_auction['list']) or (new_auction['list'] != old_auction['list'] + [zeta_packed]):
-            return False
-        
-        # check fields
-        old_auction['list'], new_auction['list'] = None, None
-        if old_auction != new_auction: return False
+        if zeta_packed != pack(zeta): return False
+        if new_auction['list'] != old_auction['list'] + [zeta_packed]: return False
+        if zeta_packed in old_auction['index'] or len(new_auction['index']) != len(old_auction['index']) + 1: return False
+        if new_auction['index'] != dict(old_auction['index'], **{zeta_packed : len(old_auction['list'])}): return False
 
         # verify proof
-        bp_params = setup(2)
-        zeta = unpack(zeta_packed)
-        if not verify_proof_zeta(bp_params, vk, Theta, zeta): return False
+        bp_params = bp_setup(2)
+        tables = vk_tables(bp_params, vk, packed=packed_vk)
+        if not verify_proof_zeta(bp_params, vk, Theta, zeta, tables=tables): return False
 
         # otherwise
         return True
@@ -231,37 +424,131 @@ def commit_checker(inputs, reference_inputs, parameters, outputs, returns, depen
 # check reveal
 # ------------------------------------------------------------------
 @contract.checker('reveal')
+@mutates(['list', 'winner'])
 def reveal_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
         # retrieve
-        old_auction = loads(inputs[0])
-        new_auction = loads(outputs[0])
-        vk = unpack(new_auction['vk'])
+        old_auction = parse(inputs[0])
+        new_auction = parse(outputs[0])
+        packed_vk = resolve_vk(old_auction, 'vk', reference_inputs)
+        vk = unpack_cached(packed_vk)
         v = loads(parameters[0])
         Theta = unpack(parameters[1])
         zeta_packed = parameters[2]
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(old_auction) + clock_references(old_auction) or len(outputs) != 1 or len(returns) != 0:
             return False
+
+        # check time window
+        if not in_window(old_auction, reference_inputs, old_auction['t_commit'], old_auction['t_reveal']): return False
         
+        # sealed bids are revealed by 'seal'
+        if old_auction['sealed']: return False
+
+        # check bid
+        bp_params = bp_setup(2)
+        if type(v) not in INTEGER_TYPES or not 0 <= v < bp_params[1]: return False
+
         # check list
-        if zeta_packed not in old_auction['list']: return False
-        packet = (v, zeta_packed)
-        for i in range(len(old_auction['list'])):
-            if old_auction['list'][i] == zeta_packed:
-                old_auction['list'][i] = list(packet)
-                break # ensure that only one element is modified
-        if (new_auction['list'] != old_auction['list']): return False
-        
-        # check fields
-        old_auction['list'], new_auction['list'] = None, None
-        if old_auction != new_auction: return False
+        old_list = old_auction['list']
+        i = old_auction['index'][zeta_packed]
+        if old_list[i] != zeta_packed: return False
+        if new_auction['list'] != old_list[:i] + [[v, zeta_packed]] + old_list[i+1:]: return False
+
+        # check winner
+        if new_auction['winner'] != next_winner(old_auction, i, v): return False
 
         # verify proof
-        bp_params = setup(2)
         zeta = unpack(zeta_packed)
-        if not verify_proof_zeta(bp_params, vk, Theta, zeta, public_m=[v]): return False
+        tables = vk_tables(bp_params, vk, packed=packed_vk)
+        if not verify_proof_zeta(bp_params, vk, Theta, zeta, public_m=[v], tables=tables): return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+# ------------------------------------------------------------------
+# check seal
+# ------------------------------------------------------------------
+@contract.checker('seal')
+@mutates(['list'])
+def seal_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve
+        old_auction = parse(inputs[0])
+        new_auction = parse(outputs[0])
+        packed_vk = resolve_vk(old_auction, 'vk', reference_inputs)
+        vk = unpack_cached(packed_vk)
+        cv_packed = parameters[0]
+        Theta = unpack(parameters[1])
+        zeta_packed = parameters[2]
+
+        # check format
+        if len(inputs) != 1 or len(reference_inputs) != key_references(old_auction) + clock_references(old_auction) or len(outputs) != 1 or len(returns) != 0:
+            return False
+
+        # check time window
+        if not in_window(old_auction, reference_inputs, old_auction['t_commit'], old_auction['t_reveal']): return False
+
+        # bids are sealed until the ranking
+        if not old_auction['sealed'] or old_auction['winner'] is not None: return False
+
+        # check list
+        old_list = old_auction['list']
+        i = old_auction['index'][zeta_packed]
+        if old_list[i] != zeta_packed: return False
+        if new_auction['list'] != old_list[:i] + [[cv_packed, zeta_packed]] + old_list[i+1:]: return False
+
+        # verify proof
+        bp_params = bp_setup(2)
+        zeta = unpack(zeta_packed)
+        cv = unpack(cv_packed)
+        tables = vk_tables(bp_params, vk, packed=packed_vk)
+        if not verify_proof_sealed(bp_params, vk, Theta, zeta, cv, tables=tables): return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+# ------------------------------------------------------------------
+# check rank
+# NOTE: 
+#   - the ranking covers every sealed bid; the slots are read from the auction, not from the parameters
+#   - the range proofs of all the sealed bids are verified as one batch
+# ------------------------------------------------------------------
+@contract.checker('rank')
+@mutates(['winner'])
+def rank_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve
+        old_auction = parse(inputs[0])
+        new_auction = parse(outputs[0])
+        pi_rank = unpack(parameters[0])
+
+        # check format
+        if len(inputs) != 1 or len(reference_inputs) != clock_references(old_auction) or len(outputs) != 1 or len(returns) != 0:
+            return False
+
+        # check time window
+        if not in_window(old_auction, reference_inputs, old_auction['t_reveal'], old_auction['t_rank']): return False
+
+        # sealed bids are ranked once
+        if not old_auction['sealed'] or old_auction['winner'] is not None: return False
+
+        # check winner; it holds a sealed bid
+        winner = new_auction['winner']
+        if winner not in sealed_slots(old_auction): return False
+
+        # verify proofs, against every sealed bid
+        statements = rank_statements(old_auction, winner)
+        if len(pi_rank) != len(statements): return False
+        bp_params = bp_setup(2)
+        if not verify_range_batch(bp_params, [(D, pi) for ((_, D), pi) in zip(statements, pi_rank)]): return False
 
         # otherwise
         return True
@@ -274,42 +561,41 @@ def reveal_checker(inputs, reference_inputs, parameters, outputs, returns, depen
 # NOTE: if multiple biggest bids, the first bidder wins
 # ------------------------------------------------------------------
 @contract.checker('withdraw')
+@mutates(['list'])
 def withdraw_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
         # retrieve
-        old_auction = loads(inputs[0])
-        new_auction = loads(outputs[0])
-        vk = unpack(new_auction['vk'])
-        v = loads(parameters[0])
+        old_auction = parse(inputs[0])
+        new_auction = parse(outputs[0])
+        packed_vk = resolve_vk(old_auction, 'vk', reference_inputs)
+        vk = unpack_cached(packed_vk)
+        bid = read_bid(old_auction, parameters[0])
         addr = unpack(parameters[1])
         Theta = unpack(parameters[2])
         zeta_packed = parameters[3]
         
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(old_auction) + clock_references(old_auction) or len(outputs) != 1 or len(returns) != 0:
             return False
+
+        # check time window
+        if not in_window(old_auction, reference_inputs, old_auction['t_reveal'], None): return False
         
         # check list
-        packet = (v, zeta_packed)
-        if list(packet) not in old_auction['list']: return False
-        for i in range(len(old_auction['list'])):
-            if old_auction['list'][i] == list(packet):
-                old_auction['list'][i] = None
-                break # ensure that only one element is modified
-        if (new_auction['list'] != old_auction['list']): return False
-
-        # winner cannot withdraw fundings
-        max_item = max([item for item in old_auction['list']]) # get first biggest item
-        if list(packet) == max_item: return False
+        old_list = old_auction['list']
+        i = old_auction['index'][zeta_packed]
+        if old_list[i] != [bid, zeta_packed]: return False
+        if new_auction['list'] != old_list[:i] + [None] + old_list[i+1:]: return False
 
-        # check fields
-        old_auction['list'], new_auction['list'] = None, None
-        if old_auction != new_auction: return False
+        # winner cannot withdraw fundings; sealed bids wait for the ranking, or for its deadline
+        if i == old_auction['winner']: return False
+        if old_auction['sealed'] and old_auction['winner'] is None and not past_rank(old_auction, reference_inputs): return False
 
         # verify proof
-        bp_params = setup(2)
+        bp_params = bp_setup(2)
         zeta = unpack(zeta_packed)
-        if not verify_proof_zeta(bp_params, vk, Theta, zeta, public_m=[v], bind_m=[addr]): return False
+        tables = vk_tables(bp_params, vk, packed=packed_vk)
+        if not verify_proof_bid(old_auction, bp_params, vk, Theta, zeta, parameters[0], [addr], tables): return False
         
         # otherwise
         return True
@@ -321,38 +607,39 @@ def withdraw_checker(inputs, reference_inputs, parameters, outputs, returns, dep
 # check submitWork
 # ------------------------------------------------------------------
 @contract.checker('submitWork')
+@mutates(['file_hash'])
 def submitWork_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
         # retrieve
-        old_auction = loads(inputs[0])
-        new_auction = loads(outputs[0])
-        vk = unpack(new_auction['vk'])
-        v = loads(parameters[0])
+        old_auction = parse(inputs[0])
+        new_auction = parse(outputs[0])
+        packed_vk = resolve_vk(old_auction, 'vk', reference_inputs)
+        vk = unpack_cached(packed_vk)
+        bid = read_bid(old_auction, parameters[0])
         file_hash_packed = parameters[1]
         Theta = unpack(parameters[2])
         zeta_packed = parameters[3]
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0: return False
+        if len(inputs) != 1 or len(reference_inputs) != key_references(old_auction) + clock_references(old_auction) or len(outputs) != 1 or len(returns) != 0: return False
+
+        # check time window
+        if not in_window(old_auction, reference_inputs, old_auction['t_reveal'], None): return False
         
         # check list
         if old_auction['file_hash'] != '': return False
         if new_auction['file_hash'] != file_hash_packed: return False
         
         # only winner can submit file hash
-        max_item = max([item for item in old_auction['list']]) # get first biggest item
-        packet = (v, zeta_packed)
-        if list(packet) != max_item: return False
-        
-        # check fields
-        old_auction['file_hash'], new_auction['file_hash'] = None, None
-        if old_auction != new_auction: return False
+        winner = old_auction['winner']
+        if winner is None or old_auction['list'][winner] != [bid, zeta_packed]: return False
         
         # verify proof
-        bp_params = setup(2)
+        bp_params = bp_setup(2)
         zeta = unpack(zeta_packed)
         file_hash = unpack(file_hash_packed)
-        if not verify_proof_zeta(bp_params, vk, Theta, zeta, public_m=[v], bind_m=[file_hash]): return False
+        tables = vk_tables(bp_params, vk, packed=packed_vk)
+        if not verify_proof_bid(old_auction, bp_params, vk, Theta, zeta, parameters[0], [file_hash], tables): return False
         
         # otherwise
         return True
@@ -1,71 +1,112 @@
 from coconut.utils import *
 from coconut.proofs import *
 from chainspacecontract.examples.utils import *
+from chainspacecontract.examples.batch import verify_pairing
+from chainspacecontract.examples.showing import make_showing, verify_showing
 
 
-def make_proof_zeta(params, aggr_vk, sigma, private_m, bind_m=[]):
+## number of bits of the sealed bids; range proofs show that differences of bids lie in [0, 2^BID_BITS)
+BID_BITS = 32
+
+
+def make_proof_zeta(params, aggr_vk, sigma, private_m, bind_m=[], tables=None):
     """ make commit zeta """
+    return make_showing(params, aggr_vk, sigma, private_m, bind_m=bind_m, tables=tables)
+
+
+def verify_proof_zeta(params, aggr_vk, Theta, zeta, public_m=[], bind_m=[], tables=None):
+    """ verify commit zeta """
+    return verify_showing(params, aggr_vk, Theta, zeta, public_m, bind_m=bind_m, tables=tables)
+
+
+def make_proof_sealed(params, aggr_vk, sigma, seq, v, ov, bind_m=[], tables=None):
+    """ make commit zeta, and show that cv = v*g1 + ov*hs[0] commits to the bid v of the credential """
     (G, o, g1, hs, g2, e) = params
-    (g2, alpha, beta) = aggr_vk
-    (h, s) = sigma
-    assert len(private_m) <= len(beta)
+    T = tables or vk_tables(params, aggr_vk)
+    H = bp_tables(len(hs)).hs[0]
+    cv = secret_mul([v, ov], [T.g1, H])
+    (Theta, zeta) = make_showing(params, aggr_vk, sigma, [seq, v], bind_m=bind_m, tables=T, commitments=[(1, cv, ov, H)])
+    return (Theta, zeta, cv)
+
+
+def verify_proof_sealed(params, aggr_vk, Theta, zeta, cv, bind_m=[], tables=None):
+    """ verify commit zeta and its sealed bid cv """
+    (G, o, g1, hs, g2, e) = params
+    H = bp_tables(len(hs)).hs[0]
+    if len(Theta[3][1]) != 2: return False
+    return verify_showing(params, aggr_vk, Theta, zeta, bind_m=bind_m, tables=tables, commitments=[(1, cv, H)])
+
+
+def make_proof_range(params, D, x, r, bits=BID_BITS):
+    """ prove that D = x*g1 + r*hs[0] with 0 <= x < 2^bits; one OR-proof per bit of x, all in commitment form """
+    (G, o, g1, hs, g2, e) = params
+    T = bp_tables(len(hs))
+    H = T.hs[0]
+    x = int(x)
+    assert 0 <= x < 2**bits
 
     ## material
-    r_prime = o.random()
-    (h_prime , s_prime) = (r_prime*h , r_prime*s)
-    sigma_prime = (h_prime, s_prime)
-    t = o.random()
-    kappa = t*g2 + alpha + ec_sum([private_m[i]*beta[i] for i in range(len(private_m))])
-    nu = t*h_prime
-    zeta = private_m[0]*g1
+    # commit to each bit; the blinding factors add up to r
+    b = [(x >> k) & 1 for k in range(bits)]
+    rb = [o.random() for _ in range(bits)]
+    rb[0] = (r - sum([rb[k] * 2**k for k in range(1, bits)])) % o
+    C = [secret_mul([b[k], rb[k]], [T.g1, H]) for k in range(bits)]
 
     ## proof
-    # create the witnesses
-    wm = [o.random() for _ in private_m]
-    wt = o.random()
-    # compute the witnesses commitments
-    Aw = wt*g2 + alpha + ec_sum([wm[i]*beta[i] for i in range(len(private_m))])
-    Bw = wt*h_prime
-    Cw = wm[0]*g1
+    # either C_k = rb_k*hs[0] or C_k - g1 = rb_k*hs[0]; the branch that does not hold is simulated
+    w = [o.random() for _ in range(bits)]
+    fake = [(o.random(), o.random()) for _ in range(bits)]
+    (A0, A1) = ([], [])
+    for k in range(bits):
+        (cf, zf) = fake[k]
+        if b[k] == 0:
+            A0.append(secret_mul([w[k]], [H]))
+            A1.append(secret_mul([zf, cf], [H, C[k] - g1]))
+        else:
+            A0.append(secret_mul([zf, cf], [H, C[k]]))
+            A1.append(secret_mul([w[k]], [H]))
     # create the challenge
-    bind = [item*g1 for item in bind_m]
-    c = to_challenge([g1, g2, alpha, Aw, Bw, Cw]+hs+beta+bind)
-    # create responses
-    rm = [(wm[i] - c*private_m[i]) % o for i in range(len(private_m))]
-    rt = wt - c*t % o
-    pi_commit = (c, rm, rt)
-    Theta = (kappa, nu, sigma_prime, pi_commit)
+    c = to_challenge([g1, hs[0], D]+C+A0+A1)
+    # create responses; the challenges of the two branches add up to c
+    (c0, z0, z1) = ([], [], [])
+    for k in range(bits):
+        (cf, zf) = fake[k]
+        cr = (c - cf) % o
+        zr = (w[k] - cr*rb[k]) % o
+        c0.append(cr if b[k] == 0 else cf)
+        z0.append(zr if b[k] == 0 else zf)
+        z1.append(zf if b[k] == 0 else zr)
 
     ## output
-    return (Theta, zeta)
+    return (C, A0, A1, c0, z0, z1)
 
 
-def verify_proof_zeta(params, aggr_vk, Theta, zeta, public_m=[], bind_m=[]):
-    """ verify commit zeta """
+def verify_range_batch(params, statements, bits=BID_BITS):
+    """ verify the range proofs of many (D, pi_range) at once, as a random combination of all their equations """
     (G, o, g1, hs, g2, e) = params
-    (g2, alpha, beta) = aggr_vk
-    (kappa, nu, sigma, pi_commit) = Theta
-    (h, s) = sigma
-    (c, rm, rt) = pi_commit
-    private_m_len = len(pi_commit[1])
-    assert len(public_m)+private_m_len <= len(beta)
+    T = bp_tables(len(hs))
+    (g1_scalar, h_scalar, scalars, bases) = (0, 0, [], [])
+    for (D, pi_range) in statements:
+        (C, A0, A1, c0, z0, z1) = pi_range
+        if not len(C) == len(A0) == len(A1) == len(c0) == len(z0) == len(z1) == bits: return False
+        c = to_challenge([g1, hs[0], D]+C+A0+A1)
+        # sum 2^k*C_k == D
+        tau = random_weight()
+        scalars.append(-tau)
+        bases.append(D)
+        for k in range(bits):
+            # A0_k == z0_k*hs[0] + c0_k*C_k
+            # A1_k == z1_k*hs[0] + c1_k*(C_k - g1), with c1_k = c - c0_k
+            c1 = c - c0[k]
+            (rho, sigma) = (random_weight(), random_weight())
+            h_scalar += rho*z0[k] + sigma*z1[k]
+            g1_scalar -= sigma*c1
+            scalars += [-rho, -sigma, rho*c0[k] + sigma*c1 + tau * 2**k]
+            bases += [A0[k], A1[k], C[k]]
+    if not bases: return False
+    total = multi_mul([g1_scalar, h_scalar]+scalars, [T.g1, T.hs[0]]+bases, o)
+    return total.isinf()
 
-    ## verify proof
-    # re-compute witnesses commitments
-    Aw = c*kappa + rt*g2 + (1-c)*alpha + ec_sum([rm[i]*beta[i] for i in range(len(rm))])
-    Bw = c*nu + rt*h
-    Cw = rm[0]*g1 + zeta*c
-    # compute the challenge prime
-    bind = [item*g1 for item in bind_m]
-    assert c == to_challenge([g1, g2, alpha, Aw, Bw, Cw]+hs+beta+bind)
-
-    ## verify signature
-    # add clear text messages
-    aggr = G2Elem.inf(G)
-    if len(public_m) != 0:
-        aggr = ec_sum([public_m[i]*beta[i+private_m_len] for i in range(len(public_m))])
-    # verify
-    return not h.isinf() and e(h, kappa+aggr) == e(s+nu, g2)
 
 '''
 def verify_proof_zeta_bind(params, aggr_vk, Theta, zeta, public_m=[], bind_m=[]):
@@ -93,6 +134,6 @@ def verify_proof_zeta_bind(params, aggr_vk, Theta, zeta, public_m=[], bind_m=[])
     if len(public_m) != 0:
         aggr = ec_sum([public_m[i]*beta[i+private_m_len] for i in range(len(public_m))])
     # verify
-    return not h.isinf() and e(h, kappa+aggr) == e(s+nu, g2)
+    return verify_pairing(params, h, kappa+aggr, s+nu)
 '''
 
@@ -0,0 +1,110 @@
+""" Batch verification of Coconut credential showings """
+
+
+####################################################################
+# imports
+####################################################################
+from threading import local
+from contextlib import contextmanager
+# coconut
+from bplib.bp import G2Elem
+from coconut.utils import *
+from coconut.proofs import *
+from chainspacecontract.examples.utils import random_weight
+
+
+## pairing checks collected by 'deferred_pairings'
+_state = local()
+
+
+####################################################################
+# single showing
+####################################################################
+def verify_pairing(params, h, kappa, s):
+    """ check e(h, kappa) == e(s, g2), or defer the check to the enclosing batch """
+    (G, o, g1, hs, g2, e) = params
+    if h.isinf(): return False
+    batch = getattr(_state, 'batch', None)
+    if batch is not None:
+        batch.append((params, h, kappa, s))
+        return True
+    return e(h, kappa) == e(s, g2)
+
+def verify_credential(params, aggr_vk, Theta, public_m=[]):
+    """ same as coconut's verify_cred, but the pairing check goes through 'verify_pairing' """
+    (G, o, g1, hs, g2, e) = params
+    (g2, _, beta) = aggr_vk
+    (kappa, nu, sigma, pi_v) = Theta
+    (h, s) = sigma
+    private_m_len = len(pi_v[1])
+    assert len(public_m)+private_m_len <= len(beta)
+    # verify proof of correctness
+    if not verify_pi_v(params, aggr_vk, sigma, kappa, nu, pi_v): return False
+    # add clear text messages
+    aggr = G2Elem.inf(G)
+    if len(public_m) != 0:
+        aggr = ec_sum([public_m[i]*beta[i+private_m_len] for i in range(len(public_m))])
+    # verify
+    return verify_pairing(params, h, kappa+aggr, s+nu)
+
+
+####################################################################
+# batches
+####################################################################
+@contextmanager
+def deferred_pairings():
+    """ collect the pairing checks run inside the block instead of computing them """
+    previous = getattr(_state, 'batch', None)
+    _state.batch = []
+    try:
+        yield _state.batch
+    finally:
+        _state.batch = previous
+
+def batch_verify(showings):
+    """ return the indices of the failing showings; 'showings' are (params, h, kappa, s) """
+    if not showings: return []
+    r = [random_weight() for _ in showings]
+    return _bisect(showings, r, list(range(len(showings))))
+
+def batch_check(checker, solutions):
+    """ run 'checker' over many solutions, verifying all their pairings at once """
+    results, showings, owners = [], [], []
+    for i, solution in enumerate(solutions):
+        with deferred_pairings() as batch:
+            results.append(checker(
+                solution['inputs'],
+                solution['referenceInputs'],
+                solution['parameters'],
+                solution['outputs'],
+                solution['returns'],
+                solution['dependencies']
+            ))
+        if results[i]:
+            showings += batch
+            owners += [i] * len(batch)
+    for j in batch_verify(showings):
+        results[owners[j]] = False
+    return results
+
+
+####################################################################
+# helpers
+####################################################################
+def _holds(showings, r, indices):
+    """ check prod e(r_i*h_i, kappa_i) == e(sum r_i*s_i, g2) """
+    (G, o, g1, hs, g2, e) = showings[indices[0]][0]
+    lhs, s = None, None
+    for i in indices:
+        (_, h, kappa, si) = showings[i]
+        pair = e(r[i]*h, kappa)
+        lhs = pair if lhs is None else lhs * pair
+        s = r[i]*si if s is None else s + r[i]*si
+    return lhs == e(s, g2)
+
+def _bisect(showings, r, indices):
+    """ locate the failing showings by splitting the batch in halves """
+    if _holds(showings, r, indices): return []
+    if len(indices) == 1: return indices
+    middle = len(indices) // 2
+    return _bisect(showings, r, indices[:middle]) + _bisect(showings, r, indices[middle:])
@@ -0,0 +1,152 @@
+""" Clock contract: an epoch counter ticked by its owner, read by other contracts as a reference input """
+
+
+####################################################################
+# imports
+####################################################################
+# general
+from json import dumps, loads
+# petlib
+from petlib.ecdsa import do_ecdsa_sign, do_ecdsa_verify
+# coconut
+from chainspacecontract.examples.utils import *
+# chainspace
+from chainspacecontract import ChainspaceContract
+
+## contract name
+contract = ChainspaceContract('clock')
+
+## system parameters, built once at load
+pet_setup()
+
+
+####################################################################
+# methods
+####################################################################
+# ------------------------------------------------------------------
+# init
+# ------------------------------------------------------------------
+@contract.method('init')
+def init():
+    return {
+        'outputs': (dumps({'type' : 'CToken'}),),
+    }
+
+# ------------------------------------------------------------------
+# create clock
+# NOTE:
+#   - the clock starts at epoch 0
+#   - its ID is the hash of the owner's key, so that one owner runs one clock
+# ------------------------------------------------------------------
+@contract.method('create_clock')
+def create_clock(inputs, reference_inputs, parameters, priv_owner, pub_owner):
+    uid = clock_uid(pub_owner)
+    clock = {
+        'type' : 'Clock',
+        'uid' : uid,
+        'owner' : pack(pub_owner),
+        'epoch' : 0,
+        'sig' : sign_tick(priv_owner, uid, 0)
+    }
+
+    # return
+    return {
+        'outputs': (inputs[0], dumps(clock)),
+    }
+
+# ------------------------------------------------------------------
+# tick
+# ------------------------------------------------------------------
+@contract.method('tick')
+def tick(inputs, reference_inputs, parameters, priv_owner):
+    clock = loads(inputs[0])
+    clock['epoch'] += 1
+    clock['sig'] = sign_tick(priv_owner, clock['uid'], clock['epoch'])
+
+    # return
+    return {
+        'outputs': (dumps(clock),),
+    }
+
+
+# ------------------------------------------------------------------
+# sign tick
+# NOTE: helper signing the epoch of the clock 'uid'
+# ------------------------------------------------------------------
+def sign_tick(priv_owner, uid, epoch):
+    (G, g, hs, o) = pet_setup()
+    return pack(do_ecdsa_sign(G, priv_owner, clock_digest(uid, epoch)))
+
+
+####################################################################
+# checker
+####################################################################
+# ------------------------------------------------------------------
+# check create clock
+# ------------------------------------------------------------------
+@contract.checker('create_clock')
+def create_clock_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve objects
+        clock = loads(outputs[1])
+
+        # check format
+        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 2 or len(returns) != 0:
+            return False
+
+        # check types
+        if loads(inputs[0])['type'] != 'CToken' or loads(outputs[0])['type'] != 'CToken': return False
+        if clock['type'] != 'Clock': return False
+
+        # check fields
+        if clock['epoch'] != 0: return False
+        if set(clock) != set(['type', 'uid', 'owner', 'epoch', 'sig']): return False
+
+        # verify signature
+        (G, g, hs, o) = pet_setup()
+        pub_owner = unpack(clock['owner'])
+        if clock['uid'] != clock_uid(pub_owner): return False
+        if not do_ecdsa_verify(G, pub_owner, unpack(clock['sig']), clock_digest(clock['uid'], 0)): return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+# ------------------------------------------------------------------
+# check tick
+# ------------------------------------------------------------------
+@contract.checker('tick')
+@mutates(['epoch', 'sig'])
+def tick_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve objects
+        old_clock = parse(inputs[0])
+        new_clock = parse(outputs[0])
+
+        # check format
+        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0:
+            return False
+
+        # check epoch
+        if old_clock['type'] != 'Clock' or new_clock['epoch'] != old_clock['epoch'] + 1: return False
+
+        # verify signature
+        (G, g, hs, o) = pet_setup()
+        pub_owner = unpack_cached(old_clock['owner'])
+        if not do_ecdsa_verify(G, pub_owner, unpack(new_clock['sig']), clock_digest(new_clock['uid'], new_clock['epoch'])):
+            return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+
+####################################################################
+# main
+####################################################################
+if __name__ == '__main__':
+    contract.run()
@@ -15,6 +15,8 @@ from chainspacecontract import ChainspaceContract
 from chainspacecontract.examples.utils import *
 from coconut.scheme import *
 from coconut.proofs import *
+from chainspacecontract.examples.batch import verify_credential
+from chainspacecontract.examples.coconut_chainspace_proofs import *
 
 
 ## contract name
@@ -38,22 +40,41 @@ def init():
 	    'outputs': (dumps({'type' : 'CoCoToken'}),),
 	}
 
+# ------------------------------------------------------------------
+# register key
+# NOTE:
+#   - other objects can refer to the key by its fingerprint, and take
+#     the key object as reference input
+# ------------------------------------------------------------------
+@contract.method('register_key')
+def register_key(inputs, reference_inputs, parameters, aggr_vk):
+    return {
+        'outputs': (inputs[0], dumps(key_object(aggr_vk))),
+    }
+
 # ------------------------------------------------------------------
 # create
 # NOTE:
 #   - sig is an aggregated sign on the hash of the instance object
+#   - if the key object of aggr_vk is a reference input, the instance
+#     only stores its fingerprint
+#   - optionally, 'vks' are the keys of the n authorities; the instance
+#     stores their fingerprints and their partial signatures are then
+#     verified by 'issue' and 'issue_share', which take the key object
+#     of the authority as reference input
 # ------------------------------------------------------------------
 @contract.method('create')
-def create(inputs, reference_inputs, parameters, q, t, n, callback, aggr_vk):
+def create(inputs, reference_inputs, parameters, q, t, n, callback, aggr_vk, vks=None):
     # new petition object
-    instance = {
+    instance = store_vk({
         'type' : 'CoCoInstance',
         'q' : q,
         't' : t,
         'n' : n,
-        'callback' : callback,
-        'verifier' : pack(aggr_vk)
-    }
+        'callback' : callback
+    }, 'verifier', aggr_vk, reference_inputs)
+    if vks is not None:
+        instance['authorities'] = [vk_fingerprint(pack(vk)) for vk in vks]
 
     ## should create a signature over 'instance'
 
@@ -70,15 +91,16 @@ def create(inputs, reference_inputs, parameters, q, t, n, callback, aggr_vk):
 @contract.method('request')
 def request(inputs, reference_inputs, parameters, public_m, private_m, gamma, *args):
     # execute PrepareMixSign
-    q = loads(inputs[0])['q']
-    n = loads(inputs[0])['n']
-    params = setup(q)
+    instance = ObjectView(inputs)[0]
+    q = instance['q']
+    n = instance['n']
+    params = bp_setup(q)
     Lambda = prepare_blind_sign(params, gamma, private_m, public_m=public_m)
 
     # new petition object
     request = {
         'type' : 'CoCoRequest',
-        'instance' : loads(inputs[0]),
+        'instance' : instance,
         'public_m' : pack(public_m),
         'Lambda' : pack(Lambda),
         'sigs' : [None] * n,
@@ -101,11 +123,12 @@ def request(inputs, reference_inputs, parameters, public_m, private_m, gamma, *a
 @contract.method('issue')
 def issue(inputs, reference_inputs, parameters, sk):
     # extract data
-    request = loads(inputs[0])
-    updated_request = loads(inputs[0])
+    objects = ObjectView(inputs)
+    request = objects[0]
+    updated_request = objects.copy(0)
     instance = request['instance']
     q = instance['q']
-    params = setup(q)
+    params = bp_setup(q)
     public_m = unpack(request['public_m'])
     gamma = unpack(request['gamma'])
     Lambda = unpack(request['Lambda'])
@@ -114,6 +137,7 @@ def issue(inputs, reference_inputs, parameters, sk):
     # sign
     sigma_tilde = blind_sign(params, sk, gamma, Lambda, public_m=public_m)
     packed_sigma_tilde = pack(sigma_tilde)
+    updated_request['sigs'] = list(request['sigs'])
     updated_request['sigs'][index] = packed_sigma_tilde
 
     # return
@@ -122,6 +146,151 @@ def issue(inputs, reference_inputs, parameters, sk):
         'extra_parameters' : (packed_sigma_tilde,)
     }
 
+# ------------------------------------------------------------------
+# request batch
+# NOTE: 
+#	- 'requests' is a list of (public_m, private_m, gamma)
+#	- args are the arguments for the callback
+# ------------------------------------------------------------------
+@contract.method('request_batch')
+def request_batch(inputs, reference_inputs, parameters, requests, *args):
+    # execute PrepareMixSign for each request
+    instance = ObjectView(inputs)[0]
+    q = instance['q']
+    n = instance['n']
+    params = bp_setup(q)
+    entries = []
+    for (public_m, private_m, gamma) in requests:
+        Lambda = prepare_blind_sign_batch(params, gamma, private_m, public_m=public_m)
+        entries.append({
+            'public_m' : pack(public_m),
+            'Lambda' : pack(Lambda),
+            'sigs' : [None] * n,
+            'gamma' : pack(gamma)
+        })
+
+    # new batch request object
+    batch = {
+        'type' : 'CoCoBatchRequest',
+        'instance' : instance,
+        'requests' : entries
+    }
+
+    # create dependency
+    hello_contract.init(args)
+
+    # return
+    return {
+		'outputs': (inputs[0], dumps(batch)),
+	}
+
+# ------------------------------------------------------------------
+# issue batch
+# ------------------------------------------------------------------
+@contract.method('issue_batch')
+def issue_batch(inputs, reference_inputs, parameters, sk):
+    # extract data
+    objects = ObjectView(inputs)
+    batch = objects[0]
+    updated_batch = objects.copy(0)
+    params = bp_setup(batch['instance']['q'])
+    requests = [(unpack(entry['gamma']), unpack(entry['Lambda']), unpack(entry['public_m'])) for entry in batch['requests']]
+    index = parameters[0]
+
+    # sign all the requests in one pass
+    assert verify_pi_s_batch(params, [(gamma, Lambda) for (gamma, Lambda, public_m) in requests])
+    sigs_tilde = blind_sign_batch(params, sk, [(Lambda, public_m) for (gamma, Lambda, public_m) in requests])
+    packed_sigs_tilde = [pack(sigma_tilde) for sigma_tilde in sigs_tilde]
+    updated_batch['requests'] = []
+    for (entry, packed_sigma_tilde) in zip(batch['requests'], packed_sigs_tilde):
+        updated_entry = dict(entry)
+        updated_entry['sigs'] = list(entry['sigs'])
+        updated_entry['sigs'][index] = packed_sigma_tilde
+        updated_batch['requests'].append(updated_entry)
+
+    # return
+    return {
+        'outputs': (dumps(updated_batch),),
+        'extra_parameters' : (dumps(packed_sigs_tilde),)
+    }
+
+# ------------------------------------------------------------------
+# issue share
+# NOTE:
+#   - the request is only read, so all authorities can issue their
+#     share at the same time; 'aggregate' then collects the shares
+# ------------------------------------------------------------------
+@contract.method('issue_share')
+def issue_share(inputs, reference_inputs, parameters, sk):
+    # extract data
+    request = ObjectView(reference_inputs)[0]
+    params = bp_setup(request['instance']['q'])
+    public_m = unpack(request['public_m'])
+    gamma = unpack(request['gamma'])
+    Lambda = unpack(request['Lambda'])
+    index = parameters[0]
+
+    # sign
+    sigma_tilde = blind_sign(params, sk, gamma, Lambda, public_m=public_m)
+    share = {
+        'type' : 'CoCoShare',
+        'request' : request_id(reference_inputs[0]),
+        'index' : index,
+        'sig' : pack(sigma_tilde)
+    }
+
+    # return
+    return {
+        'outputs': (dumps(share),),
+    }
+
+# ------------------------------------------------------------------
+# aggregate
+# ------------------------------------------------------------------
+@contract.method('aggregate')
+def aggregate(inputs, reference_inputs, parameters):
+    # extract data
+    objects = ObjectView(inputs)
+    request = objects[0]
+    updated_request = objects.copy(0)
+
+    # collect the shares
+    updated_request['sigs'] = list(request['sigs'])
+    for i in range(1, len(objects)):
+        updated_request['sigs'][objects[i]['index']] = objects[i]['sig']
+
+    # return
+    return {
+        'outputs': (dumps(updated_request),),
+    }
+
+# ------------------------------------------------------------------
+# request id
+# NOTE: helper binding the shares to their request
+# ------------------------------------------------------------------
+def request_id(request):
+    return sha256(request.encode('utf8')).hexdigest()
+
+# ------------------------------------------------------------------
+# check share
+# NOTE: helper for the checkers; shares are only verified if the
+#       instance lists the keys of the authorities
+# ------------------------------------------------------------------
+def check_share(request, index, packed_sigma_tilde, reference_inputs):
+    instance = request['instance']
+    if 'authorities' not in instance:
+        return True
+    params = bp_setup(instance['q'])
+    packed_vk = resolve_vk({'vk_fp' : instance['authorities'][index]}, 'vk', reference_inputs)
+    vk = unpack_cached(packed_vk)
+    tables = vk_tables(params, vk, packed=packed_vk)
+    Lambda = unpack(request['Lambda'])
+    public_m = unpack(request['public_m'])
+    return verify_blind_sign(params, vk, Lambda, unpack(packed_sigma_tilde), public_m=public_m, tables=tables)
+
+def share_references(request):
+    return 1 if 'authorities' in request['instance'] else 0
+
 
 # ------------------------------------------------------------------
 # verify
@@ -132,8 +301,8 @@ def verify(inputs, reference_inputs, parameters, sig, private_m):
     instance = loads(reference_inputs[0])
 
     # build proof
-    params = setup(instance['q'])
-    aggr_vk = unpack(instance['verifier'])
+    params = bp_setup(instance['q'])
+    aggr_vk = unpack_cached(resolve_vk(instance, 'verifier', reference_inputs[1:]))
     Theta = prove_cred(params, aggr_vk, sig, private_m)
 
     # returns
@@ -156,7 +325,7 @@ def create_checker(inputs, reference_inputs, parameters, outputs, returns, depen
         instance = loads(outputs[1])
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 2 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(instance) or len(outputs) != 2 or len(returns) != 0:
             return False 
 
         # check types
@@ -168,8 +337,9 @@ def create_checker(inputs, reference_inputs, parameters, outputs, returns, depen
         t = instance['t'] 
         n = instance['n']
         instance['callback']
-        packed_vk = instance['verifier']
+        packed_vk = resolve_vk(instance, 'verifier', reference_inputs)
         if q < 1 or n < 1 or t > n: return False
+        if 'authorities' in instance and len(instance['authorities']) != n: return False
    
         # otherwise
         return True
@@ -177,6 +347,34 @@ def create_checker(inputs, reference_inputs, parameters, outputs, returns, depen
     except (KeyError, Exception):
         return False
 
+# ------------------------------------------------------------------
+# check register key
+# ------------------------------------------------------------------
+@contract.checker('register_key')
+def register_key_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve key
+        key = loads(outputs[1])
+
+        # check format
+        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 2 or len(returns) != 0:
+            return False 
+
+        # check types
+        if inputs[0] != outputs[0]: return False
+        if key['type'] != 'CoCoKey': return False
+
+        # check fields
+        if key['fingerprint'] != vk_fingerprint(key['vk']): return False
+        (g2, alpha, beta) = unpack_cached(key['vk'])
+        if len(beta) < 1: return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
 # ------------------------------------------------------------------
 # check request issue
 # ------------------------------------------------------------------
@@ -196,7 +394,7 @@ def request_checker(inputs, reference_inputs, parameters, outputs, returns, depe
 
         # check fields
         request['public_m']
-        params = setup(instance['q'])
+        params = bp_setup(instance['q'])
         Lambda = unpack(request['Lambda'])
         (cm, c, pi_s) = Lambda
         if inputs[0] != outputs[0] or loads(inputs[0]) != request['instance']: return False
@@ -221,29 +419,27 @@ def request_checker(inputs, reference_inputs, parameters, outputs, returns, depe
 # check issue
 # ------------------------------------------------------------------
 @contract.checker('issue')
+@mutates(['sigs'])
 def issue_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
     	# retrieve data
-        old_request = loads(inputs[0])
-        new_request = loads(outputs[0])
-        old_sigs = old_request['sigs']
-        new_sigs = new_request['sigs']
+        request = parse(inputs[0])
+        old_sigs = request['sigs']
+        new_sigs = parse(outputs[0])['sigs']
         index = parameters[0]
         added_sig = parameters[1]
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != share_references(request) or len(outputs) != 1 or len(returns) != 0:
             return False 
 
-        # check fields
-        old_request['sigs'], new_request['sigs'] = None, None
-        if old_request != new_request: return False
-
         # check signature add
-        old_sigs[index] = added_sig
-        if new_sigs != old_sigs: return False
+        if index < 0 or index >= len(old_sigs): return False
+        if new_sigs != old_sigs[:index] + [added_sig] + old_sigs[index+1:]: return False
 
-      	## We could verify the partial signature using the vk of each authority (to include in the 'instance' object). If we do so, the size of the object will increse linearly with the number of authorities. Otherwise we can off-load it to the client.
+        # verify the partial signature, if the instance lists the keys of the authorities;
+        # otherwise, it is left to the client
+        if not check_share(request, index, added_sig, reference_inputs): return False
       	
         # otherwise
         return True
@@ -252,7 +448,146 @@ def issue_checker(inputs, reference_inputs, parameters, outputs, returns, depend
         return False
 
 # ------------------------------------------------------------------
-# check issue
+# check request batch
+# ------------------------------------------------------------------
+@contract.checker('request_batch')
+def request_batch_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve instance
+        instance = loads(outputs[0])
+        batch = loads(outputs[1])
+
+        # check format
+        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 2 or len(returns) != 0:
+            return False 
+
+        # check types
+        if batch['type'] != 'CoCoBatchRequest': return False
+
+        # check fields
+        params = bp_setup(instance['q'])
+        if inputs[0] != outputs[0] or loads(inputs[0]) != batch['instance']: return False
+        if len(batch['requests']) == 0: return False
+        if any(entry['sigs'] != [None] * instance['n'] for entry in batch['requests']): return False
+        [entry['public_m'] for entry in batch['requests']] # check presence of field
+
+        # verify all the proofs at once
+        requests = [(unpack(entry['gamma']), unpack(entry['Lambda'])) for entry in batch['requests']]
+        if not verify_pi_s_batch(params, requests): return False
+
+        # verify depend transaction -- specified by 'callback'
+        callback = dependencies[0]
+        if callback['contractID']+'.'+callback['methodID'] != instance['callback']: return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+# ------------------------------------------------------------------
+# check issue batch
+# ------------------------------------------------------------------
+@contract.checker('issue_batch')
+@mutates(['requests'])
+def issue_batch_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve data
+        batch = parse(inputs[0])
+        new_entries = parse(outputs[0])['requests']
+        index = parameters[0]
+        added_sigs = loads(parameters[1])
+
+        # check format
+        if len(inputs) != 1 or len(reference_inputs) != share_references(batch) or len(outputs) != 1 or len(returns) != 0:
+            return False 
+        if len(new_entries) != len(batch['requests']) or len(added_sigs) != len(new_entries): return False
+
+        # check signatures add
+        for (entry, new_entry, added_sig) in zip(batch['requests'], new_entries, added_sigs):
+            old_sigs = entry['sigs']
+            if index < 0 or index >= len(old_sigs): return False
+            if not changed_fields(entry, new_entry) <= set(['sigs']): return False
+            if new_entry['sigs'] != old_sigs[:index] + [added_sig] + old_sigs[index+1:]: return False
+
+            # verify the partial signature, if the instance lists the keys of the authorities
+            request = dict(entry, instance=batch['instance'])
+            if not check_share(request, index, added_sig, reference_inputs): return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+# ------------------------------------------------------------------
+# check issue share
+# ------------------------------------------------------------------
+@contract.checker('issue_share')
+def issue_share_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve data
+        request = parse(reference_inputs[0])
+        share = parse(outputs[0])
+        index = parameters[0]
+
+        # check format
+        if len(inputs) != 0 or len(reference_inputs) != 1 + share_references(request) or len(outputs) != 1 or len(returns) != 0:
+            return False 
+
+        # check types
+        if request['type'] != 'CoCoRequest' or share['type'] != 'CoCoShare': return False
+
+        # check fields
+        if share['request'] != request_id(reference_inputs[0]): return False
+        if share['index'] != index or index < 0 or index >= len(request['sigs']): return False
+
+        # verify the partial signature, if the instance lists the keys of the authorities
+        if not check_share(request, index, share['sig'], reference_inputs[1:]): return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+# ------------------------------------------------------------------
+# check aggregate
+# ------------------------------------------------------------------
+@contract.checker('aggregate')
+@mutates(['sigs'])
+def aggregate_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve data
+        request = parse(inputs[0])
+        new_sigs = parse(outputs[0])['sigs']
+        shares = [parse(x) for x in inputs[1:]]
+
+        # check format
+        if len(inputs) < 2 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0:
+            return False 
+
+        # check types
+        if request['type'] != 'CoCoRequest': return False
+
+        # check that each share fills an empty slot of this request
+        sigs = list(request['sigs'])
+        ID = request_id(inputs[0])
+        for share in shares:
+            if share['type'] != 'CoCoShare' or share['request'] != ID: return False
+            index = share['index']
+            if index < 0 or index >= len(sigs) or sigs[index] is not None: return False
+            sigs[index] = share['sig']
+        if new_sigs != sigs: return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception):
+        return False
+
+# ------------------------------------------------------------------
+# check verify
 # ------------------------------------------------------------------
 @contract.checker('verify')
 def verify_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
@@ -261,15 +596,15 @@ def verify_checker(inputs, reference_inputs, parameters, outputs, returns, depen
         instance = loads(reference_inputs[0])
 
         # check format
-        if len(inputs) != 0 or len(reference_inputs) != 1 or len(outputs) != 0 or len(returns) != 1:
+        if len(inputs) != 0 or len(reference_inputs) != 1 + key_references(instance) or len(outputs) != 0 or len(returns) != 1:
             return False 
 
         # verify signature
-        params = setup(instance['q'])
+        params = bp_setup(instance['q'])
         public_m = loads(parameters[0])
         Theta = unpack(parameters[1])
-        aggr_vk = unpack(instance['verifier'])
-        if not verify_cred(params, aggr_vk, Theta, public_m=public_m): return False
+        aggr_vk = unpack_cached(resolve_vk(instance, 'verifier', reference_inputs[1:]))
+        if not verify_credential(params, aggr_vk, Theta, public_m=public_m): return False
 
         # otherwise
         return True
@@ -0,0 +1,104 @@
+""" Proofs for the Coconut smart contract library """
+from coconut.utils import *
+from chainspacecontract.examples.utils import *
+
+
+def verify_blind_sign(params, vk, Lambda, sigma_tilde, public_m=[], tables=None):
+    """ verify a partial blind signature against the key of the authority that issued it """
+    (G, o, g1, hs, g2, e) = params
+    (g2, X, Y) = vk
+    (cm, c, pi_s) = Lambda
+    (h, (t2, t3)) = sigma_tilde
+    T = tables or vk_tables(params, vk)
+    if len(c)+len(public_m) > len(Y): return False
+    if h != G.hashG1(cm.export()): return False
+    (a, b) = zip(*c)
+
+    ## e(t2, g2) == prod e(a_j, Y_j) and e(t3, g2) == e(h, X + sum m_k*Y_k) * prod e(b_j, Y_j),
+    ## checked at once as a random combination of the two
+    r = random_weight()
+    aggr = multi_mul([r]+[r*m for m in public_m], [T.alpha]+T.beta[len(c):len(c)+len(public_m)], o)
+    rhs = e(h, aggr)
+    for j in range(len(c)):
+        rhs = rhs * e(a[j] + r*b[j], Y[j])
+    return e(t2 + r*t3, g2) == rhs
+
+
+def prepare_blind_sign_batch(params, gamma, private_m, public_m=[]):
+    """ same as coconut's prepare_blind_sign, but the proof carries its commitments so that it can be batch-verified """
+    (G, o, g1, hs, g2, e) = params
+    attributes = private_m + public_m
+    assert len(attributes) <= len(hs)
+
+    ## material
+    # build commitment
+    r = o.random()
+    cm = r*g1 + ec_sum([attributes[i]*hs[i] for i in range(len(attributes))])
+    # build El Gamal encryption
+    h = G.hashG1(cm.export())
+    k = [o.random() for _ in private_m]
+    c = [(k[i]*g1, k[i]*gamma + private_m[i]*h) for i in range(len(private_m))]
+
+    ## proof
+    # create the witnesses
+    wr = o.random()
+    wk = [o.random() for _ in k]
+    wm = [o.random() for _ in attributes]
+    # compute the witnesses commitments
+    Aw = [wki*g1 for wki in wk]
+    Bw = [wk[i]*gamma + wm[i]*h for i in range(len(private_m))]
+    Cw = wr*g1 + ec_sum([wm[i]*hs[i] for i in range(len(attributes))])
+    # create the challenge
+    ch = to_challenge([g1, g2, cm, h, Cw]+hs+Aw+Bw)
+    # create responses
+    rr = (wr - ch*r) % o
+    rk = [(wk[i] - ch*k[i]) % o for i in range(len(wk))]
+    rm = [(wm[i] - ch*attributes[i]) % o for i in range(len(wm))]
+    pi_s = (Aw, Bw, Cw, rk, rm, rr)
+
+    ## output
+    return (cm, c, pi_s)
+
+def verify_pi_s_batch(params, requests):
+    """ verify the proofs of many (gamma, Lambda) at once, as a random combination of their equations """
+    (G, o, g1, hs, g2, e) = params
+    T = bp_tables(len(hs))
+    (g1_scalar, hs_scalars, scalars, bases) = (0, [0] * len(hs), [], [])
+    for (gamma, (cm, c, pi_s)) in requests:
+        (Aw, Bw, Cw, rk, rm, rr) = pi_s
+        if not len(c) == len(Aw) == len(Bw) == len(rk) or len(rm) > len(hs) or len(rm) < len(c): return False
+        h = G.hashG1(cm.export())
+        ch = to_challenge([g1, g2, cm, h, Cw]+hs+Aw+Bw)
+        # Aw_i == ch*a_i + rk_i*g1
+        # Bw_i == ch*b_i + rk_i*gamma + rm_i*h
+        for i in range(len(c)):
+            (a, b) = c[i]
+            (rho, sigma) = (random_weight(), random_weight())
+            g1_scalar += rho*rk[i]
+            scalars += [rho*ch, -rho, sigma*ch, sigma*rk[i], sigma*rm[i], -sigma]
+            bases += [a, Aw[i], b, gamma, h, Bw[i]]
+        # Cw == ch*cm + rr*g1 + sum rm_i*hs_i
+        rho = random_weight()
+        g1_scalar += rho*rr
+        for i in range(len(rm)):
+            hs_scalars[i] += rho*rm[i]
+        scalars += [rho*ch, -rho]
+        bases += [cm, Cw]
+    if not bases: return False
+    total = multi_mul([g1_scalar]+hs_scalars+scalars, [T.g1]+T.hs+bases, o)
+    return total.isinf()
+
+def blind_sign_batch(params, sk, requests):
+    """ blind_sign for many (Lambda, public_m); the proofs must have been checked with 'verify_pi_s_batch' """
+    (G, o, g1, hs, g2, e) = params
+    (x, y) = sk
+    sigs_tilde = []
+    for ((cm, c, pi_s), public_m) in requests:
+        assert len(c)+len(public_m) <= len(hs)
+        (a, b) = zip(*c)
+        h = G.hashG1(cm.export())
+        t1 = [mi*h for mi in public_m]
+        t2 = secret_mul(y[:len(a)], list(a))
+        t3 = secret_mul([x]+y[:len(b)+len(t1)], [h]+list(b)+t1)
+        sigs_tilde.append((h, (t2, t3)))
+    return sigs_tilde
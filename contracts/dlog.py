@@ -0,0 +1,109 @@
+""" Discrete logarithms of bounded values, by baby-step giant-step """
+
+
+####################################################################
+# imports
+####################################################################
+import os
+import struct
+from math import sqrt, ceil
+from hashlib import sha256
+from mmap import mmap, ACCESS_READ
+
+
+## file layout: header (magic, base digest, bound, m) then sorted (key, j) records
+_MAGIC = b'BSGS0001'
+_HEADER = struct.Struct('>8s8sQQ')
+_RECORD = struct.Struct('>8sQ')
+
+## tables shared across calls, keyed by (base, bound)
+_tables = {}
+
+
+def _key(point):
+    return sha256(point.export()).digest()[:8]
+
+
+class MappedTable(object):
+    """ baby steps stored in a memory-mapped file, searched by bisection """
+    def __init__(self, data, offset, count):
+        self.data = data
+        self.offset = offset
+        self.count = count
+
+    def get(self, key):
+        (lo, hi) = (0, self.count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (k, j) = _RECORD.unpack_from(self.data, self.offset + mid*_RECORD.size)
+            if k == key: return j
+            if k < key: lo = mid + 1
+            else: hi = mid
+        return None
+
+
+class BabyStepGiantStep(object):
+    """ solve x*base == point for -bound <= x <= bound with O(sqrt(bound)) group operations """
+    def __init__(self, base, bound, table):
+        self.base = base
+        self.bound = bound
+        self.m = int(ceil(sqrt(2*bound + 1)))
+        self.table = table
+        self.giant = -(self.m * base)
+        self.shift = bound * base
+
+    @classmethod
+    def build(cls, base, bound):
+        """ compute the baby steps j*base for 0 < j < m in memory """
+        m = int(ceil(sqrt(2*bound + 1)))
+        table, point = {}, base
+        for j in range(1, m):
+            table[_key(point)] = j
+            point = point + base
+        return cls(base, bound, table)
+
+    @classmethod
+    def load(cls, base, bound, path):
+        """ map the baby steps saved by 'save'; ValueError if the file is for another base or bound """
+        with open(path, 'rb') as f:
+            data = mmap(f.fileno(), 0, access=ACCESS_READ)
+        if len(data) < _HEADER.size: raise ValueError('truncated table')
+        (magic, digest, saved_bound, m) = _HEADER.unpack_from(data, 0)
+        count = (len(data) - _HEADER.size) // _RECORD.size
+        if magic != _MAGIC or digest != _key(base) or saved_bound != bound: raise ValueError('stale table')
+        if m != int(ceil(sqrt(2*bound + 1))) or count != m - 1: raise ValueError('truncated table')
+        return cls(base, bound, MappedTable(data, _HEADER.size, count))
+
+    def save(self, path):
+        """ write the baby steps, sorted by key """
+        items = sorted(self.table.items())
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _key(self.base), self.bound, self.m))
+            for (k, j) in items:
+                f.write(_RECORD.pack(k, j))
+
+    def solve(self, point):
+        """ x such that x*base == point, or None if |x| > bound """
+        P = point + self.shift
+        for i in range(self.m + 1):
+            if P.is_infinite():
+                j = 0
+            else:
+                j = self.table.get(_key(P))
+            if j is not None:
+                x = i*self.m + j - self.bound
+                if abs(x) <= self.bound and x*self.base == point: return x
+            P = P + self.giant
+        return None
+
+
+def dlog_table(base, bound, path=None):
+    """ solver for 'base' and 'bound', mapped from 'path' or, if it is missing or stale, built once per process """
+    key = (base.export(), bound)
+    if key not in _tables:
+        try:
+            if path is None or not os.path.exists(path): raise ValueError('no table')
+            _tables[key] = BabyStepGiantStep.load(base, bound, path)
+        except ValueError:
+            _tables[key] = BabyStepGiantStep.build(base, bound)
+    return _tables[key]
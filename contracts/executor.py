@@ -0,0 +1,141 @@
+""" Parallel execution of checkers for independent transactions """
+
+
+####################################################################
+# imports
+####################################################################
+from importlib import import_module
+from multiprocessing import Pool, cpu_count
+from threading import BoundedSemaphore
+# coconut
+from chainspacecontract.examples.utils import bp_setup, pet_setup
+from chainspacecontract.examples.batch import batch_check
+
+
+## package holding the contracts
+CONTRACTS_PACKAGE = 'chainspacecontract.examples'
+
+## contracts loaded by default in each worker
+DEFAULT_CONTRACTS = ('coconut_chainspace', 'tumbler', 'petition', 'auction', 'clock')
+
+## number of solutions sent to a worker at once by 'check_many'
+DEFAULT_CHUNK_SIZE = 8
+
+
+####################################################################
+# workers
+####################################################################
+def checker_of(contract_name, method):
+    """ checker of 'method' in the contract module 'contract_name' """
+    module = import_module(CONTRACTS_PACKAGE + '.' + contract_name)
+    return module.contract.checkers[method]
+
+def _init_worker(contracts):
+    """ load the contracts once; their parameters and caches then stay warm in the worker """
+    bp_setup()
+    pet_setup()
+    for contract_name in contracts:
+        import_module(CONTRACTS_PACKAGE + '.' + contract_name)
+
+def _check(contract_name, method, solution):
+    try:
+        return bool(checker_of(contract_name, method)(
+            solution['inputs'],
+            solution['referenceInputs'],
+            solution['parameters'],
+            solution['outputs'],
+            solution['returns'],
+            solution['dependencies']
+        ))
+    except Exception:
+        return False
+
+def _check_chunk(contract_name, method, solutions):
+    try:
+        return batch_check(checker_of(contract_name, method), solutions)
+    except Exception:
+        return [False] * len(solutions)
+
+def _guarded(function, args):
+    """ run a job; a failure comes back as a value, so that the pool always calls back and frees the slot """
+    try:
+        return (True, function(*args))
+    except Exception as e:
+        return (False, '%s: %s' % (type(e).__name__, e))
+
+
+####################################################################
+# pool
+####################################################################
+class CheckError(Exception):
+    """ a scheduled job failed in its worker """
+    pass
+
+class CheckResult(object):
+    """ pending result of a scheduled job; get() raises CheckError if the job failed """
+    def __init__(self, result):
+        self._result = result
+
+    def ready(self):
+        return self._result.ready()
+
+    def wait(self, timeout=None):
+        self._result.wait(timeout)
+
+    def get(self, timeout=None):
+        (ok, value) = self._result.get(timeout)
+        if not ok: raise CheckError(value)
+        return value
+
+class CheckerPool(object):
+    """ process pool running the checkers of independent transactions on several cores """
+    def __init__(self, workers=None, max_pending=None, contracts=DEFAULT_CONTRACTS):
+        self.contracts = tuple(contracts)
+        self.workers = workers or cpu_count()
+        self.max_pending = max_pending or 4*self.workers
+        self._slots = BoundedSemaphore(self.max_pending)
+        self._pool = Pool(self.workers, _init_worker, (contracts,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(self, contract_name, method, solution, callback=None, error_callback=None):
+        """ schedule a check and return its CheckResult; blocks while 'max_pending' checks are in flight """
+        return self._submit(_check, (contract_name, method, solution), callback, error_callback)
+
+    def submit_many(self, contract_name, method, solutions, callback=None, error_callback=None):
+        """ schedule the checks of several solutions as one job, batching their pairing checks """
+        return self._submit(_check_chunk, (contract_name, method, solutions), callback, error_callback)
+
+    def check(self, contract_name, method, solution):
+        """ result of a single check """
+        return self.submit(contract_name, method, solution).get()
+
+    def check_many(self, contract_name, method, solutions, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ results of many checks, in order; each chunk batches its pairing checks """
+        pending = [
+            self.submit_many(contract_name, method, solutions[i:i+chunk_size])
+            for i in range(0, len(solutions), chunk_size)
+        ]
+        return [result for chunk in pending for result in chunk.get()]
+
+    def close(self):
+        """ wait for the pending checks and stop the workers """
+        self._pool.close()
+        self._pool.join()
+
+    def _submit(self, function, args, callback=None, error_callback=None):
+        self._slots.acquire()
+        def done(outcome):
+            self._slots.release()
+            (ok, value) = outcome
+            if ok and callback is not None: callback(value)
+            if not ok and error_callback is not None: error_callback(CheckError(value))
+        try:
+            return CheckResult(self._pool.apply_async(_guarded, (function, args), callback=done))
+        except Exception:
+            self._slots.release()
+            raise
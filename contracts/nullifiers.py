@@ -0,0 +1,198 @@
+""" Spent lists committed as sparse Merkle trees """
+
+
+####################################################################
+# imports
+####################################################################
+from hashlib import sha256
+from binascii import hexlify, unhexlify
+from json import dumps, loads
+from chainspacecontract.examples.utils import LRUCache
+
+
+## depth of the tree; nullifiers are 256-bit hashes
+DEPTH = 256
+
+def _node(left, right):
+    return sha256(b'\x01' + left + right).digest()
+
+def _leaf(key):
+    return sha256(b'\x00' + key).digest()
+
+## hashes of the empty subtrees, by height
+_EMPTY = [b'\x00' * 32]
+for _ in range(DEPTH):
+    _EMPTY.append(_node(_EMPTY[-1], _EMPTY[-1]))
+
+## root of the empty spent list
+EMPTY_ROOT = hexlify(_EMPTY[DEPTH]).decode()
+
+## nodes known to this client: hash -> (left, right); about DEPTH new nodes per insertion
+## NOTE: checkers never use it, they only need the proofs
+NODES_CACHE_SIZE = 2**18
+_nodes = LRUCache(NODES_CACHE_SIZE)
+
+## source of the nullifiers committed by a root, for roots this client did not build
+## (e.g. the zetas published by the transactions of the chain); set with set_spent_oracle,
+## for instance to the history_oracle of the lists in use
+_oracle = None
+
+
+####################################################################
+# client side
+####################################################################
+def set_spent_oracle(oracle):
+    """ 'oracle(root)' returns the zetas in the spent list committed by 'root', or None if unknown """
+    global _oracle
+    _oracle = oracle
+
+def history_oracle(*histories):
+    """ oracle replaying the history of spent lists; each history gives the zetas added by each transaction on one list, in order """
+    known = {}
+    for history in histories:
+        (root, zetas) = (_EMPTY[DEPTH], [])
+        for added in history:
+            for zeta in added:
+                key = spent_key(zeta)
+                try:
+                    (leaf, siblings) = _walk(root, key)
+                except KeyError:
+                    (leaf, siblings) = _rebuild([spent_key(z) for z in zetas], key)
+                assert leaf == _EMPTY[0], 'zeta spent twice in the history'
+                root = _climb(key, _leaf(key), siblings, store=True)
+                zetas.append(zeta)
+            known[hexlify(root).decode()] = (zetas, len(zetas))
+    def oracle(root):
+        if root not in known: return None
+        (zetas, size) = known[root]
+        return zetas[:size]
+    return oracle
+
+def spent_key(zeta):
+    """ position of 'zeta' in the tree, independent of how it was packed """
+    return sha256(zeta.export()).digest()
+
+def is_spent(root, zeta):
+    """ check whether 'zeta' is in the spent list committed by 'root' """
+    key = spent_key(zeta)
+    (leaf, siblings) = _path(unhexlify(root), key)
+    return leaf == _leaf(key)
+
+def shard_of(zeta, shards):
+    """ index of the shard owning 'zeta', from the prefix of its key """
+    return int(hexlify(spent_key(zeta)[:8]), 16) % shards
+
+def add_nullifier(root, zeta):
+    """ add 'zeta' to the spent list; return the new root and the proof of insertion """
+    key = spent_key(zeta)
+    (leaf, siblings) = _path(unhexlify(root), key)
+    assert leaf == _EMPTY[0]
+    new_root = _climb(key, _leaf(key), siblings, store=True)
+    return (hexlify(new_root).decode(), _pack_proof(siblings))
+
+
+####################################################################
+# checker side
+####################################################################
+def check_nullifier(old_root, new_root, zeta, proof):
+    """ verify that 'new_root' is 'old_root' plus 'zeta', and that 'zeta' was not in it """
+    return next_root(old_root, zeta, proof) == new_root
+
+def next_root(old_root, zeta, proof):
+    """ root of 'old_root' plus 'zeta', or None if the proof does not show that 'zeta' was not in it """
+    key = spent_key(zeta)
+    siblings = _unpack_proof(proof)
+    if _climb(key, _EMPTY[0], siblings) != unhexlify(old_root): return None
+    return hexlify(_climb(key, _leaf(key), siblings)).decode()
+
+
+####################################################################
+# helpers
+####################################################################
+def _bit(key, height):
+    return (ord(key[31 - height // 8:32 - height // 8]) >> (height % 8)) & 1
+
+def _path(root, key):
+    """ path of 'key' from the cached nodes, or from the nullifiers given by the oracle """
+    try:
+        return _walk(root, key)
+    except KeyError:
+        zetas = _oracle(hexlify(root).decode()) if _oracle else None
+        if zetas is None: raise ValueError('unknown spent list root')
+        (leaf, siblings) = _rebuild([spent_key(zeta) for zeta in zetas], key)
+        if _climb(key, leaf, siblings) != root: raise ValueError('spent list does not match its root')
+        return (leaf, siblings)
+
+def _walk(root, key):
+    """ walk from the root to the leaf of 'key'; siblings are ordered from the leaf up """
+    siblings = list(_EMPTY[:DEPTH])
+    node = root
+    for height in range(DEPTH, 0, -1):
+        if node == _EMPTY[height]:
+            return (_EMPTY[0], siblings)
+        (left, right) = _nodes.get(node, lambda: _missing(node))
+        if _bit(key, height-1):
+            (node, siblings[height-1]) = (right, left)
+        else:
+            (node, siblings[height-1]) = (left, right)
+    return (node, siblings)
+
+def _climb(key, leaf, siblings, store=False):
+    """ recompute the root from a leaf and its siblings """
+    node = leaf
+    for height in range(DEPTH):
+        if _bit(key, height):
+            (left, right) = (siblings[height], node)
+        else:
+            (left, right) = (node, siblings[height])
+        node = _node(left, right)
+        if store: _store(node, left, right)
+    return node
+
+def _rebuild(keys, key):
+    """ path of 'key' in the tree of 'keys', hashing the sibling subtrees; the nodes are cached on the way """
+    siblings = list(_EMPTY[:DEPTH])
+    for height in range(DEPTH, 0, -1):
+        b = _bit(key, height-1)
+        siblings[height-1] = _subtree([k for k in keys if _bit(k, height-1) != b], height-1)
+        keys = [k for k in keys if _bit(k, height-1) == b]
+        if not keys: return (_EMPTY[0], siblings)
+    return (_leaf(key), siblings)
+
+def _subtree(keys, height):
+    """ hash of the subtree of the given height holding 'keys' """
+    if not keys: return _EMPTY[height]
+    if height == 0: return _leaf(keys[0])
+    left = _subtree([k for k in keys if not _bit(k, height-1)], height-1)
+    right = _subtree([k for k in keys if _bit(k, height-1)], height-1)
+    node = _node(left, right)
+    _store(node, left, right)
+    return node
+
+def _store(node, left, right):
+    _nodes.get(node, lambda: (left, right))
+
+def _missing(node):
+    raise KeyError(node)
+
+def _pack_proof(siblings):
+    """ only non-empty siblings are sent, flagged by a bitmap """
+    bitmap, nonempty = 0, []
+    for height in range(DEPTH):
+        if siblings[height] != _EMPTY[height]:
+            bitmap |= 1 << height
+            nonempty.append(hexlify(siblings[height]).decode())
+    return dumps(['%x' % bitmap, nonempty])
+
+def _unpack_proof(proof):
+    (bitmap, nonempty) = loads(proof)
+    bitmap = int(bitmap, 16)
+    siblings, j = [], 0
+    for height in range(DEPTH):
+        if (bitmap >> height) & 1:
+            siblings.append(unhexlify(nonempty[j]))
+            j += 1
+        else:
+            siblings.append(_EMPTY[height])
+    if j != len(nonempty): raise ValueError('malformed proof')
+    return siblings
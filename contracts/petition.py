@@ -7,6 +7,7 @@
 # imports
 ####################################################################
 # general
+import os
 from hashlib import sha256
 from json    import dumps, loads
 # petlib
@@ -14,6 +15,9 @@ from petlib.ecdsa import do_ecdsa_sign, do_ecdsa_verify
 # coconut
 from chainspacecontract.examples.utils import *
 from chainspacecontract.examples.petition_proofs import *
+from chainspacecontract.examples.nullifiers import *
+from chainspacecontract.examples.dlog import dlog_table
+from chainspacecontract.examples.batch import deferred_pairings, batch_verify
 from coconut.utils import *
 from coconut.scheme import *
 
@@ -24,6 +28,16 @@ from chainspacecontract import ChainspaceContract
 ## contract name
 contract = ChainspaceContract('petition')
 
+## system parameters, built once at load
+bp_setup()
+pet_setup()
+
+## largest tally that 'read' can decode, and optional file holding its table
+DLOG_BOUND = 10**6
+DLOG_TABLE_FILE = os.environ.get('PETITION_DLOG_TABLE')
+if DLOG_TABLE_FILE:
+    dlog_table(pet_setup()[2][0], DLOG_BOUND, DLOG_TABLE_FILE)
+
 
 ####################################################################
 # methods
@@ -47,7 +61,7 @@ def create_petition(inputs, reference_inputs, parameters, UUID, options, priv_ow
     pet_params = pet_setup()
     (G, g, hs, o) = pet_params
     zero = (G.infinite(), G.infinite())
-    scores = [pack(zero), pack(zero)]
+    scores = [pack(zero) for _ in options]
 
     # new petition object
     new_petition = {
@@ -56,16 +70,19 @@ def create_petition(inputs, reference_inputs, parameters, UUID, options, priv_ow
         't_owners' : t_owners,
         'n_owners' : n_owners,
         'owner' : pack(pub_owner), # entity creating the petition
-        'verifier' : pack(aggr_vk), # entity delivering credentials to participate to the petition
         'options' : options, # the options
         'scores' : scores, # the signatures per option
         'dec' : []  # holds decryption shares
     }
+    # entity delivering credentials to participate to the petition; only its fingerprint 
+    # is stored if its key object is a reference input
+    store_vk(new_petition, 'verifier', aggr_vk, reference_inputs)
 
     # ID lists
     signed_list = {
         'type' : 'PList',
-        'list' : []
+        'root' : EMPTY_ROOT, # commitment to the IDs of the signers
+        'size' : 0
     }
 
     # signature: this should be be signed by the owners
@@ -83,40 +100,71 @@ def create_petition(inputs, reference_inputs, parameters, UUID, options, priv_ow
 # sign
 # ------------------------------------------------------------------
 @contract.method('sign')
-def sign(inputs, reference_inputs, parameters, priv_signer, sig, aggr_vk, vote):
+def sign(inputs, reference_inputs, parameters, priv_signer, sig, aggr_vk, vote=None, option=None):
     # get petition and list 
-    old_petition = loads(inputs[0])
-    new_petition = loads(inputs[0])
-    old_list = loads(inputs[1])
-    new_list = loads(inputs[1])
-
-    # prepare showing of credentials
-    UUID = unpack(old_petition['UUID'])
-    bp_params = setup()
-    (kappa, nu, sigma, zeta, pi_petition) = make_proof_credentials_petition(bp_params, aggr_vk, sig, [priv_signer], UUID)
-    #assert verify_proof_credentials_petition(bp_params, aggr_vk, sig, kappa, nu, zeta, pi_petition, UUID)
-
-    # update spent list
-    new_list['list'].append(pack(zeta))
+    objects = ObjectView(inputs)
+    old_petition = objects[0]
+    new_petition = objects.copy(0)
+    old_list = objects[1]
+    new_list = objects.copy(1)
 
     # encrypt the votes 
-    pub_owner = unpack(old_petition['owner'])
+    pub_owner = unpack_cached(old_petition['owner'])
     pet_params = pet_setup()
-    (enc_v, enc_v_not, cv, pi_vote) = make_proof_vote_petition(pet_params, pub_owner, vote) 
-    #assert verify_proof_vote_petition(pet_params, enc_v, pub_owner, cv, pi_vote)
+    option = chosen_option(old_petition, vote, option)
+    (enc_v, pi_vote) = make_proof_vote_petition(pet_params, pub_owner, option, len(old_petition['options'])) 
+    #assert verify_proof_vote_petition(pet_params, enc_v, pub_owner, pi_vote)
+
+    # prepare showing of credentials, bound to the votes
+    UUID = unpack_cached(old_petition['UUID'])
+    bp_params = bp_setup()
+    (kappa, nu, sigma, zeta, pi_petition) = make_proof_credentials_petition(bp_params, aggr_vk, sig, [priv_signer], UUID, [vote_digest(enc_v)])
+    #assert verify_proof_credentials_petition(bp_params, aggr_vk, sig, kappa, nu, zeta, pi_petition, UUID, bind_m=[vote_digest(enc_v)])
+
+    # update spent list
+    (new_list['root'], pi_spent) = add_nullifier(old_list['root'], zeta)
+    new_list['size'] = old_list['size'] + 1
 
     # update petition values
-    old_enc_v = unpack(old_petition['scores'][0])
-    old_enc_v_not = unpack(old_petition['scores'][1])
-    new_enc_v = (old_enc_v[0] + enc_v[0], old_enc_v[1] + enc_v[1])
-    new_enc_v_not = (old_enc_v_not[0] + enc_v_not[0], old_enc_v_not[1] + enc_v_not[1])
-    new_petition['scores'] = [pack(new_enc_v), pack(new_enc_v_not)]
+    new_petition['scores'] = add_votes(old_petition['scores'], enc_v)
 
     # return
     return {
         'outputs': (dumps(new_petition),dumps(new_list)),
         'extra_parameters' : (pack(sigma), pack(kappa), pack(nu), pack(zeta), pack(pi_petition), 
-            pack(enc_v), pack(cv), pack(pi_vote))
+            pack(enc_v), pack(pi_vote), pi_spent)
+    }
+
+# ------------------------------------------------------------------
+# sign batch
+# ------------------------------------------------------------------
+@contract.method('sign_batch')
+def sign_batch(inputs, reference_inputs, parameters, ballots):
+    # get petition and list 
+    objects = ObjectView(inputs)
+    old_petition = objects[0]
+    new_petition = objects.copy(0)
+    old_list = objects[1]
+    new_list = objects.copy(1)
+    assert len(ballots) > 0
+
+    # update spent list, one nullifier per ballot
+    (root, pi_spent, votes) = (old_list['root'], [], [])
+    for ballot in ballots:
+        (sigma, kappa, nu, zeta, pi_petition, enc_v, pi_vote) = unpack(ballot)
+        (root, proof) = add_nullifier(root, zeta)
+        pi_spent.append(proof)
+        votes.append(enc_v)
+    new_list['root'] = root
+    new_list['size'] = old_list['size'] + len(ballots)
+
+    # update petition values with the sum of the votes
+    new_petition['scores'] = add_votes(old_petition['scores'], sum_votes(votes))
+
+    # return
+    return {
+        'outputs': (dumps(new_petition),dumps(new_list)),
+        'extra_parameters' : (dumps(list(ballots)), dumps(pi_spent))
     }
 
 # ------------------------------------------------------------------
@@ -126,12 +174,12 @@ def sign(inputs, reference_inputs, parameters, priv_signer, sig, aggr_vk, vote):
 def tally(inputs, reference_inputs, parameters, tally_priv, index, t_owners):
     # load petition & scores
     petition = loads(inputs[0])
-    enc_results = [unpack(petition['scores'][0]), unpack(petition['scores'][1])]
+    enc_results = [unpack(score) for score in petition['scores']]
 
     # decrypt results
     pet_params = pet_setup()
     (G, g, hs, o) = pet_params
-    l = lagrange_basis(range(1,t_owners+1), o, 0)
+    l = tally_basis(t_owners, o)
     dec_share = [(-tally_priv*l[index]*enc[0]) for enc in enc_results]
     petition['dec'].append(pack(dec_share))
 
@@ -145,40 +193,131 @@ def tally(inputs, reference_inputs, parameters, tally_priv, index, t_owners):
         'extra_parameters' : (pack(dec_share), pack(pi_tally), dumps(index))
     }
 
+# ------------------------------------------------------------------
+# tally batch
+# ------------------------------------------------------------------
+@contract.method('tally_batch')
+def tally_batch(inputs, reference_inputs, parameters, tally_priv, index, t_owners):
+    # load petitions & scores
+    petitions = [loads(x) for x in inputs]
+    assert all(petition['t_owners'] == t_owners for petition in petitions)
+    enc_results = [[unpack(score) for score in petition['scores']] for petition in petitions]
+
+    # decrypt results
+    pet_params = pet_setup()
+    (G, g, hs, o) = pet_params
+    l = tally_basis(t_owners, o)
+    dec_shares = []
+    for (petition, enc) in zip(petitions, enc_results):
+        dec_share = [(-tally_priv*l[index]*enc_i[0]) for enc_i in enc]
+        petition['dec'].append(pack(dec_share))
+        dec_shares.append(petition['dec'][-1])
+
+    ## a single proof of correct decryption for all the scores
+    pi_tally = make_proof_tally_petition(pet_params, l[index], sum(enc_results, []), tally_priv)
+
+    # return
+    return {
+        'outputs': tuple(dumps(petition) for petition in petitions),
+        'extra_parameters' : (dumps(dec_shares), pack(pi_tally), dumps(index))
+    }
+
 # ------------------------------------------------------------------
 # read
 # ------------------------------------------------------------------
 @contract.method('read')
 def read(inputs, reference_inputs, parameters):
     petition = loads(reference_inputs[0])
-    enc_results = [unpack(petition['scores'][0]), unpack(petition['scores'][1])]
+    enc_results = [unpack(score) for score in petition['scores']]
 
     # add decryption shares
     pet_params = pet_setup()
     (G, g, hs, o) = pet_params
-    (dec_v, dec_v_not) = (G.infinite(), G.infinite())
+    dec = [G.infinite() for _ in enc_results]
     for packed_share in petition['dec']:
         dec_share = unpack(packed_share)
-        dec_v += dec_share[0]
-        dec_v_not += dec_share[1]
+        dec = [dec[i] + dec_share[i] for i in range(len(dec))]
 
     # decrypt
-    table = {}
-    for i in range(-1000, 1000): table[i * hs[0]] = i
-    plain_v = enc_results[0][1] + dec_v
-    plain_v_not = enc_results[1][1] + dec_v_not
+    table = dlog_table(hs[0], DLOG_BOUND)
+    plain = [table.solve(enc_results[i][1] + dec[i]) for i in range(len(dec))]
+    assert None not in plain
 
     # outcome
-    outcome = {
-        petition['options'][0]: table[plain_v],
-        petition['options'][1]: table[plain_v_not]
-    }
+    outcome = dict(zip(petition['options'], plain))
 
     # return
     return {
         'returns': (dumps(outcome),),
     }
 
+# ------------------------------------------------------------------
+# tally basis
+# ------------------------------------------------------------------
+def tally_basis(t_owners, o):
+    """ lagrange coefficients at 0 of the first 't_owners' owners, computed once """
+    return cached(('lagrange', t_owners, int(o)), lambda: lagrange_basis(range(1,t_owners+1), o, 0))
+
+# ------------------------------------------------------------------
+# add votes
+# ------------------------------------------------------------------
+def add_votes(scores, enc_v):
+    """ homomorphically add one encrypted vote per option to the packed scores """
+    if len(scores) != len(enc_v): raise ValueError('one encryption per option expected')
+    new_scores = []
+    for (score, (a, b)) in zip(scores, enc_v):
+        (old_a, old_b) = unpack(score)
+        new_scores.append(pack((old_a + a, old_b + b)))
+    return new_scores
+
+# ------------------------------------------------------------------
+# sum votes
+# ------------------------------------------------------------------
+def sum_votes(votes):
+    """ per-option sum of several encrypted votes """
+    return [(ec_sum([enc_v[i][0] for enc_v in votes]), ec_sum([enc_v[i][1] for enc_v in votes])) 
+        for i in range(len(votes[0]))]
+
+# ------------------------------------------------------------------
+# make ballot
+# ------------------------------------------------------------------
+def make_ballot(petition, priv_signer, sig, aggr_vk, vote=None, option=None):
+    """ showing of credentials and encrypted vote, to be aggregated by 'sign_batch' """
+    petition = parse(petition)
+    UUID = unpack_cached(petition['UUID'])
+    pub_owner = unpack_cached(petition['owner'])
+    option = chosen_option(petition, vote, option)
+    (enc_v, pi_vote) = make_proof_vote_petition(pet_setup(), pub_owner, option, len(petition['options']))
+    (kappa, nu, sigma, zeta, pi_petition) = make_proof_credentials_petition(bp_setup(), aggr_vk, sig, [priv_signer], UUID, [vote_digest(enc_v)])
+    return pack((sigma, kappa, nu, zeta, pi_petition, enc_v, pi_vote))
+
+# ------------------------------------------------------------------
+# chosen option
+# NOTE: 
+#   - helper giving the index of the option voted for by 'sign' and 'make_ballot'
+#   - 'vote' keeps its meaning for two-option petitions: 1 for options[0], 0 for options[1]
+#   - 'option' is the index of the chosen option, for petitions with any number of options
+# ------------------------------------------------------------------
+def chosen_option(petition, vote, option):
+    if option is None:
+        assert len(petition['options']) == 2 and vote in (0, 1), 'vote is 0 or 1 on two-option petitions; pass option otherwise'
+        return 1 - vote
+    assert vote is None, 'pass either vote or option'
+    return option
+
+# ------------------------------------------------------------------
+# spent zetas
+# NOTE: 
+#   - helper for the client, giving the zetas that a transaction of 'method' added to its spent list
+#   - the zetas of the 'sign' and 'sign_batch' transactions of a PList, in order, are its history for 'history_oracle'
+# ------------------------------------------------------------------
+def spent_zetas(method, parameters):
+    if method == 'sign':
+        return [unpack(parameters[3])]
+    if method == 'sign_batch':
+        return [unpack(ballot)[3] for ballot in loads(parameters[0])]
+    return []
+
 
 ####################################################################
 # checker
@@ -195,7 +334,7 @@ def create_petition_checker(inputs, reference_inputs, parameters, outputs, retur
         
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 3 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(petition) or len(outputs) != 3 or len(returns) != 0:
             return False 
 
         # check types
@@ -204,12 +343,12 @@ def create_petition_checker(inputs, reference_inputs, parameters, outputs, retur
 
         # check fields
         petition['UUID'] # check presence of field
-        petition['verifier'] # check presence of field
+        resolve_vk(petition, 'verifier', reference_inputs) # check presence of field
         petition['t_owners'] # check presence of field
         petition['n_owners'] # check presence of field
         options = petition['options']
         scores = petition['scores'] 
-        pub_owner = unpack(petition['owner'])
+        pub_owner = unpack_cached(petition['owner'])
         if len(options) < 1 or len(options) != len(scores): return False
 
         # check initalised scores
@@ -225,7 +364,7 @@ def create_petition_checker(inputs, reference_inputs, parameters, outputs, retur
         #if not do_ecdsa_verify(pet_params[0], pub_owner, sig, hasher.digest()): return False
 
         # verify that the spent list & results store are empty
-        if spent_list['list'] or petition['dec']: return False
+        if spent_list['root'] != EMPTY_ROOT or spent_list['size'] != 0 or petition['dec']: return False
 
         # otherwise
         return True
@@ -238,69 +377,54 @@ def create_petition_checker(inputs, reference_inputs, parameters, outputs, retur
 # check sign
 # ------------------------------------------------------------------
 @contract.checker('sign')
+@mutates(['scores'], ['root', 'size'])
 def sign_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
         # retrieve petition
-        old_petition = loads(inputs[0])
-        new_petition = loads(outputs[0])
+        old_petition = parse(inputs[0])
+        new_petition = parse(outputs[0])
         # retrieve ID list
-        old_list = loads(inputs[1])
-        new_list = loads(outputs[1])
+        old_list = parse(inputs[1])
+        new_list = parse(outputs[1])
         # retrieve parameters
-        bp_params = setup()
+        bp_params = bp_setup()
         sig = unpack(parameters[0])
         kappa = unpack(parameters[1])
         nu = unpack(parameters[2])
         zeta = unpack(parameters[3])
         pi_petition = unpack(parameters[4])
         enc_v = unpack(parameters[5])
-        cv = unpack(parameters[6])
-        pi_vote = unpack(parameters[7])
+        pi_vote = unpack(parameters[6])
+        pi_spent = parameters[7]
         
         # check format
-        if len(inputs) != 2 or len(reference_inputs) != 0 or len(outputs) != 2 or len(returns) != 0:
+        if len(inputs) != 2 or len(reference_inputs) != key_references(old_petition) or len(outputs) != 2 or len(returns) != 0:
             return False 
 
         # check types
         if new_petition['type'] != 'PObject' or new_list['type'] != 'PList': return False      
 
-        # check format & consistency with old object
-        UUID = unpack(new_petition['UUID'])
-        options = new_petition['options']
-        packed_vk = new_petition['verifier']
-        scores = new_petition['scores']
-        if old_petition['UUID'] != new_petition['UUID']: return False
-        if old_petition['owner'] != new_petition['owner']: return False
-        if old_petition['options'] != new_petition['options']: return False
-        if old_petition['verifier'] != new_petition['verifier']: return False
-        if old_petition['t_owners'] != new_petition['t_owners']: return False
-        if old_petition['n_owners'] != new_petition['n_owners']: return False
-
-        # re-compute opposite of vote encryption
-        pet_params = pet_setup()
-        (G, g, hs, o) = pet_params
-        (a, b) = enc_v
-        enc_v_not = (-a, -b + hs[0])
+        # retrieve fields
+        UUID = unpack_cached(new_petition['UUID'])
+        packed_vk = resolve_vk(old_petition, 'verifier', reference_inputs)
 
         # check homomorphic add
-        old_enc_v = unpack(old_petition['scores'][0])
-        old_enc_v_not = unpack(old_petition['scores'][1])
-        new_enc_v = (old_enc_v[0] + enc_v[0], old_enc_v[1] + enc_v[1])
-        new_enc_v_not = (old_enc_v_not[0] + enc_v_not[0], old_enc_v_not[1] + enc_v_not[1])
-        if not new_petition['scores'] == [pack(new_enc_v), pack(new_enc_v_not)]: return False
+        if len(enc_v) != len(old_petition['options']): return False
+        if not new_petition['scores'] == add_votes(old_petition['scores'], enc_v): return False
 
         # check new values
-        pub_owner = unpack(old_petition['owner'])
-        if not  verify_proof_vote_petition(pet_params, enc_v, pub_owner, cv, pi_vote): return False
+        pet_params = pet_setup()
+        pub_owner = unpack_cached(old_petition['owner'])
+        if not verify_proof_vote_petition(pet_params, enc_v, pub_owner, pi_vote): return False
 
         # check double-voting list
-        packed_zeta = parameters[3]
-        if (packed_zeta in old_list['list']) or (new_list['list'] != old_list['list'] + [packed_zeta]):
-            return False
+        if new_list['size'] != old_list['size'] + 1: return False
+        if not check_nullifier(old_list['root'], new_list['root'], zeta, pi_spent): return False
         
         # verify coconut credentials
-        aggr_vk = unpack(packed_vk)
-        if not verify_proof_credentials_petition(bp_params, aggr_vk, sig, kappa, nu, zeta, pi_petition, UUID): 
+        aggr_vk = unpack_cached(packed_vk)
+        tables = vk_tables(bp_params, aggr_vk, packed=packed_vk)
+        if not verify_proof_credentials_petition(bp_params, aggr_vk, sig, kappa, nu, zeta, pi_petition, UUID, bind_m=[vote_digest(enc_v)], tables=tables): 
             return False
   
         # otherwise
@@ -309,14 +433,75 @@ def sign_checker(inputs, reference_inputs, parameters, outputs, returns, depende
     except (KeyError, Exception): 
         return False
 
+# ------------------------------------------------------------------
+# check sign batch
+# ------------------------------------------------------------------
+@contract.checker('sign_batch')
+@mutates(['scores'], ['root', 'size'])
+def sign_batch_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        # retrieve petition
+        old_petition = parse(inputs[0])
+        new_petition = parse(outputs[0])
+        # retrieve ID list
+        old_list = parse(inputs[1])
+        new_list = parse(outputs[1])
+        # retrieve parameters
+        bp_params = bp_setup()
+        pet_params = pet_setup()
+        ballots = loads(parameters[0])
+        pi_spent = loads(parameters[1])
+
+        # check format
+        if len(inputs) != 2 or len(reference_inputs) != key_references(old_petition) or len(outputs) != 2 or len(returns) != 0:
+            return False 
+        if len(ballots) == 0 or len(ballots) != len(pi_spent): return False
+
+        # check types
+        if new_petition['type'] != 'PObject' or new_list['type'] != 'PList': return False      
+
+        # retrieve fields
+        UUID = unpack_cached(old_petition['UUID'])
+        pub_owner = unpack_cached(old_petition['owner'])
+        packed_vk = resolve_vk(old_petition, 'verifier', reference_inputs)
+        aggr_vk = unpack_cached(packed_vk)
+        tables = vk_tables(bp_params, aggr_vk, packed=packed_vk)
+
+        # check each ballot; the pairings of all the showings are verified at once
+        (root, votes) = (old_list['root'], [])
+        with deferred_pairings() as pairings:
+            for (ballot, proof) in zip(ballots, pi_spent):
+                (sig, kappa, nu, zeta, pi_petition, enc_v, pi_vote) = unpack(ballot)
+                if len(enc_v) != len(old_petition['options']): return False
+                if not verify_proof_vote_petition(pet_params, enc_v, pub_owner, pi_vote): return False
+                root = next_root(root, zeta, proof)
+                if root is None: return False
+                if not verify_proof_credentials_petition(bp_params, aggr_vk, sig, kappa, nu, zeta, pi_petition, UUID, bind_m=[vote_digest(enc_v)], tables=tables): 
+                    return False
+                votes.append(enc_v)
+        if batch_verify(pairings): return False
+
+        # check double-voting list
+        if new_list['size'] != old_list['size'] + len(ballots) or new_list['root'] != root: return False
+
+        # check homomorphic add
+        if not new_petition['scores'] == add_votes(old_petition['scores'], sum_votes(votes)): return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception): 
+        return False
+
 # ------------------------------------------------------------------
 # check tally
 # ------------------------------------------------------------------
 @contract.checker('tally')
+@mutates(['dec'])
 def tally_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
-        old_petition = loads(inputs[0])
-        new_petition = loads(outputs[0])
+        old_petition = parse(inputs[0])
+        new_petition = parse(outputs[0])
         dec_share = unpack(parameters[0])
         pi_tally = unpack(parameters[1])
         index = loads(parameters[2])
@@ -326,16 +511,7 @@ def tally_checker(inputs, reference_inputs, parameters, outputs, returns, depend
             return False 
 
         # check types
-        if old_petition['type'] != new_petition['type']: return False 
-
-        # check fields consistency
-        if old_petition['UUID'] != new_petition['UUID']: return False
-        if old_petition['owner'] != new_petition['owner']: return False
-        if old_petition['options'] != new_petition['options']: return False
-        if old_petition['verifier'] != new_petition['verifier']: return False
-        if old_petition['t_owners'] != new_petition['t_owners']: return False
-        if old_petition['n_owners'] != new_petition['n_owners']: return False 
-        if old_petition['scores'] != new_petition['scores']: return False 
+        if new_petition['type'] != 'PObject': return False 
 
         # check fields
         if new_petition['dec'] != old_petition['dec'] + [parameters[0]]: return False
@@ -343,9 +519,9 @@ def tally_checker(inputs, reference_inputs, parameters, outputs, returns, depend
         ## verify proof of tally
         pet_params = pet_setup()
         (G, g, hs, o) = pet_params
-        enc_results = [unpack(old_petition['scores'][0]), unpack(old_petition['scores'][1])]
+        enc_results = [unpack(score) for score in old_petition['scores']]
         t_owners = new_petition['t_owners']
-        l = lagrange_basis(range(1,t_owners+1), o, 0)
+        l = tally_basis(t_owners, o)
         if not verify_proof_tally_petition(pet_params, l[index], enc_results, pi_tally, dec_share): return False
 
         # otherwise
@@ -355,6 +531,46 @@ def tally_checker(inputs, reference_inputs, parameters, outputs, returns, depend
         return False
 
 
+# ------------------------------------------------------------------
+# check tally batch
+# ------------------------------------------------------------------
+@contract.checker('tally_batch')
+@mutates(['dec'], each=True)
+def tally_batch_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+    try:
+        old_petitions = [parse(x) for x in inputs]
+        new_petitions = [parse(x) for x in outputs]
+        dec_shares = loads(parameters[0])
+        pi_tally = unpack(parameters[1])
+        index = loads(parameters[2])
+
+        # check format
+        if len(inputs) == 0 or len(reference_inputs) != 0 or len(outputs) != len(inputs) or len(returns) != 0:
+            return False 
+        if len(dec_shares) != len(inputs): return False
+
+        # check types and fields
+        t_owners = old_petitions[0]['t_owners']
+        for (old_petition, new_petition, dec_share) in zip(old_petitions, new_petitions, dec_shares):
+            if new_petition['type'] != 'PObject' or new_petition['t_owners'] != t_owners: return False
+            if new_petition['dec'] != old_petition['dec'] + [dec_share]: return False
+
+        ## verify the proof of tally over all the scores
+        pet_params = pet_setup()
+        (G, g, hs, o) = pet_params
+        enc_results = [unpack(score) for petition in old_petitions for score in petition['scores']]
+        eta = [eta_i for dec_share in dec_shares for eta_i in unpack(dec_share)]
+        if len(eta) != len(enc_results): return False
+        l = tally_basis(t_owners, o)
+        if not verify_proof_tally_petition(pet_params, l[index], enc_results, pi_tally, eta): return False
+
+        # otherwise
+        return True
+
+    except (KeyError, Exception): 
+        return False
+
+
 # ------------------------------------------------------------------
 # check read
 # ------------------------------------------------------------------
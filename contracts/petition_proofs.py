@@ -1,122 +1,99 @@
 """ Proofs for petition signature """
-from bplib.bp import G2Elem
+from hashlib import sha256
+from petlib.bn import Bn
 from coconut.utils import *
 from coconut.proofs import *
 from chainspacecontract.examples.utils import *
+from chainspacecontract.examples.showing import make_showing, verify_showing
 
 
-def make_proof_credentials_petition(params, aggr_vk, sigma, private_m, UUID):
+def uuid_point(G, UUID):
+    """ hash of the petition's UUID into G1, computed once per petition """
+    return cached(('hashG1', str(UUID)), lambda: G.hashG1(str(UUID)))
+
+def vote_digest(enc_v):
+    """ hash of an encrypted vote, bound into the showing so that the vote cannot be swapped """
+    points = [x for (a, b) in enc_v for x in (a, b)]
+    return Bn.from_binary(sha256(b','.join(exported(points))).digest())
+
+def make_proof_credentials_petition(params, aggr_vk, sigma, private_m, UUID, bind_m=[], tables=None):
     """ build material & proof for coconut petition showing """
-    assert len(private_m) > 0
     (G, o, g1, hs, g2, e) = params
-    (g2, alpha, beta) = aggr_vk
-    (h, s) = sigma
-    assert len(private_m) <= len(beta)
-
-    ## material
-    r_prime = o.random()
-    (h_prime , s_prime) = (r_prime*h , r_prime*s)
-    sigma_prime = (h_prime, s_prime)
-    t = o.random()
-    kappa = t*g2 + alpha + ec_sum([private_m[i]*beta[i] for i in range(len(private_m))])
-    nu = t*h_prime
-    zeta = private_m[0] * G.hashG1(str(UUID))
-
-    ## proof
-    # create the witnesses
-    wm = [o.random() for _ in private_m]
-    wt = o.random()
-    # compute the witnesses commitments
-    Aw = wt*g2 + alpha + ec_sum([wm[i]*beta[i] for i in range(len(private_m))])
-    Bw = wt*h_prime
-    Cw = wm[0]*G.hashG1(str(UUID))
-    # create the challenge
-    c = to_challenge([g1, g2, alpha, Aw, Bw, Cw]+hs+beta)
-    # create responses
-    rm = [(wm[i] - c*private_m[i]) % o for i in range(len(private_m))]
-    rt = wt - c*t % o
-    pi_petition = (c, rm, rt)
-
-    ## output
+    ((kappa, nu, sigma_prime, pi_petition), zeta) = make_showing(params, aggr_vk, sigma, private_m, base=uuid_point(G, UUID), bind_m=bind_m, tables=tables)
     return (kappa, nu, sigma_prime, zeta, pi_petition)
 
-def verify_proof_credentials_petition(params, aggr_vk, sigma, kappa, nu, zeta, pi_petition, UUID, public_m=[]):
+def verify_proof_credentials_petition(params, aggr_vk, sigma, kappa, nu, zeta, pi_petition, UUID, public_m=[], bind_m=[], tables=None):
 	""" verify petition signature """
 	(G, o, g1, hs, g2, e) = params
-	(g2, alpha, beta) = aggr_vk
-	(h, s) = sigma
-	(c, rm, rt) = pi_petition
-	private_m_len = len(pi_petition[1])
-	assert len(public_m)+private_m_len <= len(beta)
+	return verify_showing(params, aggr_vk, (kappa, nu, sigma, pi_petition), zeta, public_m, base=uuid_point(G, UUID), bind_m=bind_m, tables=tables)
 
-	## verify proof
-	# re-compute witnesses commitments
-	Aw = c*kappa + rt*g2 + (1-c)*alpha + ec_sum([rm[i]*beta[i] for i in range(len(rm))])
-	Bw = c*nu + rt*h
-	Cw = rm[0]*G.hashG1(str(UUID)) + zeta*c
-	# compute the challenge prime
-	assert c == to_challenge([g1, g2, alpha, Aw, Bw, Cw]+hs+beta)
-
-	## verify signature
-	# add clear text messages
-	aggr = G2Elem.inf(G) 
-	if len(public_m) != 0:
-		aggr = ec_sum([public_m[i]*beta[i+private_m_len] for i in range(len(public_m))])
-	# verify
-	return not h.isinf() and e(h, kappa+aggr) == e(s+nu, g2)
-
-
-def make_proof_vote_petition(params, pub, m):
-	""" create encryption & proof of vote """
+
+def make_proof_vote_petition(params, pub, option, n):
+	""" encrypt a vote for the option of index 'option' out of 'n', with a one-out-of-n proof """
 	(G, g, hs, o) = params
+	assert 0 <= option < n
 
 	## material
-	# vote encryption
-	k = o.random()
-	enc_v = (k*g, k*pub + m*hs[0])
-	# oppposite of vote encryption
-	(a, b) = enc_v
-	enc_v_not = (-a, -b + hs[0])
-	# commitment to the vote
-	r1 = o.random()
-	r2 = (1-m) * r1
-	cv = m*g + r1*hs[0]
+	# one encryption per option: 1 for the chosen option, 0 for the others
+	m = [int(i == option) for i in range(n)]
+	k = [o.random() for _ in range(n)]
+	enc_v = [(k[i]*g, k[i]*pub + m[i]*hs[0]) for i in range(n)]
 
 	## proof
-	# create the witnesses
+	# for each option, simulate the branch (0 or 1) that is not true
+	w = [o.random() for _ in range(n)]
+	c_fake = [o.random() for _ in range(n)]
+	r_fake = [o.random() for _ in range(n)]
+	commitments = []
+	for i in range(n):
+		(a, b) = enc_v[i]
+		real = (w[i]*g, w[i]*pub)
+		shifted = b - hs[0] if m[i] == 0 else b
+		fake = (r_fake[i]*g + c_fake[i]*a, r_fake[i]*pub + c_fake[i]*shifted)
+		commitments += [real, fake] if m[i] == 0 else [fake, real]
+	# the votes add up to 1
 	wk = o.random()
-	wm = o.random()
-	wr1 = o.random()
-	wr2 = o.random()
-	# compute the witnesses commitments
-	Aw = wk*g
-	Bw = wk*pub + wm*hs[0]
-	Cw = wm*g + wr1*hs[0]
-	Dw = wm*cv + wr2*hs[0]
+	Sw = (wk*g, wk*pub)
 	# create the challenge
-	c = to_challenge([g, hs[0], a, b, cv, Aw, Bw, Cw, Dw])
+	c = to_challenge(_vote_transcript(params, pub, enc_v, commitments, Sw))
 	# create responses
-	rk = (wk - c*k) % o
-	rm = (wm - c*m) % o
-	rr1 = (wr1 - c*r1) % o
-	rr2 = (wr2 - c*r2) % o
-	pi_vote = (c, (rk, rm, rr1, rr2))
+	responses = []
+	for i in range(n):
+		c_real = (c - c_fake[i]) % o
+		r_real = (w[i] - c_real*k[i]) % o
+		c0 = c_real if m[i] == 0 else c_fake[i]
+		(r0, r1) = (r_real, r_fake[i]) if m[i] == 0 else (r_fake[i], r_real)
+		responses.append((c0, r0, r1))
+	rk = (wk - c*sum(k)) % o
+	pi_vote = (c, responses, rk)
 
 	## output
-	return (enc_v, enc_v_not, cv, pi_vote)
+	return (enc_v, pi_vote)
 
-def verify_proof_vote_petition(params, enc_v, pub, cv, pi_vote):
-	""" verify vote correctness """
+def verify_proof_vote_petition(params, enc_v, pub, pi_vote):
+	""" verify that each encryption holds 0 or 1, and that they add up to 1 """
 	(G, g, hs, o) = params
-	(a, b) = enc_v
-	(c, (rk, rm, rr1, rr2)) = pi_vote
-	# re-compute witnesses commitment
-	Aw = rk*g + c*a
-	Bw = rk*pub + rm*hs[0] + c*b
-	Cw = rm*g + rr1*hs[0] + c*cv
-	Dw = rm*cv + rr2*hs[0] + c*cv
+	(c, responses, rk) = pi_vote
+	if len(responses) != len(enc_v): return False
+	# re-compute witnesses commitments
+	commitments = []
+	for ((a, b), (c0, r0, r1)) in zip(enc_v, responses):
+		c1 = (c - c0) % o
+		commitments.append((r0*g + c0*a, r0*pub + c0*b))
+		commitments.append((r1*g + c1*a, r1*pub + c1*(b - hs[0])))
+	a_sum = ec_sum([a for (a, b) in enc_v])
+	b_sum = ec_sum([b for (a, b) in enc_v])
+	Sw = (rk*g + c*a_sum, rk*pub + c*(b_sum - hs[0]))
 	# verify challenge
-	return c == to_challenge([g, hs[0], a, b, cv, Aw, Bw, Cw, Dw])
+	return c == to_challenge(_vote_transcript(params, pub, enc_v, commitments, Sw))
+
+def _vote_transcript(params, pub, enc_v, commitments, Sw):
+	""" points hashed into the challenge of the vote proof """
+	(G, g, hs, o) = params
+	points = [g, hs[0], pub]
+	for (a, b) in list(enc_v) + commitments + [Sw]:
+		points += [a, b]
+	return points
 
 
 def make_proof_tally_petition(params, li, enc_results, priv):
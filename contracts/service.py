@@ -0,0 +1,179 @@
+""" Threaded HTTP/1.1 front end running the contracts' checkers on a CheckerPool """
+
+
+####################################################################
+# imports
+####################################################################
+from json import dumps, loads
+from threading import Thread
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from urllib2 import Request, urlopen
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from urllib.request import Request, urlopen
+# coconut
+from chainspacecontract.examples.executor import CheckerPool, DEFAULT_CHUNK_SIZE
+
+
+## default address of the service
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5000
+
+
+####################################################################
+# service
+####################################################################
+class ContractService(ThreadingMixIn, HTTPServer):
+    """
+        POST /<contract>/<method>         one solution, answers {"success": bool}
+        POST /<contract>/<method>/stream  solutions as JSON lines, answers one JSON line per solution
+        POST /<contract>/<method>/bulk    JSON array of solutions, answers {"success": bool, "results": [bool]}
+        Connections are kept alive and served by their own thread. Pipelined requests on one connection are
+        read, checked and answered one after another; to have many solutions checked concurrently, send them
+        in one /stream or /bulk request, or over several connections.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, pool, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        HTTPServer.__init__(self, (host, port), _Handler)
+        self.pool = pool
+        self.thread = None
+
+    def start(self):
+        """ serve from a background thread """
+        self.thread = Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.shutdown()
+            self.thread.join()
+        self.server_close()
+
+    # --------------------------------------------------------------
+    # checks
+    # NOTE: the checks of a request are all submitted before waiting for the first one
+    # --------------------------------------------------------------
+    def check(self, contract_name, method, solution):
+        return _result(self.pool.submit(contract_name, method, solution), False)
+
+    def check_stream(self, contract_name, method, solutions):
+        """ results of the checks, yielded in order as they complete """
+        pending = [self.pool.submit(contract_name, method, solution) for solution in solutions]
+        for result in pending:
+            yield _result(result, False)
+
+    def check_bulk(self, contract_name, method, solutions):
+        pending = [
+            (self.pool.submit_many(contract_name, method, solutions[i:i+DEFAULT_CHUNK_SIZE]), len(solutions[i:i+DEFAULT_CHUNK_SIZE]))
+            for i in range(0, len(solutions), DEFAULT_CHUNK_SIZE)
+        ]
+        return [result for (chunk, size) in pending for result in _result(chunk, [False] * size)]
+
+
+def _result(pending, failure):
+    """ value of a pending check, or 'failure' if its job failed """
+    try:
+        return pending.get()
+    except Exception:
+        return failure
+
+
+####################################################################
+# http
+####################################################################
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) < 2 or parts[0] not in self.server.pool.contracts:
+            return self._respond(404, {'success': False, 'message': 'unknown contract'})
+        (contract_name, method) = parts[:2]
+        try:
+            body = self._body()
+            if parts[2:] == []:
+                return self._respond(200, {'success': self.server.check(contract_name, method, loads(body))})
+            if parts[2:] == ['stream']:
+                solutions = [loads(line) for line in body.splitlines() if line.strip()]
+                return self._stream(self.server.check_stream(contract_name, method, solutions))
+            if parts[2:] == ['bulk']:
+                solutions = loads(body)
+                if not isinstance(solutions, list): raise ValueError('array of solutions expected')
+                results = self.server.check_bulk(contract_name, method, solutions)
+                return self._respond(200, {'success': all(results), 'results': results})
+        except ValueError:
+            return self._respond(400, {'success': False, 'message': 'malformed solution'})
+        return self._respond(404, {'success': False, 'message': 'unknown endpoint'})
+
+    def do_GET(self):
+        self._respond(405, {'success': False, 'message': 'POST expected'})
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        if 'chunked' in self.headers.get('Transfer-Encoding', ''): raise ValueError('chunked requests are not supported')
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length).decode('utf8') if length else u''
+
+    def _respond(self, status, payload):
+        body = dumps(payload).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, results):
+        """ chunked response of one JSON line per check, written as soon as the check and its predecessors are done """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for (i, success) in enumerate(results):
+            line = (dumps({'index': i, 'success': success}) + '\n').encode('utf8')
+            self.wfile.write(('%x\r\n' % len(line)).encode('latin-1') + line + b'\r\n')
+            self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+
+####################################################################
+# client
+####################################################################
+def post_bulk(contract_name, method, solutions, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """ submit many solutions in one request; return the result of each one """
+    request = Request(
+        'http://%s:%d/%s/%s/bulk' % (host, port, contract_name, method),
+        data=dumps(list(solutions)).encode('utf8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    response = urlopen(request)
+    try:
+        return loads(response.read().decode('utf8'))['results']
+    finally:
+        response.close()
+
+
+####################################################################
+# main
+####################################################################
+def run(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None):
+    """ serve the contracts until interrupted """
+    with CheckerPool(workers=workers) as pool:
+        service = ContractService(pool, host, port)
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.server_close()
+
+if __name__ == '__main__':
+    run()
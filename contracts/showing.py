@@ -0,0 +1,91 @@
+""" Credentials showing shared by the contracts, with pluggable zeta base, bindings and extra commitments """
+from hashlib import sha256
+from petlib.bn import Bn
+from bplib.bp import G2Elem
+from chainspacecontract.examples.utils import *
+from chainspacecontract.examples.batch import verify_pairing
+
+
+def make_showing(params, aggr_vk, sigma, private_m, base=None, bind_m=[], tables=None, commitments=[]):
+    """ show sigma with zeta = private_m[0]*base (g1 by default); the proof is bound to the values of bind_m
+        and shows that each (i, C, r, H) of commitments opens to C = private_m[i]*g1 + r*H """
+    (G, o, g1, hs, g2, e) = params
+    (g2, alpha, beta) = aggr_vk
+    (h, s) = sigma
+    T = tables or vk_tables(params, aggr_vk)
+    base = T.g1 if base is None else base
+    assert 0 < len(private_m) <= len(beta)
+    assert all(0 <= i < len(private_m) for (i, C, r, H) in commitments)
+
+    ## material
+    r_prime = o.random()
+    (h_prime , s_prime) = (r_prime*h , r_prime*s)
+    sigma_prime = (h_prime, s_prime)
+    t = o.random()
+    kappa = secret_mul([t]+private_m, [T.g2]+T.beta[:len(private_m)]) + alpha
+    nu = t*h_prime
+    zeta = secret_mul([private_m[0]], [base])
+
+    ## proof
+    # create the witnesses
+    wm = [o.random() for _ in private_m]
+    wt = o.random()
+    wo = [o.random() for _ in commitments]
+    # compute the witnesses commitments
+    Aw = secret_mul([wt]+wm, [T.g2]+T.beta[:len(private_m)]) + alpha
+    Bw = wt*h_prime
+    Cw = secret_mul([wm[0]], [base])
+    Dw = [secret_mul([wm[i], wo[k]], [T.g1, H]) for (k, (i, C, r, H)) in enumerate(commitments)]
+    # create the challenge
+    c = showing_challenge(T, [Aw, Bw, Cw]+_interleave([C for (i, C, r, H) in commitments], Dw), bind_m)
+    # create responses
+    rm = [(wm[i] - c*private_m[i]) % o for i in range(len(private_m))]
+    rt = (wt - c*t) % o
+    ro = [(wo[k] - c*r) % o for (k, (i, C, r, H)) in enumerate(commitments)]
+    pi_show = (c, rm, rt, ro) if commitments else (c, rm, rt)
+    Theta = (kappa, nu, sigma_prime, pi_show)
+
+    ## output
+    return (Theta, zeta)
+
+
+def verify_showing(params, aggr_vk, Theta, zeta, public_m=[], base=None, bind_m=[], tables=None, commitments=[]):
+    """ verify a showing made with the same base, bindings and commitments, given here as (i, C, H) """
+    (G, o, g1, hs, g2, e) = params
+    (g2, alpha, beta) = aggr_vk
+    T = tables or vk_tables(params, aggr_vk)
+    base = T.g1 if base is None else base
+    (kappa, nu, sigma, pi_show) = Theta
+    (h, s) = sigma
+    (c, rm, rt) = pi_show[:3]
+    ro = pi_show[3] if len(pi_show) == 4 else []
+    if len(rm) == 0 or len(public_m)+len(rm) > len(beta): return False
+    if len(ro) != len(commitments) or not all(0 <= i < len(rm) for (i, C, H) in commitments): return False
+
+    ## verify proof
+    # re-compute witnesses commitments
+    Aw = multi_mul([c, rt, 1-c]+rm, [kappa, T.g2, T.alpha]+T.beta[:len(rm)], o)
+    Bw = multi_mul([c, rt], [nu, h], o)
+    Cw = multi_mul([rm[0], c], [base, zeta], o)
+    Dw = [multi_mul([rm[i], ro[k], c], [T.g1, H, C], o) for (k, (i, C, H)) in enumerate(commitments)]
+    # compute the challenge prime
+    if c != showing_challenge(T, [Aw, Bw, Cw]+_interleave([C for (i, C, H) in commitments], Dw), bind_m): return False
+
+    ## verify signature
+    # add clear text messages
+    aggr = G2Elem.inf(G)
+    if len(public_m) != 0:
+        aggr = multi_mul(public_m, T.beta[len(rm):], o)
+    # verify
+    return verify_pairing(params, h, kappa+aggr, s+nu)
+
+
+def showing_challenge(tables, commitments, bind_m=[]):
+    """ challenge over [g1, g2, alpha]+commitments+hs+beta+bind; only the commitments and bindings are exported per call """
+    bind = [tables.g1.mul(item) for item in bind_m]
+    transcript = tables.prefix + exported(commitments) + tables.suffix + exported(bind)
+    return Bn.from_binary(sha256(b','.join(transcript)).digest())
+
+def _interleave(commitments, witnesses):
+    """ [C0, Dw0, C1, Dw1, ...] """
+    return [point for pair in zip(commitments, witnesses) for point in pair]
@@ -15,6 +15,7 @@ from petlib.bn import Bn
 # coconut
 from chainspacecontract.examples.utils import *
 from chainspacecontract.examples.tumbler_proofs import *
+from chainspacecontract.examples.nullifiers import *
 from coconut.utils import *
 from coconut.scheme import *
 # chainspace
@@ -23,6 +24,9 @@ from chainspacecontract import ChainspaceContract
 ## contract name
 contract = ChainspaceContract('tumbler')
 
+## system parameters, built once at load
+bp_setup(2)
+
 
 ####################################################################
 # methods
@@ -38,19 +42,27 @@ def init():
 
 # ------------------------------------------------------------------
 # create tumbler
+# NOTE:
+#   - the spent list is split in 'shards' objects; each ID is owned by
+#     the shard given by 'redeem_shard', so independent redeems do not
+#     conflict
+#   - if the key object of aggr_vk is a reference input, the lists only
+#     store its fingerprint
 # ------------------------------------------------------------------
 @contract.method('create_tumbler')
-def create_tumbler(inputs, reference_inputs, parameters, aggr_vk):
+def create_tumbler(inputs, reference_inputs, parameters, aggr_vk, shards=1):
     # spent lists
-    spent_list = {
+    spent_lists = [store_vk({
         'type' : 'TList',
-        'list' : [],
-        'vk'  : pack(aggr_vk)
-    }
+        'shard' : i,
+        'shards' : shards,
+        'root' : EMPTY_ROOT, # commitment to the spent IDs
+        'size' : 0
+    }, 'vk', aggr_vk, reference_inputs) for i in range(shards)]
 
     # return
     return {
-        'outputs': (inputs[0], dumps(spent_list)),
+        'outputs': (inputs[0],) + tuple(dumps(spent_list) for spent_list in spent_lists),
     }
 
 
@@ -59,25 +71,46 @@ def create_tumbler(inputs, reference_inputs, parameters, aggr_vk):
 # ------------------------------------------------------------------
 @contract.method('redeem')
 def redeem(inputs, reference_inputs, parameters, sig, vk, ID):
-    old_list = loads(inputs[0])
-    new_list = loads(inputs[0])
+    objects = ObjectView(inputs)
+    old_list = objects[0]
+    new_list = objects.copy(0)
     addr = loads(parameters[0])
 
     # proof
-    bp_params = setup(2)
+    bp_params = bp_setup(2)
     (kappa, nu, sigma, zeta, pi_tumbler) = make_proof_tumbler(bp_params, vk, sig, ID, addr)
     #assert verify_proof_tumbler(bp_params, vk, sig, kappa, nu, zeta, pi_tumbler, addr)
+    assert shard_of(zeta, old_list['shards']) == old_list['shard']
 
     # update spent list
-    new_list['list'].append(pack(zeta))
+    (new_list['root'], pi_spent) = add_nullifier(old_list['root'], zeta)
+    new_list['size'] = old_list['size'] + 1
 
     # return
     return {
         'outputs': (dumps(new_list),),
-        'extra_parameters' : (pack(sigma), pack(kappa), pack(nu), pack(zeta), pack(pi_tumbler))
+        'extra_parameters' : (pack(sigma), pack(kappa), pack(nu), pack(zeta), pack(pi_tumbler), pi_spent)
     }
 
 
+# ------------------------------------------------------------------
+# redeem shard
+# NOTE: helper for the client, to pick the spent list to consume
+# ------------------------------------------------------------------
+def redeem_shard(ID, shards):
+    return shard_of(secret_mul([ID], [bp_tables(2).g1]), shards)
+
+# ------------------------------------------------------------------
+# spent zetas
+# NOTE: 
+#   - helper for the client, giving the IDs that a transaction of 'method' added to its spent list
+#   - the zetas of the 'redeem' transactions of a TList, in order, are its history for 'history_oracle'
+# ------------------------------------------------------------------
+def spent_zetas(method, parameters):
+    if method == 'redeem':
+        return [unpack(parameters[4])]
+    return []
+
 
 ####################################################################
 # checker
@@ -88,20 +121,24 @@ def redeem(inputs, reference_inputs, parameters, sig, vk, ID):
 @contract.checker('create_tumbler')
 def create_tumbler_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
-        # retrieve ID list
-        spent_list = loads(outputs[1])
+        # retrieve ID lists
+        spent_lists = [loads(output) for output in outputs[1:]]
+        shards = spent_lists[0]['shards']
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 2 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(*spent_lists) or len(outputs) != shards+1 or len(returns) != 0:
             return False 
 
         # check types
         if loads(inputs[0])['type'] != 'TToken' or loads(outputs[0])['type'] != 'TToken': return False
-        if spent_list['type'] != 'TList': return False
+        if any(spent_list['type'] != 'TList' for spent_list in spent_lists): return False
 
         # check fields
-        spent_list['vk']
-        if spent_list['list']: return False # check list is empty
+        for i in range(shards):
+            spent_list = spent_lists[i]
+            if spent_list['shard'] != i or spent_list['shards'] != shards: return False
+            if resolve_vk(spent_list, 'vk', reference_inputs) != resolve_vk(spent_lists[0], 'vk', reference_inputs): return False
+            if spent_list['root'] != EMPTY_ROOT or spent_list['size'] != 0: return False # check list is empty
 
         # otherwise
         return True
@@ -114,11 +151,12 @@ def create_tumbler_checker(inputs, reference_inputs, parameters, outputs, return
 # check add score
 # ------------------------------------------------------------------
 @contract.checker('redeem')
+@mutates(['root', 'size'])
 def redeem_checker(inputs, reference_inputs, parameters, outputs, returns, dependencies):
     try:
         # retrieve ID list
-        old_list = loads(inputs[0])
-        new_list = loads(outputs[0])
+        old_list = parse(inputs[0])
+        new_list = parse(outputs[0])
         # retrieve parameters
         addr = loads(parameters[0])
         sig = unpack(parameters[1])
@@ -126,26 +164,26 @@ def redeem_checker(inputs, reference_inputs, parameters, outputs, returns, depen
         nu = unpack(parameters[3])
         zeta = unpack(parameters[4])
         pi_tumbler = unpack(parameters[5])
+        pi_spent = parameters[6]
 
         # check format
-        if len(inputs) != 1 or len(reference_inputs) != 0 or len(outputs) != 1 or len(returns) != 0:
+        if len(inputs) != 1 or len(reference_inputs) != key_references(old_list) or len(outputs) != 1 or len(returns) != 0:
             return False 
 
         # check types
         if new_list['type'] != 'TList': return False      
 
-        # check fields
-        if new_list['vk'] != new_list['vk']: return False
-
         # check spent list
-        zeta_packed = parameters[4]
-        if (zeta_packed in old_list['list']) or (new_list['list'] != old_list['list'] + [zeta_packed]):
-            return False
+        if shard_of(zeta, new_list['shards']) != new_list['shard']: return False
+        if new_list['size'] != old_list['size'] + 1: return False
+        if not check_nullifier(old_list['root'], new_list['root'], zeta, pi_spent): return False
 
         # verify coin
-        bp_params = setup(2)
-        vk = unpack(new_list['vk'])
-        if not verify_proof_tumbler(bp_params, vk, sig, kappa, nu, zeta, pi_tumbler, addr): return False
+        bp_params = bp_setup(2)
+        packed_vk = resolve_vk(old_list, 'vk', reference_inputs)
+        vk = unpack_cached(packed_vk)
+        tables = vk_tables(bp_params, vk, packed=packed_vk)
+        if not verify_proof_tumbler(bp_params, vk, sig, kappa, nu, zeta, pi_tumbler, addr, tables=tables): return False
   
         # otherwise
         return True
@@ -1,19 +1,407 @@
 from bplib.bp import G2Elem, G1Elem
 from petlib.ec import EcGroup
 from petlib.pack import encode, decode
+from petlib.ecdsa import do_ecdsa_verify
+from petlib.bn import Bn
 from binascii import hexlify, unhexlify
+from base64 import b64encode, b64decode
+from json import loads
+from collections import namedtuple, OrderedDict
+from functools import wraps
+from os import urandom
+from hashlib import sha256
+from coconut.scheme import setup
 
-def pet_setup():
-	G = EcGroup()
-	g = G.generator()
-	hs = [G.hash_to_point(("h%s" % i).encode("utf8")) for i in range(4)]
-	o = G.order()
-	return (G, g, hs, o)
+## version tag of the packing format; untagged values are legacy hex
+PACK_V1 = b'1:'
+
+## sizes of the caches of decoded values and of parsed objects
+UNPACK_CACHE_SIZE = 256
+PARSE_CACHE_SIZE = 64
+
+## petlib's default curve (NIST P-224)
+DEFAULT_EC_CURVE = 713
+
+## integer types accepted as scalars, besides Bn
+try:
+    INTEGER_TYPES = (int, long)
+except NameError:
+    INTEGER_TYPES = (int,)
+
+## numbers of variable bases from which multi_mul interleaves them with Straus instead of multiplying each natively,
+## and from which it switches from Straus to Pippenger (measured crossovers, see timings/timing_utils.py)
+STRAUS_THRESHOLD = 4
+PIPPENGER_THRESHOLD = 64
+
+## parameters registry, keyed by (curve, q)
+_registry = {}
+
+## fixed-base tables attached to the bp parameters
+FixedBases = namedtuple('FixedBases', ['g1', 'g2', 'hs'])
+
+## fixed-base tables of verification keys, keyed by packed key; 'prefix' and 'suffix' are the
+## exported points around the proof commitments in the challenges of the showings
+VerifierBases = namedtuple('VerifierBases', ['g1', 'g2', 'alpha', 'beta', 'prefix', 'suffix'])
+VK_TABLES_SIZE = 32
+_vk_tables = {}
+
+
+class FixedBase(object):
+    """ windowed precomputation for the multiples of a fixed point """
+    def __init__(self, point, order, window=4):
+        self.point = point
+        self.order = _scalar(order)
+        self.window = window
+        self.table = []
+        base = point
+        for _ in range(0, self.order.bit_length(), window):
+            row = [None, base]
+            for j in range(2, 1 << window):
+                row.append(row[-1] + base)
+            self.table.append(row)
+            base = row[-1] + base
+
+    def mul(self, k):
+        """ return k*point """
+        k = _scalar(k) % self.order
+        mask = (1 << self.window) - 1
+        acc = None
+        for row in self.table:
+            digit = k & mask
+            if digit:
+                acc = row[digit] if acc is None else acc + row[digit]
+            k >>= self.window
+        if acc is None:
+            return 0 * self.point
+        return acc
+
+
+def multi_mul(scalars, bases, o):
+    """ sum(k_i*P_i) in a single pass; bases are either points or FixedBase tables """
+    acc, scalars_var, points = None, [], []
+    for (k, P) in zip(scalars, bases):
+        if isinstance(P, FixedBase):
+            term = P.mul(k)
+            acc = term if acc is None else acc + term
+        else:
+            scalars_var.append(_scalar(k) % _scalar(o))
+            points.append(P)
+    if 0 < len(points) < STRAUS_THRESHOLD:
+        # a few variable bases are faster with the native multiplication
+        term = secret_mul(scalars_var, points)
+        acc = term if acc is None else acc + term
+    elif points:
+        interleave = _straus if len(points) < PIPPENGER_THRESHOLD else _pippenger
+        term = interleave(scalars_var, points)
+        if term is not None:
+            acc = term if acc is None else acc + term
+    if acc is None:
+        P = bases[0]
+        return 0 * (P.point if isinstance(P, FixedBase) else P)
+    return acc
+
+def secret_mul(scalars, bases):
+    """ sum(k_i*P_i) with the native scalar multiplication, which does not index tables by the digits of k_i; for the prover's secrets """
+    acc = None
+    for (k, P) in zip(scalars, bases):
+        k = k if isinstance(k, Bn) else Bn.from_decimal(str(_scalar(k)))
+        term = k * (P.point if isinstance(P, FixedBase) else P)
+        acc = term if acc is None else acc + term
+    return acc
+
+def _scalar(k):
+    """ k as an integer; scalars that are not a Bn or an integer (e.g. strings or floats from JSON) are rejected """
+    if isinstance(k, Bn):
+        # through hex: int(k) is python-future's newint on Python 2, whose operators are pure Python
+        return int(k.hex(), 16)
+    if isinstance(k, bool) or not isinstance(k, INTEGER_TYPES):
+        raise TypeError('scalar expected, got %s' % type(k).__name__)
+    return k
+
+def random_weight():
+    """ random 64-bit nonzero scalar, for random linear combinations of equations checked at once """
+    return Bn.from_binary(urandom(8)) + 1
+
+def _straus(scalars, points, window=4):
+    """ interleaved windowed multi-exponentiation, sharing the doublings """
+    mask = (1 << window) - 1
+    tables = []
+    for P in points:
+        row = [None, P]
+        for j in range(2, 1 << window):
+            row.append(row[-1] + P)
+        tables.append(row)
+    acc = None
+    windows = (max(scalars).bit_length() + window - 1) // window
+    for i in reversed(range(windows)):
+        if acc is not None:
+            for _ in range(window): acc = acc + acc
+        for (k, row) in zip(scalars, tables):
+            digit = (k >> (window*i)) & mask
+            if digit:
+                acc = row[digit] if acc is None else acc + row[digit]
+    return acc
+
+def _pippenger(scalars, points):
+    """ bucket multi-exponentiation, for many bases """
+    window = max(2, len(points).bit_length() - 2)
+    mask = (1 << window) - 1
+    acc = None
+    windows = (max(scalars).bit_length() + window - 1) // window
+    for i in reversed(range(windows)):
+        if acc is not None:
+            for _ in range(window): acc = acc + acc
+        buckets = [None] * (1 << window)
+        for (k, P) in zip(scalars, points):
+            digit = (k >> (window*i)) & mask
+            if digit:
+                buckets[digit] = P if buckets[digit] is None else buckets[digit] + P
+        running, total = None, None
+        for bucket in reversed(buckets[1:]):
+            if bucket is not None:
+                running = bucket if running is None else running + bucket
+            if running is not None:
+                total = running if total is None else total + running
+        if total is not None:
+            acc = total if acc is None else acc + total
+    return acc
+
+def bp_setup(q=1):
+    """ coconut's setup(q), built once per process """
+    key = ('bp', q)
+    if key not in _registry:
+        params = setup(q)
+        (G, o, g1, hs, g2, e) = params
+        tables = FixedBases(FixedBase(g1, o), FixedBase(g2, o), [FixedBase(h, o) for h in hs])
+        _registry[key] = (params, tables)
+    return _registry[key][0]
+
+def bp_tables(q=1):
+    """ fixed-base tables for g1, g2 and hs of bp_setup(q) """
+    bp_setup(q)
+    return _registry[('bp', q)][1]
+
+def vk_tables(params, aggr_vk, packed=None):
+    """ fixed-base tables for g1 and for g2, alpha and beta of 'aggr_vk', and the static part of the challenges of its showings, built once per key """
+    key = (pack(aggr_vk) if packed is None else packed, len(params[3]))
+    if key not in _vk_tables:
+        (G, o, g1, hs, g2, e) = params
+        (g2, alpha, beta) = aggr_vk
+        bases = bp_tables(len(hs))
+        if len(_vk_tables) >= VK_TABLES_SIZE:
+            _vk_tables.pop(next(iter(_vk_tables)))
+        _vk_tables[key] = VerifierBases(
+            bases.g1,
+            bases.g2 if bases.g2.point == g2 else FixedBase(g2, o),
+            FixedBase(alpha, o),
+            [FixedBase(b, o) for b in beta],
+            exported([g1, g2, alpha]),
+            exported(list(hs) + list(beta))
+        )
+    return _vk_tables[key]
+
+def exported(points):
+    """ hex exports of 'points', as hashed into Fiat-Shamir challenges """
+    return [hexlify(x.export()) for x in points]
+
+def pet_setup(nid=DEFAULT_EC_CURVE):
+    """ petition parameters, built once per process """
+    key = ('ec', nid)
+    if key not in _registry:
+        G = EcGroup(nid)
+        g = G.generator()
+        hs = [G.hash_to_point(("h%s" % i).encode("utf8")) for i in range(4)]
+        o = G.order()
+        _registry[key] = (G, g, hs, o)
+    return _registry[key]
 
 def pack(x):
-    return hexlify(encode(x))
+    """ petlib encoding, base64 within JSON, tagged with the format version """
+    return PACK_V1 + b64encode(encode(x))
 
 def unpack(x):
     if x is None:
-        return x 
-    return decode(unhexlify(x))
+        return x
+    return decode(_raw(x))
+
+def _raw(x):
+    """ petlib encoding of a packed value, in either format """
+    if x.startswith(PACK_V1):
+        return b64decode(x[len(PACK_V1):])
+    return unhexlify(x)
+
+class LRUCache(object):
+    """ bounded least-recently-used cache with hit/miss counters """
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+    def get(self, key, build):
+        """ value under 'key', computed with build() on a miss """
+        try:
+            value = self._values.pop(key)
+            self.hits += 1
+        except KeyError:
+            value = build()
+            self.misses += 1
+            if len(self._values) >= self.size:
+                self._values.popitem(last=False)
+        self._values[key] = value
+        return value
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._values), 'maxsize': self.size}
+
+## decoded immutable values (verification keys, hash points), keyed by packed string
+_cache = LRUCache(UNPACK_CACHE_SIZE)
+
+## parsed objects, keyed by their JSON string
+_parsed = LRUCache(PARSE_CACHE_SIZE)
+
+def cached(key, build):
+    """ build() memoized under 'key' in a bounded LRU cache; the value must not be mutated """
+    return _cache.get(key, build)
+
+def unpack_cached(x):
+    """ unpack for immutable values such as verification keys, decoded once """
+    if x is None:
+        return x
+    return cached(x, lambda: unpack(x))
+
+def cache_info():
+    """ hit/miss counters of the unpack cache """
+    return _cache.info()
+
+def parse(x):
+    """ loads(x), parsed once and shared; the object must not be mutated """
+    return _parsed.get(x, lambda: loads(x))
+
+
+class ObjectView(object):
+    """ lazily parsed view over JSON-encoded objects; each object is parsed at most once """
+    def __init__(self, objects):
+        self.objects = objects or ()
+        self._parsed = {}
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __getitem__(self, i):
+        """ parsed object; shared between callers, so it must not be modified """
+        if i not in self._parsed:
+            self._parsed[i] = parse(self.objects[i])
+        return self._parsed[i]
+
+    def copy(self, i):
+        """ shallow copy of an object, to be updated by replacing its fields """
+        return dict(self[i])
+
+
+####################################################################
+# key registry
+####################################################################
+def vk_fingerprint(packed_vk):
+    """ full SHA-256 of a packed verification key, whatever its packing format; 64 hex characters like the clock and object IDs """
+    return sha256(_raw(packed_vk)).hexdigest()
+
+def key_object(aggr_vk):
+    """ key registry object, storing 'aggr_vk' once under its fingerprint """
+    packed_vk = pack(aggr_vk)
+    return {'type' : 'CoCoKey', 'fingerprint' : vk_fingerprint(packed_vk), 'vk' : packed_vk}
+
+def store_vk(obj, field, aggr_vk, reference_inputs=None):
+    """ embed 'aggr_vk' in obj[field], or only its fingerprint if its key object is a reference input """
+    packed_vk = pack(aggr_vk)
+    fingerprint = vk_fingerprint(packed_vk)
+    if any(_is_key(x, fingerprint) for x in reference_inputs or ()):
+        obj['vk_fp'] = fingerprint
+    else:
+        obj[field] = packed_vk
+    return obj
+
+def resolve_vk(obj, field, reference_inputs=None):
+    """ packed key of 'obj', either embedded in obj[field] or given by its key object as a reference input """
+    if 'vk_fp' not in obj:
+        return obj[field]
+    for x in reference_inputs or ():
+        if _is_key(x, obj['vk_fp']):
+            return parse(x)['vk']
+    raise KeyError('missing key object ' + obj['vk_fp'])
+
+def key_references(*objects):
+    """ number of key objects to be given as reference inputs for 'objects' """
+    return len(set(obj['vk_fp'] for obj in objects if 'vk_fp' in obj))
+
+def _is_key(x, fingerprint):
+    """ whether 'x' is the key object of 'fingerprint'; the fingerprint is checked once per key """
+    key = parse(x)
+    if key.get('type') != 'CoCoKey' or key.get('fingerprint') != fingerprint:
+        return False
+    return cached(('fingerprint', key['vk']), lambda: vk_fingerprint(key['vk'])) == fingerprint
+
+
+####################################################################
+# clock
+####################################################################
+def clock_uid(pub_owner):
+    """ ID of the clock ticked by the owner of 'pub_owner' """
+    return sha256(pub_owner.export()).hexdigest()
+
+def clock_digest(uid, epoch):
+    """ digest signed by the owner of a clock at each tick """
+    return sha256(('%s:%d' % (uid, epoch)).encode('utf8')).digest()
+
+def clock_epoch(obj, reference_inputs=None):
+    """ epoch of the clock of 'obj', given as a reference input; None if 'obj' has no clock """
+    if obj.get('clock') is None:
+        return None
+    for x in reference_inputs or ():
+        if _is_clock(x, obj['clock']):
+            return parse(x)['epoch']
+    raise KeyError('missing clock ' + obj['clock'])
+
+def clock_references(*objects):
+    """ number of clock objects to be given as reference inputs for 'objects' """
+    return len(set(obj['clock'] for obj in objects if obj.get('clock') is not None))
+
+def _is_clock(x, uid):
+    """ whether 'x' is a tick of the clock 'uid'; each tick is verified once, then shared by all its readers """
+    clock = parse(x)
+    if clock.get('type') != 'Clock' or clock.get('uid') != uid:
+        return False
+    return cached(('clock', x), lambda: _verify_clock(clock))
+
+def _verify_clock(clock):
+    (G, g, hs, o) = pet_setup()
+    pub_owner = unpack(clock['owner'])
+    if clock_uid(pub_owner) != clock['uid']:
+        return False
+    return do_ecdsa_verify(G, pub_owner, unpack(clock['sig']), clock_digest(clock['uid'], clock['epoch']))
+
+
+####################################################################
+# checker helpers
+####################################################################
+def changed_fields(old, new):
+    """ names of the fields that differ between two objects """
+    changed = set(key for key in new if key not in old or old[key] != new[key])
+    return changed | set(key for key in old if key not in new)
+
+def mutates(*fields, **kwargs):
+    """ checker decorator: outputs[i] may only differ from inputs[i] in 'fields[i]'; with each=True, in 'fields[0]' for all i """
+    each = kwargs.get('each', False)
+    def decorator(checker):
+        @wraps(checker)
+        def wrapper(inputs, reference_inputs, parameters, outputs, returns, dependencies):
+            try:
+                if each and len(outputs) != len(inputs): return False
+                for i in range(len(inputs) if each else len(fields)):
+                    if not changed_fields(parse(inputs[i]), parse(outputs[i])) <= set(fields[0 if each else i]):
+                        return False
+            except Exception:
+                return False
+            return checker(inputs, reference_inputs, parameters, outputs, returns, dependencies)
+        return wrapper
+    return decorator
@@ -15,9 +15,11 @@ import requests
 from chainspacecontract import transaction_to_solution
 from chainspacecontract.examples.auction import contract as auction_contract
 from chainspacecontract.examples import auction
+from chainspacecontract.examples import clock
 # petlib
 from petlib.ecdsa import do_ecdsa_sign, do_ecdsa_verify
 from petlib.bn import Bn
+from petlib.pack import encode
 # coconut
 from chainspacecontract.examples.utils import *
 from coconut.utils import *
@@ -33,23 +35,81 @@ bp_params = setup(q) # bp system's parameters
 (G, o, g1, hs, g2, e) = bp_params
 (sk, vk) = ttp_keygen(bp_params, t, n) # authorities keys
 aggr_vk = agg_key(bp_params, vk, threshold=True)
-t_commit, t_reveal = 100, 1000 # auction timeline
+t_commit, t_reveal, t_rank = 100, 1000, 2000 # auction timeline
 uid = '1234' # auction id
 v0, ov0 = 350, o.random() # minimum price
 addr = Bn(50) # bidder address for withdrawal
 file_hash = Bn(500) # winner file hash
 
 ## simulate deposit
-bidders = []
-for i in range(1,5):
-    seq, v = o.random(), i
+def deposit(v):
+    seq = o.random()
     (d, gamma) = elgamal_keygen(bp_params)
     private_m = [seq, v]
     Lambda = prepare_blind_sign(bp_params, gamma, private_m)
     sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
     sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
     sigma = agg_cred(bp_params, sigs)
-    bidders.append((seq, v, sigma))
+    return (seq, v, sigma)
+bidders = [deposit(v) for v in range(1,5)]
+
+## sealed bids
+v0_sealed = 2 # minimum price of the sealed auction
+openings = dict((i, (bidders[i][1], o.random())) for i in range(len(bidders))) # slot -> (v, ov)
+
+## clock
+(_, g_clock, _, o_clock) = pet_setup()
+priv_clock = o_clock.random()
+pub_clock = priv_clock*g_clock
+
+## another clock owner
+priv_other = o_clock.random()
+pub_other = priv_other*g_clock
+
+def clock_at(epoch, priv_owner=priv_clock, pub_owner=pub_clock):
+    """ clock of 'pub_owner', ticked up to 'epoch' """
+    clock_token = clock.init()['transaction']['outputs'][0]
+    clock_object = clock.create_clock((clock_token,), None, None, priv_owner, pub_owner)['transaction']['outputs'][1]
+    for _ in range(epoch):
+        clock_object = clock.tick((clock_object, ), None, None, priv_owner)['transaction']['outputs'][0]
+    return clock_object
+
+def checked(method, solution):
+    """ whether the auction's checker of 'method' accepts 'solution' """
+    response = requests.post('http://127.0.0.1:5000/' + auction_contract.contract_name + '/' + method, json=solution)
+    return response.json()['success']
+
+def sealed_auction(minimum, bids=bidders, opened=openings):
+    """ sealed auction with all the bids committed and sealed, and its clock at the end of the reveals """
+    # clock, at epoch 0
+    clock_token = clock.init()['transaction']['outputs'][0]
+    clock_object = clock.create_clock((clock_token,), None, None, priv_clock, pub_clock)['transaction']['outputs'][1]
+
+    # commits until epoch 1, reveals until epoch 2, ranking until epoch 3
+    token = auction.init()['transaction']['outputs'][0]
+    auction_object = auction.create(
+        (token,), None, None, aggr_vk, 1, 2, uid, minimum, ov0, True, clock_uid(pub_clock), 3
+    )['transaction']['outputs'][1]
+    for (seq, v, sigma) in bids:
+        auction_object = auction.commit((auction_object, ), (clock_object, ), None, seq, v, sigma)['transaction']['outputs'][0]
+    clock_object = clock.tick((clock_object, ), None, None, priv_clock)['transaction']['outputs'][0]
+    for (i, (seq, v, sigma)) in enumerate(bids):
+        (v, ov) = opened[i]
+        auction_object = auction.seal((auction_object, ), (clock_object, ), None, seq, v, ov, sigma)['transaction']['outputs'][0]
+    clock_object = clock.tick((clock_object, ), None, None, priv_clock)['transaction']['outputs'][0]
+    return (auction_object, clock_object)
+
+def sealed_withdraw(auction_object, clock_object, i):
+    """ withdraw of the sealed bid in slot i """
+    (v, ov) = openings[i]
+    return auction.withdraw(
+        (auction_object, ),
+        (clock_object, ),
+        (pack(auction.bid_commitment(v, ov)), pack(addr)),
+        bidders[i][0], # seq
+        bidders[i][2], # sigma
+        (v, ov) # opening
+    )
 
 
 class Test(unittest.TestCase):
@@ -98,6 +158,13 @@ class Test(unittest.TestCase):
             )
             self.assertTrue(response.json()['success'])
 
+            ## sealed auctions need a clock to enforce 't_rank'
+            for (clock_id, accepted) in ((None, False), (clock_uid(pub_clock), True)):
+                transaction = auction.create(
+                    (token,), None, None, aggr_vk, t_commit, t_reveal, uid, v0_sealed, ov0, True, clock_id, t_rank
+                )
+                self.assertEqual(checked('create', transaction_to_solution(transaction)), accepted)
+
     # --------------------------------------------------------------
     # test commit
     # --------------------------------------------------------------
@@ -139,6 +206,27 @@ class Test(unittest.TestCase):
             )
             self.assertTrue(response.json()['success'])
 
+            # a field the checker does not declare as mutated
+            solution = transaction_to_solution(transaction)
+            new_auction = loads(solution['outputs'][0])
+            new_auction['uid'] = 'another auction'
+            solution['outputs'] = [dumps(new_auction)]
+            self.assertFalse(checked('commit', solution))
+
+            ## commit the same credential twice
+            auction_object = transaction['transaction']['outputs'][0]
+            transaction = auction.commit((auction_object, ), None, None, bidders[0][0], bidders[0][1], bidders[0][2])
+            self.assertFalse(checked('commit', transaction_to_solution(transaction)))
+
+            # the same zeta, in the legacy packing
+            solution = transaction_to_solution(transaction)
+            old_auction = loads(auction_object)
+            legacy = hexlify(encode(unpack(solution['parameters'][1])))
+            new_auction = dict(old_auction, list=old_auction['list'] + [legacy], index=dict(old_auction['index'], **{legacy : 1}))
+            solution['parameters'] = [solution['parameters'][0], legacy] + list(solution['parameters'][2:])
+            solution['outputs'] = [dumps(new_auction)]
+            self.assertFalse(checked('commit', solution))
+
     # --------------------------------------------------------------
     # test reveal
     # --------------------------------------------------------------
@@ -190,7 +278,512 @@ class Test(unittest.TestCase):
                 + '/reveal', json=transaction_to_solution(transaction)
             )
             self.assertTrue(response.json()['success'])
+
+            # the bid is not an integer
+            for v in (str(bidders[1][1]), float(bidders[1][1])):
+                transaction = auction.reveal((auction_object, ), None, (dumps(v),), bidders[1][0], bidders[1][2])
+                self.assertFalse(checked('reveal', transaction_to_solution(transaction)))
    
+    # --------------------------------------------------------------
+    # test winner pointer
+    # --------------------------------------------------------------
+    def test_winner(self):
+        with auction_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = auction.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # create auction
+            auction_transaction = auction.create(
+                (token,),
+                None,
+                None,
+                aggr_vk,
+                t_commit,
+                t_reveal,
+                uid,
+                v0,
+                ov0
+            )
+            auction_object = auction_transaction['transaction']['outputs'][1]
+
+            ## commit
+            for i in range(len(bidders)):
+                commit_transaction = auction.commit(
+                    (auction_object, ),
+                    None,
+                    None,
+                    bidders[i][0], # seq
+                    bidders[i][1], # v
+                    bidders[i][2] # sigma
+                )
+                auction_object = commit_transaction['transaction']['outputs'][0]
+
+            ## reveal, in reverse order
+            for i in reversed(range(len(bidders))):
+                transaction = auction.reveal(
+                    (auction_object, ),
+                    None,
+                    (dumps(bidders[i][1]),), # v
+                    bidders[i][0], # seq
+                    bidders[i][2] # sigma
+                )
+                auction_object = transaction['transaction']['outputs'][0]
+
+                ## submit transaction
+                response = requests.post(
+                    'http://127.0.0.1:5000/' + auction_contract.contract_name 
+                    + '/reveal', json=transaction_to_solution(transaction)
+                )
+                self.assertTrue(response.json()['success'])
+
+            # the highest bid is the last one committed
+            self.assertEqual(loads(auction_object)['winner'], len(bidders)-1)
+
+    # --------------------------------------------------------------
+    # test tie
+    # NOTE: if multiple biggest bids, the first bidder wins
+    # --------------------------------------------------------------
+    def test_tie(self):
+        with auction_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = auction.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # create auction
+            auction_transaction = auction.create(
+                (token,),
+                None,
+                None,
+                aggr_vk,
+                t_commit,
+                t_reveal,
+                uid,
+                v0,
+                ov0
+            )
+            auction_object = auction_transaction['transaction']['outputs'][1]
+
+            ## commit two equal bids
+            tied = [bidders[-1], deposit(bidders[-1][1])]
+            for (seq, v, sigma) in tied:
+                commit_transaction = auction.commit((auction_object, ), None, None, seq, v, sigma)
+                auction_object = commit_transaction['transaction']['outputs'][0]
+
+            ## reveal the later bid first
+            (seq, v, sigma) = tied[1]
+            transaction = auction.reveal((auction_object, ), None, (dumps(v),), seq, sigma)
+            auction_object = transaction['transaction']['outputs'][0]
+            self.assertEqual(loads(auction_object)['winner'], 1)
+
+            ## the earlier bid takes the lead
+            (seq, v, sigma) = tied[0]
+            transaction = auction.reveal((auction_object, ), None, (dumps(v),), seq, sigma)
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/reveal', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+            self.assertEqual(loads(transaction['transaction']['outputs'][0])['winner'], 0)
+
+            # the same reveal, keeping the later bid as winner
+            solution = transaction_to_solution(transaction)
+            new_auction = loads(solution['outputs'][0])
+            new_auction['winner'] = 1
+            solution['outputs'] = [dumps(new_auction)]
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/reveal', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+            ## the later bid loses, and can withdraw
+            auction_object = transaction['transaction']['outputs'][0]
+            (seq, v, sigma) = tied[1]
+            transaction = auction.withdraw((auction_object, ), None, (dumps(v), pack(addr)), seq, sigma)
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/withdraw', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+
+    # --------------------------------------------------------------
+    # test seal
+    # --------------------------------------------------------------
+    def test_seal(self):
+        with auction_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = auction.init()
+            token = init_transaction['transaction']['outputs'][0]
+            clock_object = clock_at(0)
+
+            # create sealed auction; commits until epoch 1, seals until epoch 2, ranking until epoch 3
+            auction_transaction = auction.create(
+                (token,),
+                None,
+                None,
+                aggr_vk,
+                1, # t_commit
+                2, # t_reveal
+                uid,
+                v0_sealed,
+                ov0,
+                True, # sealed
+                clock_uid(pub_clock), # clock
+                3 # t_rank
+            )
+            auction_object = auction_transaction['transaction']['outputs'][1]
+
+            ## commit
+            for i in range(len(bidders)):
+                commit_transaction = auction.commit(
+                    (auction_object, ),
+                    (clock_object, ),
+                    None,
+                    bidders[i][0], # seq
+                    bidders[i][1], # v
+                    bidders[i][2] # sigma
+                )
+                auction_object = commit_transaction['transaction']['outputs'][0]
+
+            ## seal, at epoch 1
+            clock_object = clock.tick((clock_object, ), None, None, priv_clock)['transaction']['outputs'][0]
+            transaction = auction.seal(
+                (auction_object, ),
+                (clock_object, ),
+                None,
+                bidders[1][0], # seq
+                openings[1][0], # v
+                openings[1][1], # ov
+                bidders[1][2] # sigma
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/seal', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            ## seal a bid other than the one in the credential
+            transaction = auction.seal(
+                (auction_object, ),
+                (clock_object, ),
+                None,
+                bidders[2][0], # seq
+                bidders[2][1] + 1, # v
+                openings[2][1], # ov
+                bidders[2][2] # sigma
+            )
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/seal', json=transaction_to_solution(transaction)
+            )
+            self.assertFalse(response.json()['success'])
+
+    # --------------------------------------------------------------
+    # test rank
+    # --------------------------------------------------------------
+    def test_rank(self):
+        with auction_contract.test_service():
+            (auction_object, clock_object) = sealed_auction(v0_sealed)
+
+            ## rank
+            transaction = auction.rank(
+                (auction_object, ),
+                (clock_object, ),
+                None,
+                openings,
+                v0_sealed,
+                ov0
+            )
+            (sealed_object, auction_object) = (auction_object, transaction['transaction']['outputs'][0])
+
+            # the same proofs, naming a lower bid as winner
+            solution = transaction_to_solution(transaction)
+            new_auction = loads(solution['outputs'][0])
+            new_auction['winner'] = 1
+            solution['outputs'] = [dumps(new_auction)]
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/rank', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+            # a tampered range proof
+            solution = transaction_to_solution(transaction)
+            pi_rank = unpack(solution['parameters'][0])
+            (C, A0, A1, c0, z0, z1) = pi_rank[1]
+            pi_rank[1] = (C, A0, A1, c0, [z0[0] + 1] + list(z0[1:]), z1)
+            solution['parameters'] = [pack(pi_rank)] + list(solution['parameters'][1:])
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/rank', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/rank', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+            self.assertEqual(loads(auction_object)['winner'], len(bidders)-1)
+
+            ## withdraw a losing bid, still sealed
+            transaction = sealed_withdraw(auction_object, clock_object, 1)
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/withdraw', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # the same withdraw, before the ranking
+            solution = transaction_to_solution(transaction)
+            new_auction = loads(sealed_object)
+            new_auction['list'][1] = None
+            (solution['inputs'], solution['outputs']) = ([sealed_object], [dumps(new_auction)])
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/withdraw', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+    # --------------------------------------------------------------
+    # test rank of equal bids
+    # NOTE: if multiple biggest bids, the first bidder wins
+    # --------------------------------------------------------------
+    def test_rank_tie(self):
+        with auction_contract.test_service():
+            # the last bidder ties with the highest bid
+            tied = bidders + [deposit(bidders[-1][1])]
+            opened = dict(openings)
+            opened[len(bidders)] = (bidders[-1][1], o.random())
+            (auction_object, clock_object) = sealed_auction(v0_sealed, tied, opened)
+
+            ## rank
+            transaction = auction.rank(
+                (auction_object, ),
+                (clock_object, ),
+                None,
+                opened,
+                v0_sealed,
+                ov0
+            )
+            self.assertEqual(loads(transaction['transaction']['outputs'][0])['winner'], len(bidders)-1)
+
+            # the same proofs, resolving the tie toward the later bid
+            solution = transaction_to_solution(transaction)
+            new_auction = loads(solution['outputs'][0])
+            new_auction['winner'] = len(bidders)
+            solution['outputs'] = [dumps(new_auction)]
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/rank', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/rank', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+
+    # --------------------------------------------------------------
+    # test rank with withheld openings
+    # --------------------------------------------------------------
+    def test_rank_withheld(self):
+        with auction_contract.test_service():
+            (auction_object, clock_object) = sealed_auction(v0_sealed)
+
+            ## rank; the highest bidder withholds its opening
+            withheld = len(bidders)-1
+            subset = dict((i, openings[i]) for i in openings if i != withheld)
+            self.assertRaises(AssertionError, auction.rank, (auction_object, ), (clock_object, ), None, subset, v0_sealed, ov0)
+
+            # a ranking of the other bids only, naming the second highest bid as winner
+            hidden = loads(auction_object)
+            hidden['list'][withheld] = None
+            transaction = auction.rank((dumps(hidden), ), (clock_object, ), None, subset, v0_sealed, ov0)
+            solution = transaction_to_solution(transaction)
+            new_auction = loads(auction_object)
+            new_auction['winner'] = withheld-1
+            (solution['inputs'], solution['outputs']) = ([auction_object], [dumps(new_auction)])
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/rank', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+            ## every bid is withdrawn after the deadline, at epoch 3
+            clock_object = clock.tick((clock_object, ), None, None, priv_clock)['transaction']['outputs'][0]
+            for i in range(len(bidders)):
+                transaction = sealed_withdraw(auction_object, clock_object, i)
+                response = requests.post(
+                    'http://127.0.0.1:5000/' + auction_contract.contract_name
+                    + '/withdraw', json=transaction_to_solution(transaction)
+                )
+                self.assertTrue(response.json()['success'])
+                auction_object = transaction['transaction']['outputs'][0]
+
+    # --------------------------------------------------------------
+    # test ranking deadline
+    # --------------------------------------------------------------
+    def test_rank_deadline(self):
+        with auction_contract.test_service():
+            # no bid reaches the minimum price, so there is no ranking
+            (auction_object, clock_object) = sealed_auction(v0)
+
+            ## withdraw, before the deadline
+            early_clock = clock_object
+            clock_object = clock.tick((clock_object, ), None, None, priv_clock)['transaction']['outputs'][0]
+            solution = transaction_to_solution(sealed_withdraw(auction_object, clock_object, 0))
+            solution['referenceInputs'] = [early_clock]
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/withdraw', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+            ## withdraw, at epoch 3
+            for i in range(len(bidders)):
+                transaction = sealed_withdraw(auction_object, clock_object, i)
+                response = requests.post(
+                    'http://127.0.0.1:5000/' + auction_contract.contract_name
+                    + '/withdraw', json=transaction_to_solution(transaction)
+                )
+                self.assertTrue(response.json()['success'])
+                auction_object = transaction['transaction']['outputs'][0]
+
+    # --------------------------------------------------------------
+    # test time windows
+    # --------------------------------------------------------------
+    def test_windows(self):
+        with auction_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = auction.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # clock, at epoch 0
+            clock_object = clock_at(0)
+
+            # create auction; commits until epoch 1, reveals until epoch 2
+            auction_transaction = auction.create(
+                (token,),
+                None,
+                None,
+                aggr_vk,
+                1,
+                2,
+                uid,
+                v0,
+                ov0,
+                False, # sealed
+                clock_uid(pub_clock)
+            )
+            auction_object = auction_transaction['transaction']['outputs'][1]
+
+            ## commit
+            for i in range(len(bidders)):
+                commit_transaction = auction.commit(
+                    (auction_object, ),
+                    (clock_object, ),
+                    None,
+                    bidders[i][0], # seq
+                    bidders[i][1], # v
+                    bidders[i][2] # sigma
+                )
+                auction_object = commit_transaction['transaction']['outputs'][0]
+
+            ## commit, too late
+            (seq, v, sigma) = deposit(5)
+            transaction = auction.commit((auction_object, ), (clock_at(1), ), None, seq, v, sigma)
+            self.assertFalse(checked('commit', transaction_to_solution(transaction)))
+
+            ## reveal, too early
+            transaction = auction.reveal(
+                (auction_object, ),
+                (clock_object, ),
+                (dumps(bidders[1][1]),), # v
+                bidders[1][0], # seq
+                bidders[1][2] # sigma
+            )
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/reveal', json=transaction_to_solution(transaction)
+            )
+            self.assertFalse(response.json()['success'])
+
+            ## reveal, at epoch 1
+            clock_object = clock.tick((clock_object, ), None, None, priv_clock)['transaction']['outputs'][0]
+            transaction = auction.reveal(
+                (auction_object, ),
+                (clock_object, ),
+                (dumps(bidders[1][1]),), # v
+                bidders[1][0], # seq
+                bidders[1][2] # sigma
+            )
+            response = requests.post(
+                'http://127.0.0.1:5000/' + auction_contract.contract_name
+                + '/reveal', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # missing clock, and another owner's clock
+            solution = transaction_to_solution(transaction)
+            for reference_inputs in ([], [clock_at(1, priv_other, pub_other)]):
+                solution['referenceInputs'] = reference_inputs
+                self.assertFalse(checked('reveal', solution))
+
+            # forged ticks: a signature of another epoch, and another owner's tick under this clock's ID
+            forged_epoch = loads(clock_at(0))
+            forged_epoch['epoch'] = 1
+            forged_uid = loads(clock_at(1, priv_other, pub_other))
+            forged_uid['uid'] = clock_uid(pub_clock)
+            for forged in (forged_epoch, forged_uid):
+                solution['referenceInputs'] = [dumps(forged)]
+                self.assertFalse(checked('reveal', solution))
+
+            ## withdraw and submitWork, too early
+            auction_object = transaction['transaction']['outputs'][0]
+            auction_object = auction.reveal(
+                (auction_object, ), (clock_object, ), (dumps(bidders[2][1]),), bidders[2][0], bidders[2][2]
+            )['transaction']['outputs'][0]
+            withdraw_transaction = auction.withdraw(
+                (auction_object, ), (clock_object, ), (dumps(bidders[1][1]), pack(addr)), bidders[1][0], bidders[1][2]
+            )
+            self.assertFalse(checked('withdraw', transaction_to_solution(withdraw_transaction)))
+            submitWork_transaction = auction.submitWork(
+                (auction_object, ), (clock_object, ), (dumps(bidders[2][1]), pack(file_hash)), bidders[2][0], bidders[2][2]
+            )
+            self.assertFalse(checked('submitWork', transaction_to_solution(submitWork_transaction)))
+
+            ## withdraw and submitWork, at epoch 2
+            clock_object = clock.tick((clock_object, ), None, None, priv_clock)['transaction']['outputs'][0]
+            for (method, transaction) in (('withdraw', withdraw_transaction), ('submitWork', submitWork_transaction)):
+                solution = transaction_to_solution(transaction)
+                solution['referenceInputs'] = [clock_object]
+                self.assertTrue(checked(method, solution))
+
+            ## rank, too early and too late; ranking is open at epoch 2
+            (auction_object, clock_object) = sealed_auction(v0_sealed)
+            transaction = auction.rank((auction_object, ), (clock_object, ), None, openings, v0_sealed, ov0)
+            solution = transaction_to_solution(transaction)
+            for epoch in (1, 3):
+                solution['referenceInputs'] = [clock_at(epoch)]
+                self.assertFalse(checked('rank', solution))
+            solution['referenceInputs'] = [clock_object]
+            self.assertTrue(checked('rank', solution))
+
     # --------------------------------------------------------------
     # test withdraw
     # --------------------------------------------------------------
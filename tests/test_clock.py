@@ -0,0 +1,130 @@
+""" test clock """
+
+####################################################################
+# imports
+###################################################################
+# general
+from json import dumps, loads
+import unittest
+import requests
+# chainspace
+from chainspacecontract import transaction_to_solution
+from chainspacecontract.examples.clock import contract as clock_contract
+from chainspacecontract.examples import clock
+# coconut
+from chainspacecontract.examples.utils import *
+
+
+####################################################################
+# clock
+####################################################################
+## clock owner
+(G, g, hs, o) = pet_setup()
+priv_owner = o.random()
+pub_owner = priv_owner*g
+
+
+class Test(unittest.TestCase):
+    # --------------------------------------------------------------
+    # test init
+    # --------------------------------------------------------------
+    def test_init(self):
+        with clock_contract.test_service():
+            ## create transaction
+            transaction = clock.init()
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + clock_contract.contract_name
+                + '/init', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+    # --------------------------------------------------------------
+    # test create clock
+    # --------------------------------------------------------------
+    def test_create_clock(self):
+        with clock_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = clock.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # create clock
+            transaction = clock.create_clock(
+                (token,),
+                None,
+                None,
+                priv_owner,
+                pub_owner
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + clock_contract.contract_name
+                + '/create_clock', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+    # --------------------------------------------------------------
+    # test tick
+    # --------------------------------------------------------------
+    def test_tick(self):
+        with clock_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = clock.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # create clock
+            create_transaction = clock.create_clock(
+                (token,),
+                None,
+                None,
+                priv_owner,
+                pub_owner
+            )
+            clock_object = create_transaction['transaction']['outputs'][1]
+
+            # tick
+            transaction = clock.tick(
+                (clock_object,),
+                None,
+                None,
+                priv_owner
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + clock_contract.contract_name
+                + '/tick', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+            self.assertEqual(loads(transaction['transaction']['outputs'][0])['epoch'], 1)
+
+            # the clock is read by other contracts
+            clock_object = transaction['transaction']['outputs'][0]
+            auction = {'clock' : clock_uid(pub_owner)}
+            self.assertEqual(clock_epoch(auction, (clock_object,)), 1)
+
+            # a tick signed by another key
+            priv_other = o.random()
+            transaction = clock.tick(
+                (clock_object,),
+                None,
+                None,
+                priv_other
+            )
+            response = requests.post(
+                'http://127.0.0.1:5000/' + clock_contract.contract_name
+                + '/tick', json=transaction_to_solution(transaction)
+            )
+            self.assertFalse(response.json()['success'])
+            self.assertRaises(KeyError, clock_epoch, auction, (transaction['transaction']['outputs'][0],))
+
+
+####################################################################
+# main
+###################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -81,6 +81,48 @@ class Test(unittest.TestCase):
             )
             self.assertTrue(response.json()['success'])
 
+    # --------------------------------------------------------------
+    # test register key
+    # --------------------------------------------------------------
+    def test_register_key(self):
+        with coconut_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = coconut_chainspace.init()
+            token = init_transaction['transaction']['outputs'][0]
+            # register key
+            key_transaction = coconut_chainspace.register_key(
+                (token,),
+                None,
+                None,
+                aggr_vk
+            )
+            key = key_transaction['transaction']['outputs'][1]
+            # create instance referring to the key
+            transaction = coconut_chainspace.create(
+                (token,),
+                (key,),
+                None,
+                q,
+                t,
+                n,
+                callback, 
+                aggr_vk,
+            )
+            self.assertNotIn('verifier', loads(transaction['transaction']['outputs'][1]))
+
+            ## submit transactions
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/register_key', json=transaction_to_solution(key_transaction)
+            )
+            self.assertTrue(response.json()['success'])
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/create', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
     # --------------------------------------------------------------
     # test request
     # --------------------------------------------------------------
@@ -189,6 +231,233 @@ class Test(unittest.TestCase):
             print("\n====================================================\n\n")
             # ------------------------------------
 
+    # --------------------------------------------------------------
+    # test request and issue batch
+    # --------------------------------------------------------------
+    def test_issue_batch(self):
+        with coconut_contract.test_service():
+            ## create transactions
+            # init
+            init_transaction = coconut_chainspace.init()
+            token = init_transaction['transaction']['outputs'][0]
+            # create instance
+            create_transaction = coconut_chainspace.create(
+                (token,),
+                None,
+                None,
+                q,
+                t,
+                n,
+                callback, 
+                aggr_vk,
+            )
+            instance = create_transaction['transaction']['outputs'][1]
+            # request many credentials at once
+            users = [elgamal_keygen(params) for _ in range(4)]
+            request_transaction = coconut_chainspace.request_batch(
+                (instance,),
+                None,
+                None,
+                [(public_m, private_m, gamma_i) for (d_i, gamma_i) in users]
+            )
+            old_batch = request_transaction['transaction']['outputs'][1]
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/request_batch', json=transaction_to_solution(request_transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # each authority signs all the requests
+            for i in range(n):
+                transaction = coconut_chainspace.issue_batch(
+                    (old_batch,),
+                    None,
+                    (i,),
+                    sk[i]
+                )
+                old_batch = transaction['transaction']['outputs'][0]
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/issue_batch', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # some crypto - to show that this actually works
+            # ------------------------------------
+            for ((d_i, gamma_i), entry) in zip(users, loads(old_batch)['requests']):
+                sigs_tilde = [unpack(x) for x in entry['sigs']]
+                sigs = [unblind(params, sigma_tilde, d_i) for sigma_tilde in sigs_tilde]
+                aggr_sigma = agg_cred(params, sigs)
+                Theta = prove_cred(params, aggr_vk, aggr_sigma, private_m)
+                self.assertTrue(verify_cred(params, aggr_vk, Theta, public_m=public_m))
+            # ------------------------------------
+
+    # --------------------------------------------------------------
+    # test issue with verified partial signatures
+    # --------------------------------------------------------------
+    def test_issue_verified(self):
+        with coconut_contract.test_service():
+            ## create transactions
+            # init
+            init_transaction = coconut_chainspace.init()
+            token = init_transaction['transaction']['outputs'][0]
+            # keys of the authorities
+            keys = [dumps(key_object(vki)) for vki in vk]
+            # create instance listing the keys of the authorities
+            create_transaction = coconut_chainspace.create(
+                (token,),
+                None,
+                None,
+                q,
+                t,
+                n,
+                callback, 
+                aggr_vk,
+                vk
+            )
+            instance = create_transaction['transaction']['outputs'][1]
+            # request
+            request_transaction = coconut_chainspace.request(
+                (instance,),
+                None,
+                None,
+                public_m, 
+                private_m, 
+                gamma
+            )
+            old_request = request_transaction['transaction']['outputs'][1]
+
+            # issue a credential
+            transaction = coconut_chainspace.issue(
+                (old_request,),
+                (keys[0],),
+                (0,),
+                sk[0]
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/issue', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # issue a credential with the key of another authority
+            transaction = coconut_chainspace.issue(
+                (old_request,),
+                (keys[0],),
+                (0,),
+                sk[1]
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/issue', json=transaction_to_solution(transaction)
+            )
+            self.assertFalse(response.json()['success'])
+
+    # --------------------------------------------------------------
+    # test issue shares and aggregate
+    # --------------------------------------------------------------
+    def test_aggregate(self):
+        with coconut_contract.test_service():
+            ## create transactions
+            # init
+            init_transaction = coconut_chainspace.init()
+            token = init_transaction['transaction']['outputs'][0]
+            # create instance
+            create_transaction = coconut_chainspace.create(
+                (token,),
+                None,
+                None,
+                q,
+                t,
+                n,
+                callback, 
+                aggr_vk,
+            )
+            instance = create_transaction['transaction']['outputs'][1]
+            # request
+            request_transaction = coconut_chainspace.request(
+                (instance,),
+                None,
+                None,
+                public_m, 
+                private_m, 
+                gamma
+            )
+            old_request = request_transaction['transaction']['outputs'][1]
+
+            # all authorities issue their share independently
+            shares = []
+            for i in range(n):
+                transaction = coconut_chainspace.issue_share(
+                    None,
+                    (old_request,),
+                    (i,),
+                    sk[i]
+                )
+                shares.append(transaction['transaction']['outputs'][0])
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/issue_share', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # collect the shares
+            transaction = coconut_chainspace.aggregate(
+                (old_request,) + tuple(shares),
+                None,
+                None
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/aggregate', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # a share of another request
+            other_request = coconut_chainspace.request(
+                (instance,),
+                None,
+                None,
+                public_m, 
+                private_m, 
+                gamma
+            )['transaction']['outputs'][1]
+            other_share = coconut_chainspace.issue_share(None, (other_request,), (0,), sk[0])['transaction']['outputs'][0]
+            transaction = coconut_chainspace.aggregate(
+                (old_request, other_share) + tuple(shares[1:]),
+                None,
+                None
+            )
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/aggregate', json=transaction_to_solution(transaction)
+            )
+            self.assertFalse(response.json()['success'])
+
+            # two shares for the same slot
+            transaction = coconut_chainspace.aggregate(
+                (old_request, shares[0], shares[0]),
+                None,
+                None
+            )
+            response = requests.post(
+                'http://127.0.0.1:5000/' + coconut_contract.contract_name 
+                + '/aggregate', json=transaction_to_solution(transaction)
+            )
+            self.assertFalse(response.json()['success'])
+
     # --------------------------------------------------------------
     # test verify
     # --------------------------------------------------------------
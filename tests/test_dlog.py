@@ -0,0 +1,106 @@
+""" test discrete logarithms of tallies """
+
+####################################################################
+# imports
+###################################################################
+# general
+from tempfile import mkdtemp
+from shutil import rmtree
+import os
+import sys
+import subprocess
+import unittest
+# chainspace
+from chainspacecontract.examples import dlog
+from chainspacecontract.examples.dlog import BabyStepGiantStep, MappedTable, dlog_table
+# coconut
+from chainspacecontract.examples.utils import *
+
+
+####################################################################
+# dlog
+####################################################################
+(G, g, hs, o) = pet_setup()
+base = hs[0]
+bound = 1000
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        dlog._tables.clear()
+        self.dir = mkdtemp()
+        self.path = os.path.join(self.dir, 'table')
+
+    def tearDown(self):
+        dlog._tables.clear()
+        rmtree(self.dir)
+
+    # --------------------------------------------------------------
+    # test save, map and solve
+    # --------------------------------------------------------------
+    def test_round_trip(self):
+        BabyStepGiantStep.build(base, bound).save(self.path)
+        table = BabyStepGiantStep.load(base, bound, self.path)
+        self.assertTrue(isinstance(table.table, MappedTable))
+        for x in [0, 1, 2, 57, bound-1, bound, -1, -bound]:
+            self.assertEqual(table.solve(Bn(x)*base), x)
+
+    # --------------------------------------------------------------
+    # test tallies out of range
+    # --------------------------------------------------------------
+    def test_out_of_range(self):
+        for table in [BabyStepGiantStep.build(base, bound), self.mapped()]:
+            for x in [bound+1, -bound-1, 2*bound+5, 10**9, -10**9]:
+                self.assertEqual(table.solve(Bn(x)*base), None)
+            # not a multiple of the base
+            self.assertEqual(table.solve(o.random()*g), None)
+
+    # --------------------------------------------------------------
+    # test table file missing or stale
+    # --------------------------------------------------------------
+    def test_stale_file(self):
+        # missing
+        self.assertEqual(dlog_table(base, bound, self.path).solve(Bn(12)*base), 12)
+        # saved for another bound
+        dlog._tables.clear()
+        BabyStepGiantStep.build(base, bound+1).save(self.path)
+        with self.assertRaises(ValueError):
+            BabyStepGiantStep.load(base, bound, self.path)
+        self.assertEqual(dlog_table(base, bound, self.path).solve(Bn(12)*base), 12)
+        # saved for another base
+        dlog._tables.clear()
+        BabyStepGiantStep.build(g, bound).save(self.path)
+        with self.assertRaises(ValueError):
+            BabyStepGiantStep.load(base, bound, self.path)
+        # truncated
+        dlog._tables.clear()
+        BabyStepGiantStep.build(base, bound).save(self.path)
+        with open(self.path, 'rb+') as f:
+            f.truncate(os.path.getsize(self.path) // 2)
+        with self.assertRaises(ValueError):
+            BabyStepGiantStep.load(base, bound, self.path)
+        self.assertEqual(dlog_table(base, bound, self.path).solve(Bn(-7)*base), -7)
+
+    # --------------------------------------------------------------
+    # test the petition contract loads with a missing or stale table
+    # --------------------------------------------------------------
+    def test_petition_table(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'stale')
+        for path in [self.path, os.path.join(self.dir, 'missing')]:
+            env = dict(os.environ, PETITION_DLOG_TABLE=path)
+            code = subprocess.call(
+                [sys.executable, '-c', 'from chainspacecontract.examples import petition'], env=env
+            )
+            self.assertEqual(code, 0)
+
+    def mapped(self):
+        BabyStepGiantStep.build(base, bound).save(self.path)
+        return BabyStepGiantStep.load(base, bound, self.path)
+
+
+####################################################################
+# main
+###################################################################
+if __name__ == '__main__':
+    unittest.main()
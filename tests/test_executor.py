@@ -0,0 +1,105 @@
+""" test parallel checker execution """
+
+####################################################################
+# imports
+###################################################################
+# general
+from json import dumps, loads
+import unittest
+# chainspace
+from chainspacecontract import transaction_to_solution
+from chainspacecontract.examples import tumbler
+from chainspacecontract.examples.executor import CheckerPool, CheckError
+# coconut
+from chainspacecontract.examples.utils import *
+from coconut.utils import *
+from coconut.scheme import *
+
+
+####################################################################
+## coconut parameters
+t, n, q = 4, 5, 3 # threshold parameters
+bp_params = setup(q) # bp system's parameters
+(sk, vk) = ttp_keygen(bp_params, t, n) # signers keys
+aggr_vk = agg_key(bp_params, vk, threshold=True)
+
+def fail(message):
+    """ job raising in its worker """
+    raise ValueError(message)
+
+
+
+class Test(unittest.TestCase):
+    # --------------------------------------------------------------
+    # test checker pool
+    # --------------------------------------------------------------
+    def test_checker_pool(self):
+        ## create transactions
+        # init
+        init_transaction = tumbler.init()
+        token = init_transaction['transaction']['outputs'][0]
+
+        # initialise tumbler
+        create_transaction = tumbler.create_tumbler(
+            (token,),
+            None,
+            None,
+            aggr_vk
+        )
+        old_list = create_transaction['transaction']['outputs'][1]
+
+        # redeem some coins
+        solutions = []
+        for ID in range(10, 20):
+            # some crypto
+            # ------------------------------------
+            addr = 100 # merchant address
+            (d, gamma) = elgamal_keygen(bp_params)
+            private_m = [ID, addr]
+            Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+            sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
+            sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
+            sigma = agg_cred(bp_params, sigs)
+            # ------------------------------------
+
+            # one coin carries a forged credential
+            if ID == 13:
+                (h, s) = sigma
+                sigma = (h, s + s)
+
+            transaction = tumbler.redeem(
+                (old_list,),
+                None,
+                (dumps(addr),),
+                sigma,
+                aggr_vk,
+                ID
+            )
+            solutions.append(transaction_to_solution(transaction))
+
+        ## check the redeems on several workers
+        with CheckerPool(workers=2, max_pending=2) as pool:
+            self.assertTrue(pool.check('tumbler', 'redeem', solutions[0]))
+            results = pool.check_many('tumbler', 'redeem', solutions, chunk_size=3)
+        self.assertEqual(results, [ID != 13 for ID in range(10, 20)])
+
+    # --------------------------------------------------------------
+    # test failing jobs release their slot
+    # --------------------------------------------------------------
+    def test_failed_job(self):
+        errors = []
+        with CheckerPool(workers=1, max_pending=1) as pool:
+            # the failure reaches the caller
+            result = pool._submit(fail, ('boom',), error_callback=errors.append)
+            with self.assertRaises(CheckError):
+                result.get(timeout=10)
+            # the slot is free again
+            self.assertEqual(pool._submit(abs, (-3,)).get(timeout=10), 3)
+        self.assertEqual(len(errors), 1)
+
+   
+####################################################################
+# main
+###################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+""" test spent lists """
+
+####################################################################
+# imports
+###################################################################
+# general
+from multiprocessing import Pool
+import unittest
+# chainspace
+from chainspacecontract.examples import nullifiers
+from chainspacecontract.examples.nullifiers import *
+# coconut
+from chainspacecontract.examples.utils import *
+
+
+####################################################################
+# spent lists
+####################################################################
+(G, g, hs, o) = pet_setup()
+
+def spend(n):
+    """ root of the spent list of the first n zetas; run in another process """
+    root = EMPTY_ROOT
+    for i in range(1, n+1):
+        (root, _) = add_nullifier(root, Bn(i)*g)
+    return root
+
+
+class Test(unittest.TestCase):
+    def tearDown(self):
+        set_spent_oracle(None)
+
+    # --------------------------------------------------------------
+    # test insert into a root built by another process
+    # --------------------------------------------------------------
+    def test_fresh_process(self):
+        pool = Pool(1)
+        root = pool.apply(spend, (10,))
+        pool.close()
+        zeta = Bn(42)*g
+
+        # this process has none of the nodes
+        with self.assertRaises(ValueError):
+            add_nullifier(root, zeta)
+
+        # the zetas published on chain are enough to get the path
+        set_spent_oracle(lambda r: [Bn(i)*g for i in range(1, 11)] if r == root else None)
+        (new_root, proof) = add_nullifier(root, zeta)
+        self.assertTrue(check_nullifier(root, new_root, zeta, proof))
+        self.assertTrue(is_spent(root, Bn(3)*g))
+        self.assertTrue(is_spent(new_root, zeta))
+
+        # double spend
+        with self.assertRaises(AssertionError):
+            add_nullifier(root, Bn(3)*g)
+
+    # --------------------------------------------------------------
+    # test the default oracle, replaying the history of the lists
+    # --------------------------------------------------------------
+    def test_history_oracle(self):
+        pool = Pool(1)
+        (root, half) = (pool.apply(spend, (10,)), pool.apply(spend, (4,)))
+        pool.close()
+
+        # the zetas added by each transaction, on this list and on another one
+        history = [[Bn(i)*g for i in range(1, 5)], [], [Bn(5)*g], [Bn(i)*g for i in range(6, 11)]]
+        other = [[Bn(i)*g] for i in range(20, 23)]
+        oracle = history_oracle(history, other)
+        self.assertEqual(oracle(half), [Bn(i)*g for i in range(1, 5)])
+        self.assertEqual(oracle(root), [Bn(i)*g for i in range(1, 11)])
+        self.assertEqual(oracle(EMPTY_ROOT[::-1]), None)
+
+        # it recovers the paths of any root in the history
+        set_spent_oracle(oracle)
+        nullifiers._nodes = LRUCache(NODES_CACHE_SIZE) # as in a process that replayed nothing
+        (new_root, proof) = add_nullifier(half, Bn(42)*g)
+        self.assertTrue(check_nullifier(half, new_root, Bn(42)*g, proof))
+        self.assertTrue(is_spent(root, Bn(7)*g))
+        self.assertFalse(is_spent(half, Bn(7)*g))
+
+        # a history spending a zeta twice is not a valid one
+        with self.assertRaises(AssertionError):
+            history_oracle([[Bn(1)*g], [Bn(1)*g]])
+
+    # --------------------------------------------------------------
+    # test oracle inconsistent with the root
+    # --------------------------------------------------------------
+    def test_wrong_oracle(self):
+        pool = Pool(1)
+        root = pool.apply(spend, (5,))
+        pool.close()
+        set_spent_oracle(lambda r: [Bn(i)*g for i in range(1, 5)])
+        with self.assertRaises(ValueError):
+            add_nullifier(root, Bn(42)*g)
+
+    # --------------------------------------------------------------
+    # test the client cache is bounded
+    # --------------------------------------------------------------
+    def test_bounded(self):
+        root = EMPTY_ROOT
+        for i in range(100, 120):
+            (root, _) = add_nullifier(root, Bn(i)*g)
+        self.assertTrue(nullifiers._nodes.info()['size'] <= NODES_CACHE_SIZE)
+
+
+####################################################################
+# main
+###################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -140,7 +140,91 @@ class Test(unittest.TestCase):
                 d,
                 sigma,
                 aggr_vk,
-                1
+                1 # vote for options[0]
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + petition_contract.contract_name
+                + '/sign', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # the same showing, with the vote swapped for another valid one
+            (enc_v, pi_vote) = petition.make_proof_vote_petition(pet_params, aggr_pk_owner, 1, len(options))
+            solution = transaction_to_solution(transaction)
+            new_petition = loads(solution['outputs'][0])
+            new_petition['scores'] = petition.add_votes(loads(old_petition)['scores'], enc_v)
+            solution['outputs'] = [dumps(new_petition)] + list(solution['outputs'][1:])
+            parameters = list(solution['parameters'])
+            (parameters[5], parameters[6]) = (pack(enc_v), pack(pi_vote))
+            solution['parameters'] = parameters
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + petition_contract.contract_name
+                + '/sign', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+            # a field the checker does not declare as mutated
+            solution = transaction_to_solution(transaction)
+            new_petition = loads(solution['outputs'][0])
+            new_petition['t_owners'] = 1
+            solution['outputs'] = [dumps(new_petition)] + list(solution['outputs'][1:])
+            response = requests.post(
+                'http://127.0.0.1:5000/' + petition_contract.contract_name
+                + '/sign', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+
+    # --------------------------------------------------------------
+    # test sign with more than two options
+    # --------------------------------------------------------------
+    def test_sign_options(self):
+        with petition_contract.test_service():
+            # create transaction
+            # init
+            init_transaction = petition.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # initialise petition
+            create_petition_transaction = petition.create_petition(
+                (token,),
+                None,
+                None,
+                UUID,
+                ['RED', 'GREEN', 'BLUE', 'NONE'],
+                sk_owners[0],
+                aggr_pk_owner,
+                t_owners,
+                n_owners,
+                aggr_vk
+            )
+            old_petition = create_petition_transaction['transaction']['outputs'][1]
+            old_list = create_petition_transaction['transaction']['outputs'][2]
+
+            # some crypto to get the credentials
+            # ------------------------------------
+            (d, gamma) = elgamal_keygen(bp_params)
+            private_m = [d]
+            Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+            sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
+            sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
+            sigma = agg_cred(bp_params, sigs)
+            # ------------------------------------
+
+            # add signature to th petition
+            transaction = petition.sign(
+                (old_petition, old_list),
+                None,
+                None,
+                d,
+                sigma,
+                aggr_vk,
+                None, # vote, for two-option petitions
+                2 # option 'BLUE'
             )
 
             ## submit transaction
@@ -150,6 +234,66 @@ class Test(unittest.TestCase):
             )
             self.assertTrue(response.json()['success'])
 
+            # a two-option vote is refused
+            self.assertRaises(AssertionError, petition.sign, (old_petition, old_list), None, None, d, sigma, aggr_vk, 2)
+
+
+    # --------------------------------------------------------------
+    # test sign batch
+    # --------------------------------------------------------------
+    def test_sign_batch(self):
+        with petition_contract.test_service():
+            # create transaction
+            # init
+            init_transaction = petition.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # initialise petition
+            create_petition_transaction = petition.create_petition(
+                (token,),
+                None,
+                None,
+                UUID,
+                options,
+                sk_owners[0],
+                aggr_pk_owner,
+                t_owners,
+                n_owners,
+                aggr_vk
+            )
+            old_petition = create_petition_transaction['transaction']['outputs'][1]
+            old_list = create_petition_transaction['transaction']['outputs'][2]
+
+            # collect the ballots of several signers
+            ballots = []
+            for i in range(3):
+                # some crypto to get the credentials
+                # ------------------------------------
+                (d, gamma) = elgamal_keygen(bp_params)
+                private_m = [d]
+                Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+                sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
+                sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
+                sigma = agg_cred(bp_params, sigs)
+                # ------------------------------------
+
+                ballots.append(petition.make_ballot(old_petition, d, sigma, aggr_vk, i % 2))
+
+            # add all the signatures to the petition at once
+            transaction = petition.sign_batch(
+                (old_petition, old_list),
+                None,
+                None,
+                ballots
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + petition_contract.contract_name 
+                + '/sign_batch', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
 
     # --------------------------------------------------------------
     # test tally
@@ -196,7 +340,7 @@ class Test(unittest.TestCase):
                     d,
                     sigma,
                     aggr_vk,
-                    1 # vote
+                    1 # vote for options[0]
                 )
                 old_petition = sign_transaction['transaction']['outputs'][0]
                 old_list = sign_transaction['transaction']['outputs'][1]
@@ -221,6 +365,87 @@ class Test(unittest.TestCase):
             self.assertTrue(response.json()['success'])
 
 
+    # --------------------------------------------------------------
+    # test tally batch
+    # --------------------------------------------------------------
+    def test_tally_batch(self):
+        with petition_contract.test_service():
+            # create transaction
+            # init
+            init_transaction = petition.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # initialise petitions
+            petitions = []
+            for i in range(3):
+                create_petition_transaction = petition.create_petition(
+                    (token,),
+                    None,
+                    None,
+                    UUID,
+                    options,
+                    sk_owners[0],
+                    aggr_pk_owner,
+                    t_owners,
+                    n_owners,
+                    aggr_vk
+                )
+                token = create_petition_transaction['transaction']['outputs'][0]
+                old_petition = create_petition_transaction['transaction']['outputs'][1]
+                old_list = create_petition_transaction['transaction']['outputs'][2]
+
+                # some crypto to get the credentials
+                # ------------------------------------
+                (d, gamma) = elgamal_keygen(bp_params)
+                private_m = [d]
+                Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+                sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
+                sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
+                sigma = agg_cred(bp_params, sigs)
+                # ------------------------------------
+
+                sign_transaction = petition.sign(
+                    (old_petition, old_list),
+                    None,
+                    None,
+                    d,
+                    sigma,
+                    aggr_vk,
+                    1 # vote for options[0]
+                )
+                petitions.append(sign_transaction['transaction']['outputs'][0])
+
+            # tally all the petitions at once
+            for i in range(t_owners):
+                transaction = petition.tally_batch(
+                    tuple(petitions),
+                    None,
+                    None,
+                    sk_owners[i],
+                    i,
+                    t_owners
+                )
+                petitions = transaction['transaction']['outputs']
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + petition_contract.contract_name 
+                + '/tally_batch', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # a field the checker does not declare as mutated, in one of the petitions
+            solution = transaction_to_solution(transaction)
+            last_petition = loads(solution['outputs'][-1])
+            last_petition['options'] = list(reversed(last_petition['options']))
+            solution['outputs'] = list(solution['outputs'][:-1]) + [dumps(last_petition)]
+            response = requests.post(
+                'http://127.0.0.1:5000/' + petition_contract.contract_name 
+                + '/tally_batch', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+
     # --------------------------------------------------------------
     # test read
     # --------------------------------------------------------------
@@ -266,7 +491,7 @@ class Test(unittest.TestCase):
                     d,
                     sigma,
                     aggr_vk,
-                    1 # vote
+                    1 # vote for options[0]
                 )
                 old_petition = sign_transaction['transaction']['outputs'][0]
                 old_list = sign_transaction['transaction']['outputs'][1]
@@ -298,6 +523,8 @@ class Test(unittest.TestCase):
             )
             self.assertTrue(response.json()['success'])
 
+            self.assertEqual(loads(transaction['transaction']['returns'][0]), {'YES': 3, 'NO': 0})
+
             print("\n\n==================== OUTCOME ====================\n")
             print('OUTCOME: ', loads(transaction['transaction']['returns'][0]))
             print("\n===================================================\n\n")
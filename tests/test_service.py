@@ -0,0 +1,144 @@
+""" test the contract service """
+
+####################################################################
+# imports
+###################################################################
+# general
+from json import dumps, loads
+import socket
+import time
+import unittest
+import requests
+# chainspace
+from chainspacecontract import transaction_to_solution
+from chainspacecontract.examples import tumbler
+from chainspacecontract.examples.executor import CheckerPool
+from chainspacecontract.examples.service import ContractService, post_bulk
+# coconut
+from chainspacecontract.examples.utils import *
+from coconut.utils import *
+from coconut.scheme import *
+
+
+####################################################################
+## coconut parameters
+t, n, q = 4, 5, 3 # threshold parameters
+bp_params = setup(q) # bp system's parameters
+(sk, vk) = ttp_keygen(bp_params, t, n) # signers keys
+aggr_vk = agg_key(bp_params, vk, threshold=True)
+
+## service address
+PORT = 5001
+
+
+def create_tumbler_solution(shards):
+    token = tumbler.init()['transaction']['outputs'][0]
+    transaction = tumbler.create_tumbler((token,), None, None, aggr_vk, shards)
+    return transaction_to_solution(transaction)
+
+def post(path, body):
+    return ('POST %s HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Length: %d\r\n\r\n' % (path, len(body))).encode() + body
+
+def read_responses(sock, count):
+    """ bodies of the next 'count' responses with a Content-Length """
+    (data, bodies) = (b'', [])
+    while len(bodies) < count:
+        data += sock.recv(65536)
+        while b'\r\n\r\n' in data:
+            (head, rest) = data.split(b'\r\n\r\n', 1)
+            length = int(head.lower().split(b'content-length:')[1].split(b'\r\n')[0])
+            if len(rest) < length: break
+            bodies.append(loads(rest[:length].decode('utf8')))
+            data = rest[length:]
+    return bodies
+
+
+class Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = CheckerPool(workers=2)
+        cls.service = ContractService(cls.pool, port=PORT).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.stop()
+        cls.pool.close()
+
+    # --------------------------------------------------------------
+    # test a single check
+    # --------------------------------------------------------------
+    def test_check(self):
+        ## a redeem, checked by the tumbler's checker on the pool
+        create_transaction = tumbler.create_tumbler(
+            (tumbler.init()['transaction']['outputs'][0],), None, None, aggr_vk
+        )
+        old_list = create_transaction['transaction']['outputs'][1]
+        (ID, addr) = (10, 100)
+        (d, gamma) = elgamal_keygen(bp_params)
+        Lambda = prepare_blind_sign(bp_params, gamma, [ID, addr])
+        sigs = [unblind(bp_params, blind_sign(bp_params, ski, gamma, Lambda), d) for ski in sk]
+        sigma = agg_cred(bp_params, sigs)
+        solution = transaction_to_solution(
+            tumbler.redeem((old_list,), None, (dumps(addr),), sigma, aggr_vk, ID)
+        )
+
+        url = 'http://127.0.0.1:%d/tumbler/redeem' % PORT
+        response = requests.post(url, json=solution)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+
+        # paid to another address
+        solution['parameters'] = [dumps(addr + 1)] + list(solution['parameters'][1:])
+        self.assertFalse(requests.post(url, json=solution).json()['success'])
+
+        # malformed requests
+        self.assertEqual(requests.post(url, data='{').status_code, 400)
+        self.assertEqual(requests.post('http://127.0.0.1:%d/unknown/redeem' % PORT, data='{}').status_code, 404)
+
+    # --------------------------------------------------------------
+    # test pipelined requests
+    # --------------------------------------------------------------
+    def test_pipelining(self):
+        solutions = [create_tumbler_solution(shards) for shards in (1, 2, 3)]
+        solutions[1]['outputs'] = solutions[1]['outputs'][:-1] # drop a shard
+
+        ## send all the requests before reading any response; they are answered in order, one after another
+        sock = socket.create_connection(('127.0.0.1', PORT))
+        sock.sendall(b''.join(
+            post('/tumbler/create_tumbler', dumps(solution).encode('utf8')) for solution in solutions
+        ))
+        responses = read_responses(sock, len(solutions))
+        sock.close()
+        self.assertEqual([response['success'] for response in responses], [True, False, True])
+
+    # --------------------------------------------------------------
+    # test streamed results
+    # --------------------------------------------------------------
+    def test_stream(self):
+        solutions = [create_tumbler_solution(2) for _ in range(4)]
+        response = requests.post(
+            'http://127.0.0.1:%d/tumbler/create_tumbler/stream' % PORT,
+            data='\n'.join(dumps(solution) for solution in solutions),
+            stream=True
+        )
+        results = [loads(line) for line in response.iter_lines() if line]
+        self.assertEqual([result['index'] for result in results], list(range(4)))
+        self.assertTrue(all(result['success'] for result in results))
+
+    # --------------------------------------------------------------
+    # test bulk submission
+    # --------------------------------------------------------------
+    def test_bulk(self):
+        solutions = [create_tumbler_solution(shards) for shards in range(1, 11)]
+        solutions[4]['outputs'] = solutions[4]['outputs'][:-1] # drop a shard
+
+        ## submit all the solutions in one request
+        results = post_bulk('tumbler', 'create_tumbler', solutions, port=PORT)
+        self.assertEqual(results, [i != 4 for i in range(10)])
+
+   
+####################################################################
+# main
+###################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+""" test the challenges of the credentials showing """
+
+####################################################################
+# imports
+###################################################################
+# general
+import unittest
+# petlib
+from petlib.bn import Bn
+# chainspace
+from chainspacecontract.examples.showing import make_showing, showing_challenge
+from chainspacecontract.examples.petition_proofs import make_proof_credentials_petition, uuid_point
+from chainspacecontract.examples.auction_proofs import make_proof_sealed
+# coconut
+from chainspacecontract.examples.utils import *
+from coconut.utils import *
+from coconut.proofs import *
+from coconut.scheme import *
+
+
+####################################################################
+# coconut parameters
+####################################################################
+t, n, q = 2, 3, 2 # threshold parameters
+bp_params = setup(q) # bp system's parameters
+(G, o, g1, hs, g2, e) = bp_params
+(sk, vk) = ttp_keygen(bp_params, t, n) # authorities keys
+aggr_vk = agg_key(bp_params, vk, threshold=True)
+(_, alpha, beta) = aggr_vk
+private_m = [o.random(), 7] # secret and bid
+bind_m = [Bn(50)] # value bound to the showing
+(d, gamma) = elgamal_keygen(bp_params)
+Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+sigma = agg_cred(bp_params, [unblind(bp_params, blind_sign(bp_params, ski, gamma, Lambda), d) for ski in sk])
+
+def witnesses(Theta, zeta, base):
+    """ witnesses commitments Aw, Bw, Cw of a showing, re-computed as coconut does """
+    (kappa, nu, (h, s), pi_show) = Theta
+    (c, rm, rt) = pi_show[:3]
+    Aw = c*kappa + rt*g2 + (1-c)*alpha + ec_sum([rm[i]*beta[i] for i in range(len(rm))])
+    Bw = c*nu + rt*h
+    Cw = rm[0]*base + c*zeta
+    return (c, [Aw, Bw, Cw])
+
+
+class Test(unittest.TestCase):
+    # --------------------------------------------------------------
+    # test the zeta transcript
+    # --------------------------------------------------------------
+    def test_zeta(self):
+        (Theta, zeta) = make_showing(bp_params, aggr_vk, sigma, private_m, bind_m=bind_m)
+        (c, commitments) = witnesses(Theta, zeta, g1)
+        bind = [item*g1 for item in bind_m]
+        self.assertEqual(c, to_challenge([g1, g2, alpha]+commitments+hs+beta+bind))
+        self.assertEqual(c, showing_challenge(vk_tables(bp_params, aggr_vk), commitments, bind_m))
+
+    # --------------------------------------------------------------
+    # test the petition transcript
+    # --------------------------------------------------------------
+    def test_petition(self):
+        UUID = Bn(1234)
+        (kappa, nu, sigma_prime, zeta, pi_petition) = make_proof_credentials_petition(
+            bp_params, aggr_vk, sigma, private_m[:1], UUID, bind_m
+        )
+        (c, commitments) = witnesses((kappa, nu, sigma_prime, pi_petition), zeta, uuid_point(G, UUID))
+        bind = [item*g1 for item in bind_m]
+        self.assertEqual(c, to_challenge([g1, g2, alpha]+commitments+hs+beta+bind))
+        self.assertEqual(c, showing_challenge(vk_tables(bp_params, aggr_vk), commitments, bind_m))
+
+    # --------------------------------------------------------------
+    # test the sealed bid transcript
+    # --------------------------------------------------------------
+    def test_sealed(self):
+        ov = o.random()
+        (Theta, zeta, cv) = make_proof_sealed(bp_params, aggr_vk, sigma, private_m[0], private_m[1], ov, bind_m)
+        (c, commitments) = witnesses(Theta, zeta, g1)
+        (rm, ro) = (Theta[3][1], Theta[3][3])
+        Dw = rm[1]*g1 + ro[0]*hs[0] + c*cv
+        bind = [item*g1 for item in bind_m]
+        self.assertEqual(c, to_challenge([g1, g2, alpha]+commitments+[cv, Dw]+hs+beta+bind))
+
+
+####################################################################
+# main
+###################################################################
+if __name__ == '__main__':
+    unittest.main()
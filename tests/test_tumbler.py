@@ -15,6 +15,7 @@ import requests
 from chainspacecontract import transaction_to_solution
 from chainspacecontract.examples.tumbler import contract as tumbler_contract
 from chainspacecontract.examples import tumbler
+from chainspacecontract.examples.batch import batch_check
 # petlib
 from petlib.ecdsa import do_ecdsa_sign, do_ecdsa_verify
 from petlib.bn import Bn
@@ -126,6 +127,174 @@ class Test(unittest.TestCase):
             )
             self.assertTrue(response.json()['success'])
 
+
+    # --------------------------------------------------------------
+    # test redeem with a registered key
+    # --------------------------------------------------------------
+    def test_redeem_registered_key(self):
+        with tumbler_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = tumbler.init()
+            token = init_transaction['transaction']['outputs'][0]
+            key = dumps(key_object(aggr_vk))
+
+            # initialise tumbler; the list only stores the key's fingerprint
+            create_transaction = tumbler.create_tumbler(
+                (token,),
+                (key,),
+                None,
+                aggr_vk
+            )
+            old_list = create_transaction['transaction']['outputs'][1]
+
+            # some crypto
+            # ------------------------------------
+            ID = 10 # sequence number embedded in the credentials  
+            addr = 100 # merchant address
+            (d, gamma) = elgamal_keygen(bp_params)
+            private_m = [ID, addr]
+            Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+            sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
+            sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
+            sigma = agg_cred(bp_params, sigs)
+            # ------------------------------------
+
+            # redeem, giving the key object as reference input
+            transaction = tumbler.redeem(
+                (old_list,),
+                (key,),
+                (dumps(addr),),
+                sigma,
+                aggr_vk,
+                ID
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + tumbler_contract.contract_name 
+                + '/redeem', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+
+    # --------------------------------------------------------------
+    # test redeem on a sharded spent list
+    # --------------------------------------------------------------
+    def test_redeem_sharded(self):
+        with tumbler_contract.test_service():
+            ## create transaction
+            # init
+            init_transaction = tumbler.init()
+            token = init_transaction['transaction']['outputs'][0]
+
+            # initialise tumbler with 4 shards
+            shards = 4
+            create_transaction = tumbler.create_tumbler(
+                (token,),
+                None,
+                None,
+                aggr_vk,
+                shards
+            )
+            spent_lists = create_transaction['transaction']['outputs'][1:]
+
+            # some crypto
+            # ------------------------------------
+            ID = 10 # sequence number embedded in the credentials  
+            addr = 100 # merchant address
+            (d, gamma) = elgamal_keygen(bp_params)
+            private_m = [ID, addr]
+            Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+            sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
+            sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
+            sigma = agg_cred(bp_params, sigs)
+            # ------------------------------------
+
+            # redeem against the shard owning the coin
+            transaction = tumbler.redeem(
+                (spent_lists[tumbler.redeem_shard(ID, shards)],),
+                None,
+                (dumps(addr),),
+                sigma,
+                aggr_vk,
+                ID
+            )
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + tumbler_contract.contract_name 
+                + '/redeem', json=transaction_to_solution(transaction)
+            )
+            self.assertTrue(response.json()['success'])
+
+            # the same redeem, moved to a shard that does not own the coin
+            wrong = (tumbler.redeem_shard(ID, shards) + 1) % shards
+            solution = transaction_to_solution(transaction)
+            new_list = loads(solution['outputs'][0])
+            new_list['shard'] = wrong
+            solution['inputs'] = [spent_lists[wrong]]
+            solution['outputs'] = [dumps(new_list)]
+
+            ## submit transaction
+            response = requests.post(
+                'http://127.0.0.1:5000/' + tumbler_contract.contract_name
+                + '/redeem', json=solution
+            )
+            self.assertFalse(response.json()['success'])
+
+
+    # --------------------------------------------------------------
+    # test batch verification of redeems
+    # --------------------------------------------------------------
+    def test_batch_redeem(self):
+        ## create transactions
+        # init
+        init_transaction = tumbler.init()
+        token = init_transaction['transaction']['outputs'][0]
+
+        # initialise tumbler
+        create_transaction = tumbler.create_tumbler(
+            (token,),
+            None,
+            None,
+            aggr_vk
+        )
+        old_list = create_transaction['transaction']['outputs'][1]
+
+        # redeem some coins
+        solutions = []
+        for ID in range(10, 13):
+            # some crypto
+            # ------------------------------------
+            addr = 100 # merchant address
+            (d, gamma) = elgamal_keygen(bp_params)
+            private_m = [ID, addr]
+            Lambda = prepare_blind_sign(bp_params, gamma, private_m)
+            sigs_tilde = [blind_sign(bp_params, ski, gamma, Lambda) for ski in sk]
+            sigs = [unblind(bp_params, sigma_tilde, d) for sigma_tilde in sigs_tilde]
+            sigma = agg_cred(bp_params, sigs)
+            # ------------------------------------
+
+            # the second coin carries a forged credential
+            if ID == 11:
+                (h, s) = sigma
+                sigma = (h, s + s)
+
+            transaction = tumbler.redeem(
+                (old_list,),
+                None,
+                (dumps(addr),),
+                sigma,
+                aggr_vk,
+                ID
+            )
+            solutions.append(transaction_to_solution(transaction))
+
+        ## check all redeems at once
+        results = batch_check(tumbler.contract.checkers['redeem'], solutions)
+        self.assertEqual(results, [True, False, True])
+
    
 ####################################################################
 # main
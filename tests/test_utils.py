@@ -0,0 +1,183 @@
+""" test the helpers shared by the contracts """
+
+####################################################################
+# imports
+###################################################################
+# general
+from json import dumps, loads
+from binascii import hexlify
+import unittest
+# petlib
+from petlib.bn import Bn
+from petlib.pack import encode
+# chainspace
+from chainspacecontract.examples import utils
+# coconut
+from chainspacecontract.examples.utils import *
+from coconut.utils import *
+
+
+####################################################################
+# parameters
+####################################################################
+q = 2
+bp_params = bp_setup(q)
+(G, o, g1, hs, g2, e) = bp_params
+T = bp_tables(q)
+
+## scalars on the edges of the tables' windows
+edges = [Bn(0), Bn(1), Bn(-1), Bn(15), Bn(16), o-1, o, o+1, -o-1, Bn(2)**300]
+
+
+class Test(unittest.TestCase):
+    # --------------------------------------------------------------
+    # test fixed-base tables
+    # --------------------------------------------------------------
+    def test_fixed_base(self):
+        for (table, P) in [(T.g1, g1), (T.g2, g2), (FixedBase(hs[1], o), hs[1])]:
+            for k in edges + [o.random() for _ in range(5)]:
+                self.assertEqual(table.mul(k), k*P)
+            self.assertEqual(table.mul(7), Bn(7)*P)
+            self.assertTrue(table.mul(0).isinf())
+
+    # --------------------------------------------------------------
+    # test multi-exponentiation
+    # --------------------------------------------------------------
+    def test_multi_mul(self):
+        # each strategy: native, Straus and Pippenger, and fixed bases mixed in
+        for n in (1, utils.STRAUS_THRESHOLD-1, utils.STRAUS_THRESHOLD, utils.PIPPENGER_THRESHOLD-1, utils.PIPPENGER_THRESHOLD):
+            scalars = [edges[i % len(edges)] if i % 2 else o.random() for i in range(n)]
+            points = [o.random()*g1 for _ in range(n)]
+            expected = ec_sum([k*P for (k, P) in zip(scalars, points)])
+            self.assertEqual(multi_mul(scalars, points, o), expected)
+            self.assertEqual(multi_mul(scalars+[Bn(3)], points+[T.hs[0]], o), expected + Bn(3)*hs[0])
+            self.assertEqual(secret_mul(scalars, points), expected)
+
+        # in G2, as in the showings
+        scalars = [o.random() for _ in range(5)]
+        points = [o.random()*g2 for _ in range(4)] + [T.g2]
+        self.assertEqual(multi_mul(scalars, points, o), ec_sum([k*P for (k, P) in zip(scalars, points[:4]+[g2])]))
+
+        # zero sums
+        self.assertTrue(multi_mul([Bn(0), o], [g1, T.hs[0]], o).isinf())
+        self.assertTrue(multi_mul([Bn(0)]*utils.STRAUS_THRESHOLD, [g1]*utils.STRAUS_THRESHOLD, o).isinf())
+
+    # --------------------------------------------------------------
+    # test interleavings
+    # --------------------------------------------------------------
+    def test_interleave(self):
+        for n in (1, 2, 8, 40):
+            scalars = [o.random() for _ in range(n)]
+            points = [o.random()*g1 for _ in range(n)]
+            expected = ec_sum([k*P for (k, P) in zip(scalars, points)])
+            integers = [utils._scalar(k) for k in scalars]
+            self.assertEqual(utils._straus(integers, points), expected)
+            self.assertEqual(utils._pippenger(integers, points), expected)
+        self.assertEqual(utils._straus([0, 0], [g1, g1]), None)
+        self.assertEqual(utils._pippenger([0, 0], [g1, g1]), None)
+
+    # --------------------------------------------------------------
+    # test scalars
+    # --------------------------------------------------------------
+    def test_scalars(self):
+        self.assertEqual(T.g1.mul(5), Bn(5)*g1)
+        self.assertEqual(multi_mul([5], [g1], o), Bn(5)*g1)
+        for k in ('1', u'1', 1.0, None, True, [1]):
+            self.assertRaises(TypeError, T.g1.mul, k)
+            self.assertRaises(TypeError, multi_mul, [k], [g1], o)
+            self.assertRaises(TypeError, multi_mul, [k]*utils.STRAUS_THRESHOLD, [g1]*utils.STRAUS_THRESHOLD, o)
+            self.assertRaises(TypeError, secret_mul, [k], [g1])
+
+    # --------------------------------------------------------------
+    # test packing
+    # --------------------------------------------------------------
+    def test_pack(self):
+        for x in [o.random()*g1, o.random()*g2, o.random(), Bn(-5), Bn(0), [g1, g2, Bn(3)]]:
+            packed = pack(x)
+            legacy = hexlify(encode(x)) # format of the values packed before versioning
+            self.assertTrue(packed.startswith(PACK_V1))
+            self.assertFalse(legacy.startswith(PACK_V1))
+            for y in (packed, legacy):
+                self.assertEqual(unpack(y), x)
+                self.assertEqual(unpack(loads(dumps(y))), x) # as stored in objects
+                self.assertEqual(unpack_cached(y), x)
+        self.assertEqual(unpack(None), None)
+
+    # --------------------------------------------------------------
+    # test key fingerprints
+    # --------------------------------------------------------------
+    def test_fingerprint(self):
+        aggr_vk = (g2, o.random()*g2, [o.random()*g2 for _ in range(q)])
+        (packed, legacy) = (pack(aggr_vk), hexlify(encode(aggr_vk)))
+        self.assertEqual(vk_fingerprint(packed), vk_fingerprint(legacy))
+        self.assertEqual(vk_fingerprint(loads(dumps(packed))), vk_fingerprint(packed))
+        self.assertEqual(len(vk_fingerprint(packed)), 64)
+        self.assertNotEqual(vk_fingerprint(pack((g2, g2, [g2]))), vk_fingerprint(packed))
+
+        # a key object found from an object holding the legacy packing's fingerprint
+        key = dumps(key_object(aggr_vk))
+        obj = {'vk_fp' : vk_fingerprint(legacy)}
+        self.assertEqual(resolve_vk(obj, 'vk', [key]), packed)
+        self.assertEqual(key_references(obj), 1)
+        self.assertRaises(KeyError, resolve_vk, obj, 'vk', [])
+
+    # --------------------------------------------------------------
+    # test LRU cache
+    # --------------------------------------------------------------
+    def test_cache(self):
+        cache = LRUCache(2)
+        builds = []
+        def build(value):
+            return lambda: builds.append(value) or value
+        self.assertEqual(cache.get('a', build(1)), 1)
+        self.assertEqual(cache.get('a', build(2)), 1) # hit, not rebuilt
+        self.assertEqual(cache.get('b', build(3)), 3)
+        self.assertEqual(cache.info(), {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 2})
+
+        # the least recently used key is evicted at 'size'
+        cache.get('a', build(4))
+        cache.get('c', build(5))
+        self.assertEqual(cache.get('a', build(6)), 1)
+        self.assertEqual(cache.get('b', build(7)), 7)
+        self.assertEqual(builds, [1, 3, 5, 7])
+        self.assertEqual(cache.info(), {'hits': 3, 'misses': 4, 'size': 2, 'maxsize': 2})
+
+        # counters of the unpack cache
+        before = cache_info()
+        packed = pack(o.random()*g1)
+        unpack_cached(packed)
+        unpack_cached(packed)
+        after = cache_info()
+        self.assertEqual((after['misses'] - before['misses'], after['hits'] - before['hits']), (1, 1))
+        self.assertTrue(after['size'] <= after['maxsize'])
+
+    # --------------------------------------------------------------
+    # test declared mutations
+    # --------------------------------------------------------------
+    def test_mutates(self):
+        accept = lambda *solution: True
+        pinned = mutates(['a'], ['b'])(accept)
+        each = mutates(['a'], each=True)(accept)
+        def check(checker, inputs, outputs):
+            return checker([dumps(x) for x in inputs], (), (), [dumps(x) for x in outputs], (), ())
+        (x, y) = ({'a': 1, 'b': 1, 'c': 1}, {'a': 2, 'b': 2, 'c': 2})
+
+        # one list of fields per input
+        self.assertTrue(check(pinned, [x, y], [dict(x, a=3), dict(y, b=3)]))
+        self.assertFalse(check(pinned, [x, y], [dict(x, b=3), y]))
+        self.assertFalse(check(pinned, [x, y], [x, dict(y, c=3)]))
+        self.assertFalse(check(pinned, [x, y], [dict(x, d=3), y])) # added field
+        self.assertFalse(check(pinned, [x, y], [x])) # missing output
+
+        # the same fields for every input
+        self.assertTrue(check(each, [x, y], [dict(x, a=3), dict(y, a=3)]))
+        self.assertFalse(check(each, [x, y], [dict(x, a=3), dict(y, b=3)]))
+        self.assertFalse(check(each, [x, y], [dict(x, a=3)]))
+        self.assertFalse(check(each, [x, y], [x, y, y]))
+
+
+####################################################################
+# main
+###################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Performance measurements for the scalar multiplication helpers, against the native bplib multiplication."""
+# coconut
+from chainspacecontract.examples.utils import *
+from chainspacecontract.examples.utils import _scalar, _straus, _pippenger
+from coconut.utils import *
+from coconut.scheme import *
+
+## timing functions
+from chainspacecontract.timings.run import *
+
+
+####################################################################
+# parameters
+####################################################################
+q = 4
+bp_params = bp_setup(q)
+(G, o, g1, hs, g2, e) = bp_params
+T = bp_tables(q)
+k = o.random()
+# verifier-shaped linear combinations: a showing's Aw in G2, and a batch of 64 G1 terms
+small = ([o.random() for _ in range(3)], [o.random()*g2 for _ in range(3)])
+large = ([o.random() for _ in range(64)], [o.random()*g1 for _ in range(64)])
+# prover-shaped: one variable base and the fixed bases hs
+mixed = ([o.random() for _ in range(1+q)], [o.random()*g1] + T.hs)
+
+
+####################################################################
+# main
+####################################################################
+RUNS = 10
+def main():
+    print "operation\t\tmean (ms)\t\tsd (ms)\t\truns"
+
+    # == fixed base ===============
+    run(RUNS, '[native] k*g1', lambda: k*g1)
+    run(RUNS, '[table] k*g1', T.g1.mul, k)
+    run(RUNS, '[native] k*g2', lambda: k*g2)
+    run(RUNS, '[table] k*g2', T.g2.mul, k)
+
+    # == multi-exponentiation ===============
+    for (name, (scalars, points)) in [('3 x G2', small), ('64 x G1', large), ('1 x G1 + hs', mixed)]:
+        natives = [Pi.point if isinstance(Pi, FixedBase) else Pi for Pi in points]
+        run(RUNS, '[native] ec_sum ' + name, lambda: ec_sum([ki*Pi for (ki, Pi) in zip(scalars, natives)]))
+        run(RUNS, '[multi_mul] ' + name, multi_mul, scalars, points, o)
+
+    # == native / Straus / Pippenger crossovers ===============
+    for n in (STRAUS_THRESHOLD//2, STRAUS_THRESHOLD, 2*STRAUS_THRESHOLD):
+        scalars = [o.random() for _ in range(n)]
+        points = [o.random()*g2 for _ in range(n)]
+        run(RUNS, '[native] ec_sum %d x G2' % n, lambda: ec_sum([ki*Pi for (ki, Pi) in zip(scalars, points)]))
+        run(RUNS, '[straus] %d x G2' % n, _straus, [_scalar(ki) for ki in scalars], points)
+    for n in (PIPPENGER_THRESHOLD//2, PIPPENGER_THRESHOLD, 2*PIPPENGER_THRESHOLD):
+        scalars = [_scalar(o.random()) for _ in range(n)]
+        points = [o.random()*g1 for _ in range(n)]
+        run(RUNS, '[straus] %d x G1' % n, _straus, scalars, points)
+        run(RUNS, '[pippenger] %d x G1' % n, _pippenger, scalars, points)
+
+
+####################################################################
+if __name__ == '__main__':
+    main()